@@ -0,0 +1,294 @@
+"""Throughput/latency benchmarks against the local fake Mistral server.
+
+Runs the real clients and engines over HTTP (retries, SSE parsing, pydantic
+validation and transcript writing included) and reports calls/sec,
+p50/p95/p99 call latency, client-side overhead per call and peak memory.
+
+    python benchmarks/bench.py --json results.json
+    python benchmarks/bench.py --baseline results.json --tolerance 0.2
+
+Each scenario runs once per --path: "validated" (full pydantic round trips)
+and "fast" (MistralClient(fast=True)). The "codec" rows time only the client's
+own request/response handling, without the network.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import typer
+from rich.console import Console
+from rich.table import Table
+
+from selftalk.client import AsyncMistralClient, MistralClient
+from selftalk.engine import AsyncSelfTalkEngine, EngineConfig, SelfTalkEngine
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.models import ChatRequest, Message
+from selftalk.transcript import JsonlTranscriptSink
+
+# Wide enough for the results table in CI logs
+console = Console() if sys.stdout.isatty() else Console(width=160)
+
+
+@dataclass
+class BenchResult:
+    name: str
+    calls: int
+    seconds: float
+    latencies: List[float] = field(default_factory=list, repr=False)
+    server_s: List[float] = field(default_factory=list, repr=False)
+    connections: int = 0  # TCP connections the server saw; lower means better reuse
+    peak_mem_kib: Optional[float] = None
+
+    @property
+    def calls_per_sec(self) -> float:
+        return self.calls / self.seconds if self.seconds else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def overhead_ms(self) -> float:
+        # Client-observed latency minus time the server spent on the request:
+        # HTTP, JSON, validation and retry bookkeeping on our side
+        if not self.latencies or not self.server_s:
+            return 0.0
+        return (statistics.fmean(self.latencies) - statistics.fmean(self.server_s)) * 1000
+
+    def summary(self) -> Dict[str, float]:
+        data = {
+            "calls": self.calls,
+            "seconds": round(self.seconds, 4),
+            "calls_per_sec": round(self.calls_per_sec, 2),
+            "p50_ms": round(self.percentile(0.50) * 1000, 3),
+            "p95_ms": round(self.percentile(0.95) * 1000, 3),
+            "p99_ms": round(self.percentile(0.99) * 1000, 3),
+            "overhead_ms": round(self.overhead_ms, 3),
+            "connections": self.connections,
+        }
+        if self.peak_mem_kib is not None:
+            data["peak_mem_kib"] = round(self.peak_mem_kib, 1)
+        return data
+
+
+def _latencies(transcript) -> List[float]:
+    return [e["call"]["latency_s"] for e in transcript if e.get("call") and e["call"].get("latency_s") is not None]
+
+
+def _cfg(mode: str, iterations: int, stream: bool) -> EngineConfig:
+    return EngineConfig(system_prompt="You are helpful.", user_goal="Explain caching.", mode=mode, iterations=iterations, stream=stream)
+
+
+Scenario = Tuple[str, Callable[[], BenchResult]]
+
+
+def _suffix(fast: bool) -> str:
+    return " fast" if fast else ""
+
+
+def bench_codec(fast: bool, response_tokens: int, calls: int) -> Scenario:
+    # The client's own per-call work without a network round trip: build and
+    # encode the request body, then decode and parse a completion
+    name = f"codec{_suffix(fast)}"
+
+    def run() -> BenchResult:
+        client = MistralClient(api_key="fake", fast=fast)
+        messages = [Message(role="user" if n % 2 else "assistant", content="word " * 200) for n in range(8)]
+        request = ChatRequest(model="bench", messages=messages, max_tokens=1024)
+        completion = FakeMistralServer.completion({"model": "bench"}, ["token"] * response_tokens)
+        raw = json.dumps(completion).encode()
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            body = client._body(client._payload(request))
+            httpx.Request("POST", client.url, **body).read()
+            client._parse_response(httpx.Response(200, content=raw)).first_message_content()
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - started
+        client.close()
+        return BenchResult(name, calls, elapsed, latencies)
+
+    return name, run
+
+
+def bench_client(server: FakeMistralServer, calls: int, concurrency: int, stream: bool, fast: bool) -> Scenario:
+    name = f"client {'stream' if stream else 'json'} c={concurrency}{_suffix(fast)}"
+
+    def run() -> BenchResult:
+        request = ChatRequest(model="bench", messages=[Message(role="user", content="hello")], max_tokens=256, stream=stream)
+
+        async def _go():
+            limit = asyncio.Semaphore(concurrency)
+            async with AsyncMistralClient(api_key="fake", base_url=server.base_url, fast=fast) as client:
+
+                async def _one():
+                    async with limit:
+                        return await client.chat(request)
+
+                return await asyncio.gather(*(_one() for _ in range(calls)))
+
+        started = time.perf_counter()
+        resps = asyncio.run(_go())
+        elapsed = time.perf_counter() - started
+        return BenchResult(name, len(resps), elapsed, [r.stats.latency_s for r in resps])
+
+    return name, run
+
+
+def bench_engine(server: FakeMistralServer, mode: str, runs: int, iterations: int, stream: bool, fast: bool) -> Scenario:
+    name = f"{mode} x{runs}{_suffix(fast)}"
+
+    def run() -> BenchResult:
+        engine = SelfTalkEngine(MistralClient(api_key="fake", base_url=server.base_url, fast=fast), quiet=True)
+        latencies: List[float] = []
+        with engine, tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            for n in range(runs):
+                with JsonlTranscriptSink(Path(tmp) / f"{n}.jsonl") as sink:
+                    _, transcript = engine.run(_cfg(mode, iterations, stream), sink=sink)
+                    latencies += _latencies(transcript)
+            elapsed = time.perf_counter() - started
+        return BenchResult(name, len(latencies), elapsed, latencies)
+
+    return name, run
+
+
+def bench_batch(server: FakeMistralServer, goals: int, concurrency: int, iterations: int, fast: bool) -> Scenario:
+    name = f"batch {goals} goals c={concurrency}{_suffix(fast)}"
+
+    def run() -> BenchResult:
+        async def _go():
+            client = AsyncMistralClient(api_key="fake", base_url=server.base_url, fast=fast)
+            async with AsyncSelfTalkEngine(client, concurrency=concurrency) as engine:
+                try:
+                    return await engine.run_many([_cfg("critic", iterations, False) for _ in range(goals)])
+                finally:
+                    await client.aclose()
+
+        started = time.perf_counter()
+        results = asyncio.run(_go())
+        elapsed = time.perf_counter() - started
+        latencies = [lat for _, transcript in results for lat in _latencies(transcript)]
+        return BenchResult(name, len(latencies), elapsed, latencies)
+
+    return name, run
+
+
+def _measure(server: FakeMistralServer, scenario: Callable[[], BenchResult], memory: bool) -> BenchResult:
+    before = server.stats.snapshot()
+    result = scenario()
+    after = server.stats.snapshot()
+    result.server_s = after["handling_s"][len(before["handling_s"]):]
+    result.connections = after["connections"] - before["connections"]
+    if memory:
+        # Separate traced pass: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        scenario()
+        result.peak_mem_kib = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+    return result
+
+
+def _regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    problems = []
+    for name, now in results.items():
+        then = baseline.get(name)
+        if not then:
+            continue
+        if then["calls_per_sec"] and now["calls_per_sec"] < then["calls_per_sec"] * (1 - tolerance):
+            problems.append(f"{name}: calls/sec {now['calls_per_sec']} < baseline {then['calls_per_sec']}")
+        if then["p95_ms"] and now["p95_ms"] > then["p95_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {now['p95_ms']}ms > baseline {then['p95_ms']}ms")
+    return problems
+
+
+def main(
+    latency_ms: float = typer.Option(20.0, "--latency-ms", min=0.0, help="Mean server latency per call"),
+    latency_dist: str = typer.Option("lognormal", "--latency-dist", help="fixed, uniform, exponential or lognormal"),
+    response_tokens: int = typer.Option(128, "--response-tokens", min=1, help="Words per completion"),
+    error_rate: float = typer.Option(0.0, "--error-rate", min=0.0, max=1.0, help="Fraction of 429/5xx responses (split evenly)"),
+    runs: int = typer.Option(5, "--runs", min=1, help="Engine runs per critic/debate scenario"),
+    iterations: int = typer.Option(3, "--iterations", min=1, help="Iterations per engine run"),
+    goals: int = typer.Option(32, "--goals", min=1, help="Goals per batch scenario"),
+    concurrency: List[int] = typer.Option([1, 8, 32], "--concurrency", help="Concurrency levels for client/batch scenarios"),
+    stream: bool = typer.Option(False, "--stream", help="Use SSE streaming for engine runs"),
+    paths: List[str] = typer.Option(["validated", "fast"], "--path", help="Client paths to compare: validated and/or fast"),
+    memory: bool = typer.Option(False, "--memory", help="Also measure peak traced memory (extra pass per scenario)"),
+    only: Optional[str] = typer.Option(None, "--only", help="Run scenarios whose name contains this text"),
+    json_out: Optional[Path] = typer.Option(None, "--json", help="Write results as JSON (usable as --baseline)"),
+    baseline: Optional[Path] = typer.Option(None, "--baseline", help="Compare against earlier --json results"),
+    tolerance: float = typer.Option(0.2, "--tolerance", min=0.0, help="Allowed relative regression against --baseline"),
+):
+    server_cfg = FakeServerConfig(
+        latency_s=latency_ms / 1000,
+        latency_dist=latency_dist,
+        response_tokens=response_tokens,
+        rate_limit_rate=error_rate / 2,
+        server_error_rate=error_rate / 2,
+        seed=0,
+    )
+    unknown = set(paths) - {"validated", "fast"}
+    if unknown:
+        raise typer.BadParameter(f"unknown --path: {', '.join(sorted(unknown))}")
+    variants = [path == "fast" for path in paths]
+    with FakeMistralServer(server_cfg) as server:
+        scenarios = [bench_codec(fast, response_tokens, calls=2000) for fast in variants]
+        for c in concurrency:
+            for fast in variants:
+                scenarios.append(bench_client(server, calls=max(50, 4 * c), concurrency=c, stream=False, fast=fast))
+                scenarios.append(bench_client(server, calls=max(50, 4 * c), concurrency=c, stream=True, fast=fast))
+        for fast in variants:
+            scenarios.append(bench_engine(server, "critic", runs, iterations, stream, fast))
+            scenarios.append(bench_engine(server, "debate", runs, iterations, stream, fast))
+        for c in concurrency:
+            for fast in variants:
+                scenarios.append(bench_batch(server, goals, c, iterations, fast))
+
+        results: Dict[str, Dict[str, float]] = {}
+        table = Table(title=f"selftalk benchmarks (server {latency_ms:g}ms {latency_dist})", show_edge=False)
+        for column in ("scenario", "calls", "calls/s", "p50 ms", "p95 ms", "p99 ms", "overhead ms", "conns", "peak KiB"):
+            table.add_column(column, justify="left" if column == "scenario" else "right", no_wrap=column == "scenario")
+        for name, scenario in scenarios:
+            if only and only not in name:
+                continue
+            result = _measure(server, scenario, memory)
+            data = results[result.name] = result.summary()
+            table.add_row(
+                result.name,
+                str(data["calls"]),
+                f"{data['calls_per_sec']:.1f}",
+                f"{data['p50_ms']:.1f}",
+                f"{data['p95_ms']:.1f}",
+                f"{data['p99_ms']:.1f}",
+                f"{data['overhead_ms']:.2f}",
+                str(data["connections"]),
+                f"{data['peak_mem_kib']:.0f}" if "peak_mem_kib" in data else "-",
+            )
+        console.print(table)
+
+    if json_out is not None:
+        json_out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if baseline is not None:
+        problems = _regressions(results, json.loads(baseline.read_text(encoding="utf-8")), tolerance)
+        for problem in problems:
+            console.print(f"[red]Regression:[/red] {problem}")
+        if problems:
+            raise typer.Exit(code=1)
+        console.print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    sys.exit(typer.run(main))
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+from .context import CONTEXT_STRATEGIES
+from .engine import MODES, AsyncSelfTalkEngine, EngineConfig
+from .metrics import summarize_transcript
+from .stages import StageConfigError, merge_stage_settings, parse_stage_settings
+from .transcript import TranscriptEntry, write_transcript_jsonl
+
+# Per-goal overrides may set any EngineConfig field; "goal" is accepted as a
+# shorthand for user_goal.
+CONFIG_FIELDS = {f.name for f in fields(EngineConfig)}
+
+
+class BatchInputError(ValueError):
+    pass
+
+
+@dataclass
+class BatchItem:
+    id: str
+    cfg: EngineConfig
+
+
+@dataclass
+class BatchStats:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+
+
+def parse_batch_items(lines: Iterable[str], defaults: EngineConfig) -> List[BatchItem]:
+    items: List[BatchItem] = []
+    seen: Set[str] = set()
+    for lineno, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise BatchInputError(f"line {lineno}: invalid JSON: {e}")
+        if isinstance(raw, str):
+            raw = {"goal": raw}
+        if not isinstance(raw, dict):
+            raise BatchInputError(f"line {lineno}: expected an object or a string")
+
+        raw = dict(raw)
+        item_id = str(raw.pop("id", lineno))
+        if not item_id or "/" in item_id or "\\" in item_id or item_id.startswith("."):
+            raise BatchInputError(f"line {lineno}: id {item_id!r} is not usable as a file name")
+        if item_id in seen:
+            raise BatchInputError(f"line {lineno}: duplicate id {item_id!r}")
+        seen.add(item_id)
+        if "goal" in raw:
+            raw["user_goal"] = raw.pop("goal")
+        unknown = set(raw) - CONFIG_FIELDS
+        if unknown:
+            raise BatchInputError(f"line {lineno}: unknown fields: {', '.join(sorted(unknown))}")
+        if "stages" in raw:
+            # Merged role by role over the default stage overrides
+            if not isinstance(raw["stages"], dict):
+                raise BatchInputError(f"line {lineno}: stages must be an object of role -> settings")
+            try:
+                raw["stages"] = merge_stage_settings(defaults.stages, parse_stage_settings(raw["stages"]))
+            except StageConfigError as e:
+                raise BatchInputError(f"line {lineno}: {e}")
+
+        cfg = replace(defaults, **raw)
+        if not cfg.system_prompt:
+            raise BatchInputError(f"line {lineno}: no system_prompt given and no default set")
+        if cfg.mode.lower() not in MODES:
+            raise BatchInputError(f"line {lineno}: mode must be one of: {', '.join(MODES)}")
+        if cfg.context not in CONTEXT_STRATEGIES:
+            raise BatchInputError(f"line {lineno}: context must be one of: {', '.join(CONTEXT_STRATEGIES)}")
+        items.append(BatchItem(id=item_id, cfg=cfg))
+    return items
+
+
+# All results in one JSONL file, one object per goal.
+class JsonlBatchOutput:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def completed_ids(self) -> Set[str]:
+        done: Set[str] = set()
+        if not self.path.exists():
+            return done
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash; the goal simply reruns
+                    continue
+                if record.get("status") == "ok":
+                    done.add(str(record["id"]))
+        return done
+
+    def open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self._cut_torn_line()
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _cut_torn_line(self, chunk_size: int = 1 << 16) -> None:
+        # A crash can leave a partial last line. Appending onto it would tear
+        # the next record too, so cut it off (its goal reruns anyway).
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            keep = pos = end
+            while pos > 0:
+                start = max(0, pos - chunk_size)
+                f.seek(start)
+                newline = f.read(pos - start).rfind(b"\n")
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                pos = keep = start
+            if keep < end:
+                f.truncate(keep)
+
+    def close(self) -> None:
+        self._fh.close()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def write_result(self, item: BatchItem, final: str, transcript: List[TranscriptEntry]) -> None:
+        self._write(
+            {
+                "id": item.id,
+                "status": "ok",
+                "goal": item.cfg.user_goal,
+                "final": final,
+                "summary": summarize_transcript(transcript),
+                "transcript": list(transcript),
+            }
+        )
+
+    def write_error(self, item: BatchItem, error: BaseException) -> None:
+        self._write({"id": item.id, "status": "error", "goal": item.cfg.user_goal, "error": str(error)})
+
+
+# Per-goal files: <id>.transcript.jsonl, <id>.summary.json and <id>.result.txt
+# (written last, it is the completion marker).
+class DirBatchOutput:
+    def __init__(self, path: Path):
+        self.path = path
+
+    def completed_ids(self) -> Set[str]:
+        if not self.path.is_dir():
+            return set()
+        return {p.name[: -len(".result.txt")] for p in self.path.glob("*.result.txt")}
+
+    def open(self) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def close(self) -> None:
+        pass
+
+    def write_result(self, item: BatchItem, final: str, transcript: List[TranscriptEntry]) -> None:
+        write_transcript_jsonl(transcript, str(self.path / f"{item.id}.transcript.jsonl"))
+        with open(self.path / f"{item.id}.summary.json", "w", encoding="utf-8") as f:
+            json.dump(summarize_transcript(transcript), f, indent=2)
+        # Rename last so a crash never leaves a partial result that counts as done
+        result = self.path / f"{item.id}.result.txt"
+        tmp = result.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(final)
+        os.replace(tmp, result)
+        error = self.path / f"{item.id}.error.txt"
+        if error.exists():
+            error.unlink()
+
+    def write_error(self, item: BatchItem, error: BaseException) -> None:
+        with open(self.path / f"{item.id}.error.txt", "w", encoding="utf-8") as f:
+            f.write(str(error))
+
+
+async def run_batch(
+    engine: AsyncSelfTalkEngine,
+    items: List[BatchItem],
+    output,
+    *,
+    concurrency: int = 8,
+    resume: bool = True,
+    store=None,
+    monitor=None,
+) -> BatchStats:
+    # monitor (e.g. a dashboard.RunDashboard) is told when goals start and finish
+    stats = BatchStats(total=len(items))
+    done = output.completed_ids() if resume else set()
+    pending = [item for item in items if item.id not in done]
+    stats.skipped = len(items) - len(pending)
+    if monitor is not None:
+        monitor.runs_planned(stats.total, stats.skipped)
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for item in pending:
+        queue.put_nowait(item)
+
+    async def worker() -> None:
+        while True:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if monitor is not None:
+                monitor.run_started()
+            try:
+                final, transcript = await engine.run(item.cfg)
+            except Exception as e:  # noqa: BLE001
+                output.write_error(item, e)
+                stats.failed += 1
+                if monitor is not None:
+                    monitor.run_finished(ok=False)
+            else:
+                output.write_result(item, final, transcript)
+                if store is not None:
+                    # Goal ids double as run ids, so rerunning a goal replaces it
+                    store.add_run(item.id, item.cfg.mode, transcript)
+                stats.succeeded += 1
+                if monitor is not None:
+                    monitor.run_finished(ok=True)
+
+    output.open()
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(pending))))))
+    finally:
+        output.close()
+    return stats
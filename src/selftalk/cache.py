@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    # Canonical JSON (sorted keys, no whitespace) so logically equal payloads
+    # hash the same regardless of dict insertion order.
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    # Persistent chat response cache in a single SQLite file, keyed by
+    # payload_hash. Eviction is LRU by last access once max_entries or
+    # max_bytes is exceeded; entries older than max_age_s are never served.
+    # read_only serves hits without writing anything (CI replay).
+    #
+    # Hits do not write: their access times are kept in memory and written
+    # in one transaction every touch_batch hits, before eviction and on close.
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age_s: Optional[float] = None,
+        read_only: bool = False,
+        touch_batch: int = 256,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.read_only = read_only
+        self.touch_batch = max(1, touch_batch)
+        self._touched: Dict[str, float] = {}  # key -> last access not yet written
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if read_only:
+            self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, body TEXT NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self._db.commit()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self.read_only:
+                self._write_touched()
+                self._db.commit()
+            self._db.close()
+
+    def _write_touched(self) -> None:
+        if self._touched:
+            self._db.executemany("UPDATE responses SET accessed = ? WHERE key = ?", [(t, k) for k, t in self._touched.items()])
+            self._touched.clear()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT body, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.max_age_s is not None and now - row[1] > self.max_age_s):
+                self.misses += 1
+                return None
+            if not self.read_only:
+                self._touched[key] = now
+                if len(self._touched) >= self.touch_batch:
+                    self._write_touched()
+                    self._db.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        if self.read_only:
+            return
+        body = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now, now),
+            )
+            self.writes += 1
+            self._evict(now)
+            self._db.commit()
+
+    def evict(self) -> None:
+        if self.read_only:
+            return
+        with self._lock:
+            self._evict(time.time())
+            self._db.commit()
+
+    def _evict(self, now: float) -> None:
+        self._write_touched()  # LRU order needs the latest access times
+        if self.max_age_s is not None:
+            cur = self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.max_age_s,))
+            self.evictions += cur.rowcount
+        if self.max_entries is not None:
+            cur = self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self.evictions += cur.rowcount
+        if self.max_bytes is not None:
+            total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+                    self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
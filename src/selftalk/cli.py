@@ -1,16 +1,24 @@
 from __future__ import annotations
 
+import os
 import sys
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
 import typer
 from rich.console import Console
-from dotenv import load_dotenv
 
-from .client import MissingAPIKeyError
-from .engine import SelfTalkEngine, EngineConfig, write_transcript_jsonl, write_transcript_split_json
-from .prompts import resolve_prompt_input
+from .errors import API_KEY_ENV, MissingAPIKeyError
+from .stages import MAX_TEMPERATURE
+
+if TYPE_CHECKING:
+    from .cache import ResponseCache
+    from .store import TranscriptStore
+
+# Commands import what they need when they run: httpx, pydantic, asyncio and
+# the engine add hundreds of milliseconds, which --help, argument errors and
+# a missing key should not pay for. tests/test_import_time.py keeps it so.
 
 app = typer.Typer(add_completion=False, help="Self-dialogue generator using Mistral API")
 console = Console()
@@ -18,29 +26,104 @@ console = Console()
 
 @app.command()
 def run(
-    system_prompt: str = typer.Option(..., "--system-prompt", help="System prompt text or a file path"),
+    system_prompt: Optional[str] = typer.Option(None, "--system-prompt", help="System prompt text or a file path (required unless --resume)"),
     goal: Optional[str] = typer.Option(None, "--goal", help="Optional user goal or input"),
-    iterations: int = typer.Option(3, "--iterations", min=1, help="Number of self-dialogue iterations"),
-    mode: str = typer.Option("critic", "--mode", help="Mode: critic or debate", case_sensitive=False),
+    iterations: Optional[int] = typer.Option(None, "--iterations", min=1, help="Number of self-dialogue iterations [default: 3]"),
+    mode: str = typer.Option("critic", "--mode", help="Mode: critic, debate or tournament", case_sensitive=False),
     model: str = typer.Option("mistral-large-latest", "--model", help="Mistral model name"),
-    temperature: float = typer.Option(0.3, "--temperature", min=0.0, max=2.0, help="Sampling temperature"),
+    temperature: float = typer.Option(0.3, "--temperature", min=0.0, max=MAX_TEMPERATURE, help="Sampling temperature"),
     max_tokens: int = typer.Option(1024, "--max-tokens", help="Max tokens for the response"),
     top_p: Optional[float] = typer.Option(None, "--top-p", help="Nucleus sampling top_p"),
     seed: Optional[int] = typer.Option(None, "--seed", help="Optional random seed for deterministic responses"),
-    out: Path = typer.Option(Path("transcript.jsonl"), "--out", help="Path to save transcript (JSONL or .json for split view)"),
+    stage: Optional[List[str]] = typer.Option(None, "--stage", help="Per-stage override ROLE.SETTING=VALUE (roles: draft, critic, revise, pro, con, judge; settings: model, temperature, max_tokens, top_p), repeatable"),
+    stage_config: Optional[Path] = typer.Option(None, "--stage-config", help="JSON or TOML file of per-stage overrides: {role: {setting: value}}; --stage wins"),
+    candidates: int = typer.Option(4, "--candidates", min=1, help="Tournament: answers drafted in parallel"),
+    bracket_size: Optional[int] = typer.Option(None, "--bracket-size", min=2, help="Tournament: candidates per judge call (default: all at once)"),
+    stream: bool = typer.Option(False, "--stream", help="Stream tokens live and record time-to-first-token"),
+    context: str = typer.Option("full", "--context", help="History sent per call: full, window or latest", case_sensitive=False),
+    context_window: int = typer.Option(6, "--context-window", min=1, help="Messages kept by --context window"),
+    context_budget: Optional[int] = typer.Option(None, "--context-budget", min=1, help="Approximate prompt token budget per call"),
+    stop_similarity: Optional[float] = typer.Option(None, "--stop-similarity", min=0.0, max=1.0, help="Stop once successive answers are at least this similar"),
+    stop_on_no_issues: bool = typer.Option(False, "--stop-on-no-issues", help="Stop when the critic (or Con) reports no issues"),
+    max_total_tokens: Optional[int] = typer.Option(None, "--max-total-tokens", min=1, help="Stop starting new rounds past this many tokens"),
+    max_seconds: Optional[float] = typer.Option(None, "--max-seconds", min=0.0, help="Stop starting new rounds past this wall time"),
+    deadline: Optional[float] = typer.Option(None, "--deadline", min=0.0, help="Hard limit in seconds on a run's wall time, retries included; the best answer so far is kept"),
+    call_deadline: Optional[float] = typer.Option(None, "--call-deadline", min=0.0, help="Hard limit in seconds per call, retries and backoff included"),
+    hedge: Optional[float] = typer.Option(None, "--hedge", min=1.0, max=99.9, help="Send a duplicate of any non-streamed call slower than this percentile of recent latency, e.g. 95"),
+    cache: Optional[Path] = typer.Option(None, "--cache", help="SQLite response cache file; identical requests are served from it"),
+    cache_readonly: bool = typer.Option(False, "--cache-readonly", help="Only read from --cache, never write (replay)"),
+    cache_max_entries: Optional[int] = typer.Option(None, "--cache-max-entries", min=1, help="Keep at most this many --cache entries, least recently used evicted first"),
+    cache_max_bytes: Optional[int] = typer.Option(None, "--cache-max-bytes", min=1, help="Keep --cache response bodies under this many bytes, least recently used evicted first"),
+    cache_max_age: Optional[float] = typer.Option(None, "--cache-max-age", min=0.0, help="Seconds a --cache entry is served; older ones are dropped"),
+    metrics: Optional[Path] = typer.Option(None, "--metrics", help="Append per-call metrics: .prom for Prometheus text format, else JSON lines"),
+    store: Optional[Path] = typer.Option(None, "--store", help="Also record the transcript in this SQLite transcript store"),
+    run_id: Optional[str] = typer.Option(None, "--run-id", help="Run id in --store (default: generated; an existing id is replaced)"),
+    profile: bool = typer.Option(False, "--profile", help="Time each phase of the run (network, retries, parsing, console, transcript I/O, ...) and print a breakdown"),
+    profile_pstats: Optional[Path] = typer.Option(None, "--profile-pstats", help="With --profile: also run cProfile and save pstats output to this file"),
+    base_url: Optional[str] = typer.Option(None, "--base-url", help="API root, e.g. a local proxy or stand-in (default: MISTRAL_BASE_URL or Mistral)"),
+    endpoints: Optional[Path] = typer.Option(None, "--endpoints", help="JSON or TOML endpoint pool (URLs, keys, weights) to spread calls over; replaces --base-url"),
+    balance: Optional[str] = typer.Option(None, "--balance", help="With --endpoints: weighted or least-loaded (default: the file's strategy, else weighted)"),
+    max_connections: int = typer.Option(100, "--max-connections", min=1, help="HTTP connection pool size"),
+    keepalive_expiry: float = typer.Option(30.0, "--keepalive-expiry", min=0.0, help="Seconds an idle pooled connection is kept open"),
+    http2: bool = typer.Option(False, "--http2", help="Use HTTP/2 (needs the h2 package)"),
+    fast_path: bool = typer.Option(False, "--fast-path", help="Skip full pydantic validation of API payloads and use orjson if installed"),
+    connect_timeout: Optional[float] = typer.Option(None, "--connect-timeout", min=0.0, help="Connect timeout in seconds (default 30)"),
+    read_timeout: Optional[float] = typer.Option(None, "--read-timeout", min=0.0, help="Read timeout in seconds (default 30)"),
+    write_timeout: Optional[float] = typer.Option(None, "--write-timeout", min=0.0, help="Write timeout in seconds (default 30)"),
+    pool_timeout: Optional[float] = typer.Option(None, "--pool-timeout", min=0.0, help="Seconds to wait for a free pooled connection (default 30)"),
+    resume: Optional[Path] = typer.Option(None, "--resume", help="Continue an interrupted or finished run from its transcript JSONL"),
+    extend: Optional[int] = typer.Option(None, "--extend", min=1, help="With --resume: add this many iterations to the recorded run"),
+    out: Optional[Path] = typer.Option(None, "--out", help="Path to save transcript (JSONL or .json for split view) [default: transcript.jsonl, or the --resume file]"),
     result: Path = typer.Option(Path("result.txt"), "--result", help="Path to save final result"),
 ):
     """Run the self-dialogue engine and save transcript/result."""
+    from dotenv import load_dotenv
+
     load_dotenv()
+    endpoint_pool = _open_pool(endpoints, balance)
+    # A read-only cache can replay without a key
+    if not (cache is not None and cache_readonly):
+        _require_api_key(endpoint_pool)
+
+    from .context import CONTEXT_STRATEGIES
+    from .engine import MODES, EngineConfig, SelfTalkEngine
+    from .prompts import resolve_prompt_input
+    from .resume import ResumeError, load_resume_info
+
+    resume_info = None
+    if resume is not None:
+        # System prompt, goal, mode and model come from the recorded run
+        try:
+            resume_info = load_resume_info(resume)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Error:[/red] cannot resume from {resume}: {e}")
+            raise typer.Exit(code=1)
+        system_prompt, goal = resume_info.system_prompt, resume_info.user_goal
+        mode, model = resume_info.mode, resume_info.model or model
+        if extend is not None:
+            iterations = resume_info.iterations_done + extend
+        else:
+            iterations = max(iterations or 0, resume_info.iterations_done, 1)
+    elif extend is not None:
+        raise typer.BadParameter("--extend requires --resume")
+    elif system_prompt is None:
+        raise typer.BadParameter("--system-prompt is required")
+    if iterations is None:
+        iterations = 3
+    if out is None:
+        out = resume if resume is not None else Path("transcript.jsonl")
 
     if iterations < 1:
         raise typer.BadParameter("iterations must be >= 1")
 
     mode = mode.lower()
-    if mode not in {"critic", "debate"}:
-        raise typer.BadParameter("mode must be 'critic' or 'debate'")
+    if mode not in MODES:
+        raise typer.BadParameter(f"mode must be one of: {', '.join(MODES)}")
+    context = context.lower()
+    if context not in CONTEXT_STRATEGIES:
+        raise typer.BadParameter(f"context must be one of: {', '.join(CONTEXT_STRATEGIES)}")
 
-    system_prompt_text = resolve_prompt_input(system_prompt)
+    system_prompt_text = system_prompt if resume_info is not None else resolve_prompt_input(system_prompt)
 
     cfg = EngineConfig(
         system_prompt=system_prompt_text,
@@ -52,32 +135,743 @@ def run(
         random_seed=seed,
         iterations=iterations,
         mode=mode,
+        stream=stream,
+        context=context,
+        context_window=context_window,
+        context_budget_tokens=context_budget,
+        stop_similarity=stop_similarity,
+        stop_on_no_issues=stop_on_no_issues,
+        max_total_tokens=max_total_tokens,
+        max_seconds=max_seconds,
+        deadline_s=deadline,
+        call_deadline_s=call_deadline,
+        candidates=candidates,
+        bracket_size=bracket_size,
+        stages=_stage_settings(stage_config, stage),
     )
 
-    engine = SelfTalkEngine()
+    from .client import MistralClient
+    from .metrics import open_metrics_sink, summarize_transcript
+    from .transcript import JsonlTranscriptSink, TeeTranscriptSink, split_jsonl_to_json
+
+    if run_id is not None and store is None:
+        raise typer.BadParameter("--run-id requires --store")
+    profiler = None
+    if profile or profile_pstats is not None:
+        from .profiling import Profiler
+
+        profiler = Profiler(cprofile=profile_pstats is not None)
+    http = _http_settings(max_connections, keepalive_expiry, http2, connect_timeout, read_timeout, write_timeout, pool_timeout)
+    transcript_store = _open_store(store)
+    response_cache = _open_cache(cache, cache_readonly, _cache_limits(cache_max_entries, cache_max_bytes, cache_max_age))
+    metrics_sink = open_metrics_sink(metrics) if metrics else None
+    hedger = _hedger(hedge)
+    client = MistralClient(
+        cache=response_cache,
+        base_url=base_url,
+        http=http,
+        fast=fast_path,
+        profiler=profiler,
+        pool=endpoint_pool,
+        hedger=hedger,
+    )
+    engine = SelfTalkEngine(client=client, metrics_sink=metrics_sink, profiler=profiler)
+
+    # Ensure parent directories exist
+    out.parent.mkdir(parents=True, exist_ok=True)
+    result.parent.mkdir(parents=True, exist_ok=True)
+
+    # Turns are streamed to disk as they happen; the split .json view is built
+    # from the streamed JSONL once the run finishes.
+    split = out.suffix.lower() == ".json"
+    stream_path = out.with_name(out.name + ".partial.jsonl") if split else out
+    # Never truncate the transcript being resumed until the new one is complete
+    in_place = resume is not None and stream_path.resolve() == resume.resolve()
+    if in_place:
+        stream_path = out.with_name(out.name + ".resume.jsonl")
+    sink = None
 
     try:
-        final, transcript = engine.run(cfg)
-    except MissingAPIKeyError as e:
+        if profiler is not None:
+            profiler.start()
+        sink = JsonlTranscriptSink(stream_path)
+        if transcript_store is not None:
+            sink = TeeTranscriptSink(sink, transcript_store.sink(run_id, mode=mode))
+        if resume_info is not None:
+            final, transcript = engine.resume(cfg, resume_info.entries, sink=sink)
+        else:
+            final, transcript = engine.run(cfg, sink=sink)
+    except (MissingAPIKeyError, ResumeError) as e:
         console.print(f"[red]Error:[/red] {e}")
         raise typer.Exit(code=1)
     except Exception as e:  # noqa: BLE001
         console.print(f"[red]Unexpected error:[/red] {e}")
+        if sink is not None:
+            console.print(f"Partial transcript kept at [bold]{stream_path}[/bold]")
         raise typer.Exit(code=1)
+    finally:
+        if sink is not None:
+            sink.close()
+        if profiler is not None:
+            profiler.stop()
+        client.close()
+        if hedger is not None:
+            hedger.close()
+        _close_cache(response_cache)
+        if transcript_store is not None:
+            transcript_store.close()
+        if metrics_sink is not None:
+            metrics_sink.close()
 
-    # Ensure parent directories exist
-    out.parent.mkdir(parents=True, exist_ok=True)
-    result.parent.mkdir(parents=True, exist_ok=True)
-
-    if out.suffix.lower() == ".json":
-        write_transcript_split_json(transcript, str(out))
-    else:
-        write_transcript_jsonl(transcript, str(out))
+    summary = summarize_transcript(transcript)
+    if stream:
+        _print_stream_latency(transcript)
+    if in_place:
+        os.replace(stream_path, out)
+    if split:
+        split_jsonl_to_json(stream_path, out)
+        stream_path.unlink()
 
     with open(result, "w", encoding="utf-8") as f:
         f.write(final)
 
     console.print(f"Saved transcript to [bold]{out}[/bold] and result to [bold]{result}[/bold]")
+    _print_summary(summary)
+    if endpoint_pool is not None:
+        _print_pool(endpoint_pool)
+    if hedger is not None:
+        _print_hedging(hedger)
+    if profiler is not None:
+        _print_profile(profiler, profile_pstats)
+
+
+def _http_settings(max_connections, keepalive_expiry, http2, connect_timeout, read_timeout, write_timeout, pool_timeout):
+    from .client import HTTPSettings
+
+    settings = HTTPSettings(
+        max_connections=max_connections,
+        # Keep every pooled connection warm; with concurrent batch workers a
+        # smaller keep-alive pool would keep closing and reopening TLS sessions
+        max_keepalive_connections=max_connections,
+        keepalive_expiry_s=keepalive_expiry,
+        http2=http2,
+        connect_timeout_s=connect_timeout,
+        read_timeout_s=read_timeout,
+        write_timeout_s=write_timeout,
+        pool_timeout_s=pool_timeout,
+    )
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            raise typer.BadParameter("--http2 needs the h2 package: pip install 'selftalk[http2]'")
+    return settings
+
+
+def _stage_settings(path: Optional[Path], options: Optional[List[str]]):
+    from .stages import StageConfigError, load_stage_config, merge_stage_settings, parse_stage_options
+
+    try:
+        stages = load_stage_config(path) if path is not None else {}
+        return merge_stage_settings(stages, parse_stage_options(options or []))
+    except StageConfigError as e:
+        raise typer.BadParameter(str(e))
+
+
+def _open_pool(path: Optional[Path], balance: Optional[str]):
+    if path is None:
+        if balance is not None:
+            raise typer.BadParameter("--balance requires --endpoints")
+        return None
+    from .pool import PoolConfigError, load_endpoint_pool
+
+    try:
+        return load_endpoint_pool(path, strategy=balance.lower() if balance else None)
+    except PoolConfigError as e:
+        raise typer.BadParameter(str(e))
+
+
+def _require_api_key(endpoint_pool=None) -> None:
+    # Same check as MistralClient.ensure_api_key, without importing the client
+    if endpoint_pool is not None and all(e.api_key for e in endpoint_pool.endpoints):
+        return
+    if not os.getenv(API_KEY_ENV):
+        console.print(f"[red]Error:[/red] {MissingAPIKeyError()}")
+        raise typer.Exit(code=1)
+
+
+def _print_summary(summary) -> None:
+    from rich.table import Table
+
+    table = Table(title="Calls by stage", show_edge=False)
+    for column in ("stage", "model", "calls", "prompt tok", "completion tok", "latency s", "retries", "backoff s"):
+        table.add_column(column, justify="left" if column in ("stage", "model") else "right")
+    rows = list(summary["stages"].items()) + [("total", summary["total"])]
+    for stage, t in rows:
+        table.add_row(
+            stage,
+            t.get("model", ""),
+            str(t["calls"]),
+            str(t["prompt_tokens"]),
+            str(t["completion_tokens"]),
+            f"{t['latency_s']:.2f}",
+            str(t["retries"]),
+            f"{t['backoff_s']:.2f}",
+        )
+    console.print(table)
+
+
+def _print_profile(profiler, pstats_path: Optional[Path]) -> None:
+    from rich.table import Table
+
+    phases = profiler.summary()
+    measured = sum(p["total_s"] for p in phases.values())
+    # Phase names are described in profiling.PHASES
+    table = Table(title=f"Profile: {profiler.elapsed_s:.2f}s elapsed", show_edge=False)
+    for column in ("phase", "count", "total s", "mean ms", "share"):
+        table.add_column(column, justify="left" if column == "phase" else "right")
+    for name, p in phases.items():
+        share = p["total_s"] / measured if measured else 0.0
+        table.add_row(name, str(p["count"]), f"{p['total_s']:.3f}", f"{p['mean_s'] * 1000:.2f}", f"{share:.0%}")
+    console.print(table)
+    if pstats_path is not None:
+        pstats_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(pstats_path)
+        console.print(profiler.top_functions(15), markup=False, highlight=False)
+        console.print(f"cProfile stats saved to [bold]{pstats_path}[/bold] (python -m pstats {pstats_path})")
+
+
+def _cache_limits(max_entries: Optional[int], max_bytes: Optional[int], max_age: Optional[float]) -> dict:
+    return {"max_entries": max_entries, "max_bytes": max_bytes, "max_age_s": max_age}
+
+
+def _open_cache(path: Optional[Path], read_only: bool, limits: Optional[dict] = None) -> Optional["ResponseCache"]:
+    if path is None:
+        return None
+    from .cache import ResponseCache
+
+    try:
+        return ResponseCache(path, read_only=read_only, **(limits or {}))
+    except Exception as e:  # noqa: BLE001
+        console.print(f"[red]Error:[/red] cannot open cache {path}: {e}")
+        raise typer.Exit(code=1)
+
+
+def _open_store(path: Optional[Path], read_only: bool = False) -> Optional["TranscriptStore"]:
+    if path is None:
+        return None
+    from .store import TranscriptStore
+
+    try:
+        return TranscriptStore(path, read_only=read_only)
+    except Exception as e:  # noqa: BLE001
+        console.print(f"[red]Error:[/red] cannot open transcript store {path}: {e}")
+        raise typer.Exit(code=1)
+
+
+def _close_cache(cache: Optional["ResponseCache"]) -> None:
+    if cache is None:
+        return
+    stats = cache.stats()
+    cache.close()
+    console.print(f"Cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+
+
+def _hedger(percentile: Optional[float]):
+    if percentile is None:
+        return None
+    from .hedging import Hedger
+
+    return Hedger(percentile)
+
+
+def _dashboard(enabled: bool):
+    # Off where it could not redraw in place: pipes, CI logs, dumb terminals
+    if not enabled or not console.is_terminal or console.is_dumb_terminal:
+        return None
+    from .dashboard import RunDashboard
+
+    return RunDashboard()
+
+
+def _print_hedging(hedger) -> None:
+    stats = hedger.stats()
+    console.print(f"Hedging: {stats['hedged']} of {stats['calls']} calls hedged, {stats['wins']} answered first by the duplicate")
+
+
+def _print_pool(endpoint_pool) -> None:
+    from rich.table import Table
+
+    table = Table(title="Endpoints", show_edge=False)
+    for column in ("endpoint", "state", "requests", "ok", "failed", "429", "trips", "latency s", "tokens/s"):
+        table.add_column(column, justify="left" if column in ("endpoint", "state") else "right")
+    for e in endpoint_pool.stats():
+        latency = f"{e['mean_latency_s']:.2f}" if e["mean_latency_s"] is not None else "-"
+        table.add_row(
+            e["name"], e["state"], str(e["requests"]), str(e["successes"]), str(e["failures"]),
+            str(e["rate_limited"]), str(e["trips"]), latency, f"{e['tokens_per_s']:.1f}",
+        )
+    console.print(table)
+
+
+def _print_stream_latency(transcript) -> None:
+    calls = [e["call"] for e in transcript if "ttft_s" in e.get("call", {})]
+    if not calls:
+        return
+    ttft = sum(c["ttft_s"] for c in calls) / len(calls)
+    rates = [c["tokens_per_sec"] for c in calls if c.get("tokens_per_sec")]
+    rate = f", {sum(rates) / len(rates):.1f} tokens/s" if rates else ""
+    console.print(f"Streamed {len(calls)} calls: mean time-to-first-token {ttft:.2f}s{rate}")
+
+
+@app.command()
+def batch(
+    input_path: str = typer.Option(..., "--input", help="JSONL file of goals, or '-' for stdin"),
+    system_prompt: Optional[str] = typer.Option(None, "--system-prompt", help="Default system prompt text or a file path"),
+    iterations: int = typer.Option(3, "--iterations", min=1, help="Default number of self-dialogue iterations"),
+    mode: str = typer.Option("critic", "--mode", help="Default mode: critic, debate or tournament", case_sensitive=False),
+    model: str = typer.Option("mistral-large-latest", "--model", help="Default Mistral model name"),
+    temperature: float = typer.Option(0.3, "--temperature", min=0.0, max=MAX_TEMPERATURE, help="Default sampling temperature"),
+    max_tokens: int = typer.Option(1024, "--max-tokens", help="Default max tokens for the response"),
+    top_p: Optional[float] = typer.Option(None, "--top-p", help="Default nucleus sampling top_p"),
+    seed: Optional[int] = typer.Option(None, "--seed", help="Default random seed"),
+    stage: Optional[List[str]] = typer.Option(None, "--stage", help="Default per-stage override ROLE.SETTING=VALUE, repeatable (see run --help)"),
+    stage_config: Optional[Path] = typer.Option(None, "--stage-config", help="JSON or TOML file of default per-stage overrides; --stage wins"),
+    context: str = typer.Option("full", "--context", help="History sent per call: full, window or latest", case_sensitive=False),
+    context_window: int = typer.Option(6, "--context-window", min=1, help="Messages kept by --context window"),
+    context_budget: Optional[int] = typer.Option(None, "--context-budget", min=1, help="Approximate prompt token budget per call"),
+    stop_similarity: Optional[float] = typer.Option(None, "--stop-similarity", min=0.0, max=1.0, help="Stop once successive answers are at least this similar"),
+    stop_on_no_issues: bool = typer.Option(False, "--stop-on-no-issues", help="Stop when the critic (or Con) reports no issues"),
+    max_total_tokens: Optional[int] = typer.Option(None, "--max-total-tokens", min=1, help="Stop starting new rounds past this many tokens"),
+    max_seconds: Optional[float] = typer.Option(None, "--max-seconds", min=0.0, help="Stop starting new rounds past this wall time"),
+    deadline: Optional[float] = typer.Option(None, "--deadline", min=0.0, help="Hard limit in seconds on a run's wall time, retries included; the best answer so far is kept"),
+    call_deadline: Optional[float] = typer.Option(None, "--call-deadline", min=0.0, help="Hard limit in seconds per call, retries and backoff included"),
+    hedge: Optional[float] = typer.Option(None, "--hedge", min=1.0, max=99.9, help="Send a duplicate of any non-streamed call slower than this percentile of recent latency, e.g. 95"),
+    candidates: int = typer.Option(4, "--candidates", min=1, help="Tournament: answers drafted in parallel"),
+    bracket_size: Optional[int] = typer.Option(None, "--bracket-size", min=2, help="Tournament: candidates per judge call (default: all at once)"),
+    concurrency: int = typer.Option(8, "--concurrency", min=1, help="Number of goals run at the same time"),
+    max_rps: Optional[float] = typer.Option(None, "--max-rps", min=0.01, help="Shared client-side limit on requests per second"),
+    max_tpm: Optional[float] = typer.Option(None, "--max-tpm", min=1, help="Shared client-side limit on tokens per minute"),
+    coalesce: bool = typer.Option(False, "--coalesce", help="Send identical in-flight requests once and share the response (for deterministic settings)"),
+    out_dir: Optional[Path] = typer.Option(None, "--out-dir", help="Directory for per-goal transcript/result files"),
+    out: Optional[Path] = typer.Option(None, "--out", help="Combined results JSONL (used when --out-dir is not given)"),
+    resume: bool = typer.Option(True, "--resume/--no-resume", help="Skip goals that already completed in the output"),
+    cache: Optional[Path] = typer.Option(None, "--cache", help="SQLite response cache file; identical requests are served from it"),
+    cache_readonly: bool = typer.Option(False, "--cache-readonly", help="Only read from --cache, never write (replay)"),
+    cache_max_entries: Optional[int] = typer.Option(None, "--cache-max-entries", min=1, help="Keep at most this many --cache entries, least recently used evicted first"),
+    cache_max_bytes: Optional[int] = typer.Option(None, "--cache-max-bytes", min=1, help="Keep --cache response bodies under this many bytes, least recently used evicted first"),
+    cache_max_age: Optional[float] = typer.Option(None, "--cache-max-age", min=0.0, help="Seconds a --cache entry is served; older ones are dropped"),
+    metrics: Optional[Path] = typer.Option(None, "--metrics", help="Append per-call metrics: .prom for Prometheus text format, else JSON lines"),
+    store: Optional[Path] = typer.Option(None, "--store", help="Also record each goal's transcript in this SQLite transcript store, under its id"),
+    base_url: Optional[str] = typer.Option(None, "--base-url", help="API root, e.g. a local proxy or stand-in (default: MISTRAL_BASE_URL or Mistral)"),
+    endpoints: Optional[Path] = typer.Option(None, "--endpoints", help="JSON or TOML endpoint pool (URLs, keys, weights) to spread calls over; replaces --base-url"),
+    balance: Optional[str] = typer.Option(None, "--balance", help="With --endpoints: weighted or least-loaded (default: the file's strategy, else weighted)"),
+    max_connections: int = typer.Option(100, "--max-connections", min=1, help="HTTP connection pool size"),
+    keepalive_expiry: float = typer.Option(30.0, "--keepalive-expiry", min=0.0, help="Seconds an idle pooled connection is kept open"),
+    http2: bool = typer.Option(False, "--http2", help="Use HTTP/2 (needs the h2 package)"),
+    fast_path: bool = typer.Option(False, "--fast-path", help="Skip full pydantic validation of API payloads and use orjson if installed"),
+    connect_timeout: Optional[float] = typer.Option(None, "--connect-timeout", min=0.0, help="Connect timeout in seconds (default 30)"),
+    read_timeout: Optional[float] = typer.Option(None, "--read-timeout", min=0.0, help="Read timeout in seconds (default 30)"),
+    write_timeout: Optional[float] = typer.Option(None, "--write-timeout", min=0.0, help="Write timeout in seconds (default 30)"),
+    pool_timeout: Optional[float] = typer.Option(None, "--pool-timeout", min=0.0, help="Seconds to wait for a free pooled connection (default 30)"),
+    dashboard: bool = typer.Option(True, "--dashboard/--no-dashboard", help="Live view of runs, call rates, latency, retries and cache hits (terminals only)"),
+):
+    """Run many goals concurrently from a JSONL file, resuming past completed ones.
+
+    Each input line is a JSON object with a "goal" and optional "id" and EngineConfig
+    field overrides (model, temperature, iterations, mode, ...), or a bare JSON string goal.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    endpoint_pool = _open_pool(endpoints, balance)
+    if not (cache is not None and cache_readonly):
+        _require_api_key(endpoint_pool)
+
+    import asyncio
+
+    from .batch import BatchInputError, DirBatchOutput, JsonlBatchOutput, parse_batch_items, run_batch
+    from .client import AsyncMistralClient
+    from .coalesce import RequestCoalescer
+    from .context import CONTEXT_STRATEGIES
+    from .engine import MODES, AsyncSelfTalkEngine, EngineConfig
+    from .metrics import open_metrics_sink
+    from .prompts import resolve_prompt_input
+    from .ratelimit import RateLimiter
+
+    mode = mode.lower()
+    if mode not in MODES:
+        raise typer.BadParameter(f"mode must be one of: {', '.join(MODES)}")
+    context = context.lower()
+    if context not in CONTEXT_STRATEGIES:
+        raise typer.BadParameter(f"context must be one of: {', '.join(CONTEXT_STRATEGIES)}")
+    if out_dir is not None and out is not None:
+        raise typer.BadParameter("use either --out-dir or --out, not both")
+
+    defaults = EngineConfig(
+        system_prompt=resolve_prompt_input(system_prompt) if system_prompt else "",
+        user_goal=None,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        random_seed=seed,
+        iterations=iterations,
+        mode=mode,
+        context=context,
+        context_window=context_window,
+        context_budget_tokens=context_budget,
+        stop_similarity=stop_similarity,
+        stop_on_no_issues=stop_on_no_issues,
+        max_total_tokens=max_total_tokens,
+        max_seconds=max_seconds,
+        deadline_s=deadline,
+        call_deadline_s=call_deadline,
+        candidates=candidates,
+        bracket_size=bracket_size,
+        stages=_stage_settings(stage_config, stage),
+    )
+
+    try:
+        if input_path == "-":
+            items = parse_batch_items(sys.stdin, defaults)
+        else:
+            with open(input_path, "r", encoding="utf-8") as f:
+                items = parse_batch_items(f, defaults)
+    except (OSError, BatchInputError) as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+
+    output = DirBatchOutput(out_dir) if out_dir is not None else JsonlBatchOutput(out or Path("results.jsonl"))
+
+    http = _http_settings(max_connections, keepalive_expiry, http2, connect_timeout, read_timeout, write_timeout, pool_timeout)
+    transcript_store = _open_store(store)
+    response_cache = _open_cache(cache, cache_readonly, _cache_limits(cache_max_entries, cache_max_bytes, cache_max_age))
+    metrics_sink = open_metrics_sink(metrics) if metrics else None
+    limiter = RateLimiter(max_rps, max_tpm) if (max_rps or max_tpm) else None
+    coalescer = RequestCoalescer() if coalesce else None
+    hedger = _hedger(hedge)
+    monitor = _dashboard(dashboard)
+
+    async def _go():
+        # All workers share one pool, so warm connections are reused across goals
+        async with AsyncMistralClient(
+            cache=response_cache,
+            rate_limiter=limiter,
+            base_url=base_url,
+            http=http,
+            fast=fast_path,
+            coalescer=coalescer,
+            pool=endpoint_pool,
+            hedger=hedger,
+        ) as client:
+            engine = AsyncSelfTalkEngine(
+                client=client, concurrency=concurrency, metrics_sink=metrics_sink, hooks=[monitor] if monitor is not None else None
+            )
+            return await run_batch(
+                engine, items, output, concurrency=concurrency, resume=resume, store=transcript_store, monitor=monitor
+            )
+
+    try:
+        with monitor.live(console) if monitor is not None else nullcontext():
+            stats = asyncio.run(_go())
+    finally:
+        _close_cache(response_cache)
+        if transcript_store is not None:
+            transcript_store.close()
+        if metrics_sink is not None:
+            metrics_sink.close()
+
+    console.print(
+        f"Batch done: {stats.succeeded} succeeded, {stats.failed} failed, "
+        f"{stats.skipped} skipped of {stats.total}. Output in [bold]{out_dir or output.path}[/bold]"
+    )
+    if limiter is not None:
+        state = limiter.state()
+        console.print(f"Rate limiter: {state['rate_limited']} rate-limited responses, waited {state['waited_s']:.1f}s in total")
+    if coalescer is not None:
+        console.print(f"Coalescing: {coalescer.saved} calls saved, {coalescer.sent} sent")
+    if endpoint_pool is not None:
+        _print_pool(endpoint_pool)
+    if hedger is not None:
+        _print_hedging(hedger)
+    if stats.failed:
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def transcripts(
+    store: Path = typer.Option(..., "--store", help="SQLite transcript store written by run/batch --store"),
+    run_id: Optional[str] = typer.Option(None, "--run-id", help="Only this run"),
+    mode: Optional[str] = typer.Option(None, "--mode", help="Only runs in this mode", case_sensitive=False),
+    model: Optional[str] = typer.Option(None, "--model", help="Only entries from this model"),
+    stage: Optional[str] = typer.Option(None, "--stage", help="Only entries of this stage, e.g. draft, critic_feedback, revision, pro, con, candidate, final, stop"),
+    bucket: Optional[str] = typer.Option(None, "--bucket", help="Only entries in this bucket: improved or old"),
+    since: Optional[str] = typer.Option(None, "--since", help="Only entries at or after this ISO timestamp or date"),
+    until: Optional[str] = typer.Option(None, "--until", help="Only entries before this ISO timestamp or date"),
+    limit: Optional[int] = typer.Option(None, "--limit", min=1, help="Export at most this many entries"),
+    out: Optional[Path] = typer.Option(None, "--out", help="Export matching entries: JSONL, or .json for the split view"),
+):
+    """List runs in a transcript store, or export matching entries.
+
+    Without --out, prints one line per run that has matching entries.
+    """
+    if not store.exists():
+        console.print(f"[red]Error:[/red] no transcript store at {store}")
+        raise typer.Exit(code=1)
+    transcript_store = _open_store(store, read_only=True)
+    filters = dict(run_id=run_id, mode=mode, model=model, stage=stage, bucket=bucket, since=since, until=until)
+    try:
+        if out is None:
+            _print_runs(transcript_store.runs(**filters))
+            return
+        from .transcript import write_transcript_jsonl, write_transcript_split_json
+
+        out.parent.mkdir(parents=True, exist_ok=True)
+        entries = transcript_store.query(limit=limit, **filters)
+        if out.suffix.lower() == ".json":
+            write_transcript_split_json(entries, str(out))
+        else:
+            write_transcript_jsonl(entries, str(out))
+    finally:
+        transcript_store.close()
+    console.print(f"Exported transcripts to [bold]{out}[/bold]")
+
+
+def _print_runs(runs) -> None:
+    if not runs:
+        console.print("No matching transcripts")
+        return
+    from rich.table import Table
+
+    table = Table(title="Runs", show_edge=False)
+    for column in ("run id", "mode", "model", "started", "entries"):
+        table.add_column(column, justify="right" if column == "entries" else "left")
+    for run in runs:
+        table.add_row(run["run_id"], run["mode"], run["model"] or "", run["started"], str(run["entries"]))
+    console.print(table)
+
+
+@app.command()
+def enqueue(
+    queue: Path = typer.Option(..., "--queue", help="SQLite job queue file (created if missing; may live on a shared filesystem)"),
+    input_path: str = typer.Option(..., "--input", help="JSONL file of goals in the batch format, or '-' for stdin"),
+    system_prompt: Optional[str] = typer.Option(None, "--system-prompt", help="Default system prompt text or a file path"),
+    iterations: int = typer.Option(3, "--iterations", min=1, help="Default number of self-dialogue iterations"),
+    mode: str = typer.Option("critic", "--mode", help="Default mode: critic, debate or tournament", case_sensitive=False),
+    model: str = typer.Option("mistral-large-latest", "--model", help="Default Mistral model name"),
+    temperature: float = typer.Option(0.3, "--temperature", min=0.0, max=MAX_TEMPERATURE, help="Default sampling temperature"),
+    max_tokens: int = typer.Option(1024, "--max-tokens", help="Default max tokens for the response"),
+    top_p: Optional[float] = typer.Option(None, "--top-p", help="Default nucleus sampling top_p"),
+    seed: Optional[int] = typer.Option(None, "--seed", help="Default random seed"),
+    stage: Optional[List[str]] = typer.Option(None, "--stage", help="Default per-stage override ROLE.SETTING=VALUE, repeatable (see run --help)"),
+    stage_config: Optional[Path] = typer.Option(None, "--stage-config", help="JSON or TOML file of default per-stage overrides; --stage wins"),
+    max_attempts: int = typer.Option(3, "--max-attempts", min=1, help="Attempts per job before it is marked failed"),
+    replace: bool = typer.Option(False, "--replace", help="Requeue ids that are already in the queue instead of skipping them"),
+):
+    """Submit goals as jobs for `selftalk worker` processes.
+
+    Input lines are the same as for `selftalk batch`: {"id": ..., "goal": ..., <EngineConfig overrides>}.
+    """
+    from .batch import BatchInputError, parse_batch_items
+    from .engine import MODES, EngineConfig
+    from .jobqueue import JobQueue
+    from .prompts import resolve_prompt_input
+
+    mode = mode.lower()
+    if mode not in MODES:
+        raise typer.BadParameter(f"mode must be one of: {', '.join(MODES)}")
+    defaults = EngineConfig(
+        system_prompt=resolve_prompt_input(system_prompt) if system_prompt else "",
+        user_goal=None,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        top_p=top_p,
+        random_seed=seed,
+        iterations=iterations,
+        mode=mode,
+        stages=_stage_settings(stage_config, stage),
+    )
+    try:
+        if input_path == "-":
+            items = parse_batch_items(sys.stdin, defaults)
+        else:
+            with open(input_path, "r", encoding="utf-8") as f:
+                items = parse_batch_items(f, defaults)
+    except (OSError, BatchInputError) as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+
+    with JobQueue(queue) as job_queue:
+        added = job_queue.enqueue(items, max_attempts=max_attempts, replace=replace)
+        counts = job_queue.counts()
+    console.print(f"Queued {added} of {len(items)} jobs ({len(items) - added} already known). {_format_counts(counts)}")
+
+
+@app.command()
+def worker(
+    queue: Path = typer.Option(..., "--queue", help="SQLite job queue file written by `selftalk enqueue`"),
+    processes: int = typer.Option(1, "--processes", min=1, help="Worker processes to run on this machine"),
+    lease: float = typer.Option(60.0, "--lease", min=1.0, help="Seconds a claim lasts without renewal; crashed workers' jobs are reclaimed after this"),
+    poll: float = typer.Option(1.0, "--poll", min=0.01, help="Seconds between checks when no job is ready"),
+    retry_delay: float = typer.Option(5.0, "--retry-delay", min=0.0, help="Delay before the first retry of a failed job (doubles per attempt)"),
+    wait: bool = typer.Option(False, "--wait", help="Keep waiting for new jobs instead of exiting once the queue is drained"),
+    max_jobs: Optional[int] = typer.Option(None, "--max-jobs", min=1, help="Exit after this many jobs (per process)"),
+    store: Optional[Path] = typer.Option(None, "--store", help="Also record finished transcripts in this SQLite transcript store"),
+    cache: Optional[Path] = typer.Option(None, "--cache", help="SQLite response cache file; identical requests are served from it"),
+    cache_max_entries: Optional[int] = typer.Option(None, "--cache-max-entries", min=1, help="Keep at most this many --cache entries, least recently used evicted first"),
+    cache_max_bytes: Optional[int] = typer.Option(None, "--cache-max-bytes", min=1, help="Keep --cache response bodies under this many bytes, least recently used evicted first"),
+    cache_max_age: Optional[float] = typer.Option(None, "--cache-max-age", min=0.0, help="Seconds a --cache entry is served; older ones are dropped"),
+    base_url: Optional[str] = typer.Option(None, "--base-url", help="API root, e.g. a local proxy or stand-in (default: MISTRAL_BASE_URL or Mistral)"),
+    endpoints: Optional[Path] = typer.Option(None, "--endpoints", help="JSON or TOML endpoint pool (URLs, keys, weights) to spread calls over; replaces --base-url"),
+    balance: Optional[str] = typer.Option(None, "--balance", help="With --endpoints: weighted or least-loaded (default: the file's strategy, else weighted)"),
+    fast_path: bool = typer.Option(False, "--fast-path", help="Skip full pydantic validation of API payloads and use orjson if installed"),
+    dashboard: bool = typer.Option(True, "--dashboard/--no-dashboard", help="Live view of jobs, call rates, latency, retries and cache hits (terminals only, --processes 1)"),
+):
+    """Claim and run queued jobs, writing results and transcripts back to the queue.
+
+    Run any number of workers, on this machine (--processes) or others sharing the queue file.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    # Each process gets its own pool, so endpoint health is tracked per process
+    _require_api_key(_open_pool(endpoints, balance))
+    if not queue.exists():
+        console.print(f"[red]Error:[/red] no job queue at {queue}")
+        raise typer.Exit(code=1)
+
+    options = dict(
+        queue=str(queue), lease_s=lease, poll_s=poll, retry_delay_s=retry_delay, wait=wait, max_jobs=max_jobs,
+        store=str(store) if store else None, cache=str(cache) if cache else None,
+        cache_limits=_cache_limits(cache_max_entries, cache_max_bytes, cache_max_age), base_url=base_url, fast=fast_path,
+        endpoints=str(endpoints) if endpoints else None, balance=balance,
+    )
+    if processes == 1:
+        monitor = _dashboard(dashboard)
+        with monitor.live(console) if monitor is not None else nullcontext():
+            results = [_worker_process(options, monitor)]
+    else:
+        # Child processes keep their own counts; there is nothing to show live
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = list(pool.map(_worker_process, [options] * processes))
+
+    from .jobqueue import JobQueue
+
+    with JobQueue(queue) as job_queue:
+        counts = job_queue.counts()
+    console.print(
+        f"Worker done: {sum(r.succeeded for r in results)} succeeded, {sum(r.failed for r in results)} failed attempts, "
+        f"{sum(r.lost for r in results)} lost leases. {_format_counts(counts)}"
+    )
+
+
+def _worker_process(options, monitor=None):
+    # One worker loop; module-level so --processes can run it in child processes
+    from .cache import ResponseCache
+    from .client import MistralClient
+    from .engine import SelfTalkEngine
+    from .jobqueue import JobQueue, run_worker
+    from .pool import load_endpoint_pool
+    from .store import TranscriptStore
+
+    response_cache = ResponseCache(options["cache"], **options["cache_limits"]) if options["cache"] else None
+    transcript_store = TranscriptStore(options["store"]) if options["store"] else None
+    endpoint_pool = load_endpoint_pool(options["endpoints"], strategy=options["balance"]) if options["endpoints"] else None
+    client = MistralClient(cache=response_cache, base_url=options["base_url"], fast=options["fast"], pool=endpoint_pool)
+    try:
+        hooks = [monitor] if monitor is not None else None
+        with JobQueue(options["queue"]) as job_queue, SelfTalkEngine(client=client, quiet=True, hooks=hooks) as engine:
+            return run_worker(
+                job_queue,
+                engine,
+                lease_s=options["lease_s"],
+                poll_s=options["poll_s"],
+                retry_delay_s=options["retry_delay_s"],
+                wait=options["wait"],
+                max_jobs=options["max_jobs"],
+                store=transcript_store,
+                monitor=monitor,
+            )
+    finally:
+        client.close()
+        if response_cache is not None:
+            response_cache.close()
+        if transcript_store is not None:
+            transcript_store.close()
+
+
+@app.command()
+def jobs(
+    queue: Path = typer.Option(..., "--queue", help="SQLite job queue file"),
+    out: Optional[Path] = typer.Option(None, "--out", help="Export finished jobs as a `selftalk batch --out` style JSONL"),
+):
+    """Show job counts by status, or export finished jobs."""
+    if not queue.exists():
+        console.print(f"[red]Error:[/red] no job queue at {queue}")
+        raise typer.Exit(code=1)
+    import json
+
+    from .jobqueue import JobQueue
+
+    with JobQueue(queue) as job_queue:
+        if out is not None:
+            out.parent.mkdir(parents=True, exist_ok=True)
+            with open(out, "w", encoding="utf-8") as f:
+                for record in job_queue.results():
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        counts = job_queue.counts()
+    console.print(_format_counts(counts))
+    if out is not None:
+        console.print(f"Exported finished jobs to [bold]{out}[/bold]")
+
+
+def _format_counts(counts) -> str:
+    return "Jobs: " + ", ".join(f"{counts[status]} {status}" for status in counts)
+
+
+@app.command("fake-server")
+def fake_server(
+    host: str = typer.Option("127.0.0.1", "--host", help="Interface to listen on"),
+    port: int = typer.Option(8000, "--port", help="Port to listen on (0 picks a free one)"),
+    latency_ms: float = typer.Option(0.0, "--latency-ms", min=0.0, help="Mean latency before each response"),
+    latency_dist: str = typer.Option("fixed", "--latency-dist", help="fixed, uniform, exponential or lognormal"),
+    response_tokens: int = typer.Option(64, "--response-tokens", min=1, help="Words per completion"),
+    token_delay_ms: float = typer.Option(0.0, "--token-delay-ms", min=0.0, help="Pause between streamed chunks"),
+    rate_limit_rate: float = typer.Option(0.0, "--429-rate", min=0.0, max=1.0, help="Fraction of requests answered with 429"),
+    server_error_rate: float = typer.Option(0.0, "--5xx-rate", min=0.0, max=1.0, help="Fraction of requests answered with 5xx"),
+    seed: Optional[int] = typer.Option(None, "--seed", help="Seed for latency and error injection"),
+):
+    """Serve a local stand-in for the Mistral chat completions API.
+
+    Point the CLI at it with MISTRAL_BASE_URL=http://HOST:PORT/v1 and any MISTRAL_API_KEY.
+    """
+    from .fakeserver import FakeMistralServer, FakeServerConfig
+
+    config = FakeServerConfig(
+        latency_s=latency_ms / 1000,
+        latency_dist=latency_dist,
+        response_tokens=response_tokens,
+        token_delay_s=token_delay_ms / 1000,
+        rate_limit_rate=rate_limit_rate,
+        server_error_rate=server_error_rate,
+        seed=seed,
+    )
+    try:
+        server = FakeMistralServer(config, host=host, port=port)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error:[/red] {e}")
+        raise typer.Exit(code=1)
+    console.print(f"Fake Mistral API at [bold]{server.base_url}[/bold] (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
 
 
 if __name__ == "__main__":
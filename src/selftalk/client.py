@@ -1,83 +1,808 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import random
 import time
-from typing import Optional
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
+from typing import Iterator, List, Optional
 
 import httpx
 from pydantic import ValidationError
 
-from .models import ChatRequest, ChatResponse
+from .cache import ResponseCache, payload_hash
+from .coalesce import RequestCoalescer
+from .context import CHARS_PER_TOKEN
+from . import fastjson
+from .errors import API_KEY_ENV, DeadlineExceeded, MissingAPIKeyError, MistralAPIError
+from .hedging import Hedger
+from .models import CallStats, ChatChoice, ChatRequest, ChatResponse, Message
+from .pool import EndpointPool, EndpointState
+from .profiling import Profiler
+from .ratelimit import RateLimiter, parse_retry_after
+from .streaming import StreamAccumulator, StreamError, TokenCallback
 
 
-class MistralAPIError(Exception):
-    pass
+def _is_retryable_status(status: int) -> bool:
+    return status == 429 or 500 <= status < 600
 
 
-class MissingAPIKeyError(MistralAPIError):
-    pass
+def _backoff_delay(backoff: float) -> float:
+    return backoff * (1 + random.random() * 0.25)
 
 
-class MistralClient:
+@dataclass
+class HTTPSettings:
+    # Connection pool and timeouts for the underlying httpx client. Timeouts
+    # left as None fall back to the client's overall ``timeout``.
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry_s: Optional[float] = 30.0  # idle time before a pooled connection is dropped
+    http2: bool = False  # needs the h2 package (pip install 'selftalk[http2]')
+    connect_timeout_s: Optional[float] = None
+    read_timeout_s: Optional[float] = None
+    write_timeout_s: Optional[float] = None
+    pool_timeout_s: Optional[float] = None  # waiting for a free pooled connection
+
+    def timeout(self, default: float) -> httpx.Timeout:
+        def pick(value: Optional[float]) -> float:
+            return default if value is None else value
+
+        return httpx.Timeout(
+            connect=pick(self.connect_timeout_s),
+            read=pick(self.read_timeout_s),
+            write=pick(self.write_timeout_s),
+            pool=pick(self.pool_timeout_s),
+        )
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry_s,
+        )
+
+
+def _check_http2(settings: HTTPSettings) -> None:
+    if not settings.http2:
+        return
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        raise MistralAPIError("HTTP/2 needs the h2 package: pip install 'selftalk[http2]'")
+
+
+def build_http_client(settings: Optional[HTTPSettings] = None, timeout: float = 30.0) -> httpx.Client:
+    # One pooled client can back many MistralClients (different keys or
+    # endpoints), engines and threads, so warm connections are reused
+    settings = settings or HTTPSettings()
+    _check_http2(settings)
+    return httpx.Client(timeout=settings.timeout(timeout), limits=settings.limits(), http2=settings.http2)
+
+
+def build_async_http_client(settings: Optional[HTTPSettings] = None, timeout: float = 30.0) -> httpx.AsyncClient:
+    settings = settings or HTTPSettings()
+    _check_http2(settings)
+    return httpx.AsyncClient(timeout=settings.timeout(timeout), limits=settings.limits(), http2=settings.http2)
+
+
+def _parse_fast(data: object) -> ChatResponse:
+    # Checks what the engine relies on (a list of choices whose messages carry
+    # string content) and builds the models without validating the rest
+    choices = data.get("choices") if isinstance(data, dict) else None
+    if not isinstance(choices, list):
+        raise MistralAPIError("Invalid response schema from Mistral: missing choices")
+    parsed = []
+    for n, choice in enumerate(choices):
+        message = choice.get("message") if isinstance(choice, dict) else None
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, str):
+            raise MistralAPIError(f"Invalid response schema from Mistral: choices[{n}].message.content")
+        parsed.append(
+            ChatChoice.model_construct(
+                index=choice.get("index", n),
+                message=Message.model_construct(role=message.get("role", "assistant"), content=content),
+                finish_reason=choice.get("finish_reason"),
+            )
+        )
+    usage = data.get("usage")
+    created = data.get("created")
+    return ChatResponse.model_construct(
+        id=str(data.get("id", "")),
+        object=str(data.get("object", "chat.completion")),
+        created=created if isinstance(created, int) else 0,
+        model=str(data.get("model", "")),
+        choices=parsed,
+        usage=usage if isinstance(usage, dict) else None,
+    )
+
+
+class _Attempts:
+    # Retry bookkeeping for one chat call: backoff schedule plus the numbers
+    # that end up on CallStats (retries, total sleep, HTTP status history).
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.backoff = 1.0
+        self.retries = 0
+        self.backoff_s = 0.0
+        self.throttle_s = 0.0
+        self.statuses: List[int] = []
+
+    def next_delay(self, retry_after: Optional[float] = None) -> float:
+        # The server's Retry-After wins over our own exponential schedule
+        delay = _backoff_delay(self.backoff) if retry_after is None else retry_after
+        self.backoff = min(self.backoff * 2, 16)
+        self.retries += 1
+        self.backoff_s += delay
+        return delay
+
+    def failover(self) -> float:
+        # Retry on another endpoint straight away; the backoff schedule is kept
+        self.retries += 1
+        return 0.0
+
+    def finish(self, resp: ChatResponse) -> ChatResponse:
+        stats = resp.stats or CallStats()
+        stats.latency_s = time.perf_counter() - self.started
+        stats.retries = self.retries
+        stats.backoff_s = self.backoff_s
+        stats.status_history = list(self.statuses)
+        stats.throttle_s = self.throttle_s
+        resp.stats = stats
+        return resp
+
+
+class _Outcome:
+    # HTTP status of one attempt, set once the response headers arrive
+    __slots__ = ("status",)
+
+    def __init__(self):
+        self.status: Optional[int] = None
+
+
+class _BaseMistralClient:
     BASE_URL = "https://api.mistral.ai/v1/chat/completions"
 
-    def __init__(self, api_key: Optional[str] = None, timeout: float = 30.0):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        *,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        fast: bool = False,
+        coalescer: Optional[RequestCoalescer] = None,
+        profiler: Optional[Profiler] = None,
+        pool: Optional[EndpointPool] = None,
+        hedger: Optional[Hedger] = None,
+    ):
         # Support .env for local use
         if api_key is None:
-            api_key = os.getenv("MISTRAL_API_KEY")
+            api_key = os.getenv(API_KEY_ENV)
         self.api_key = api_key
+        # API root such as http://127.0.0.1:8000/v1 (e.g. the fake server)
+        base_url = base_url or os.getenv("MISTRAL_BASE_URL")
+        self.url = base_url.rstrip("/") + "/chat/completions" if base_url else self.BASE_URL
+        # Fast path: request bodies built straight from the messages, encoded and
+        # decoded with orjson when available, and responses checked only for the
+        # fields the engine reads. fast=False keeps full pydantic validation for
+        # debugging schema problems.
+        self.fast = fast
         self.timeout = timeout
-        self._http = httpx.Client(timeout=self.timeout)
+        self.cache = cache
+        # May be shared by many clients, threads and tasks
+        self.rate_limiter = rate_limiter
+        self.coalescer = coalescer
+        # Times serialize/network/parse/backoff/... phases of every call
+        self.profiler = profiler
+        # Spreads attempts over several endpoints and keys instead of self.url;
+        # endpoints without a key of their own use api_key
+        self.pool = pool
+        # Duplicates non-streamed calls that run past a latency percentile
+        self.hedger = hedger
+
+    def _phase(self, name: str):
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
 
     def ensure_api_key(self) -> None:
+        if self.pool is not None and all(e.api_key for e in self.pool.endpoints):
+            return
         if not self.api_key:
-            raise MissingAPIKeyError(
-                "MISTRAL_API_KEY is not set. Please set it in your environment or a .env file."
-            )
+            raise MissingAPIKeyError()
 
-    def _headers(self) -> dict:
-        self.ensure_api_key()
+    def _headers(self, slot: Optional[EndpointState] = None) -> dict:
+        api_key = (slot.endpoint.api_key if slot is not None else None) or self.api_key
+        if not api_key:
+            raise MissingAPIKeyError()
         return {
-            "Authorization": f"Bearer {self.api_key}",
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
         }
 
-    def chat(self, request: ChatRequest) -> ChatResponse:
-        payload = request.model_dump(by_alias=True)
-        return self._post_with_backoff(payload)
+    def _pick(self, avoid: Optional[EndpointState]) -> Optional[EndpointState]:
+        return self.pool.acquire(avoid) if self.pool is not None else None
+
+    def _url(self, slot: Optional[EndpointState]) -> str:
+        return slot.chat_url if slot is not None else self.url
+
+    @contextmanager
+    def _attempt(self, slot: Optional[EndpointState]) -> Iterator[_Outcome]:
+        # Reports one attempt's outcome and latency to the pool. Transport
+        # errors count against the endpoint; attempts that never got going
+        # (no API key, cancellation) do not.
+        outcome = _Outcome()
+        if slot is None:
+            yield outcome
+            return
+        started = time.perf_counter()
+        try:
+            yield outcome
+        except httpx.RequestError:
+            self.pool.release(slot, None, time.perf_counter() - started)
+            raise
+        except BaseException:
+            if outcome.status is None:
+                self.pool.cancel(slot)
+            else:
+                self.pool.release(slot, outcome.status, time.perf_counter() - started)
+            raise
+        self.pool.release(slot, outcome.status, time.perf_counter() - started)
+
+    def _retry_delay(
+        self,
+        attempts: _Attempts,
+        slot: Optional[EndpointState],
+        retry_after: Optional[float] = None,
+        *,
+        deadline: Optional[float] = None,
+        last_exc: Optional[Exception] = None,
+    ) -> float:
+        if slot is not None and self.pool.has_alternative(slot):
+            return attempts.failover()
+        delay = attempts.next_delay(retry_after)
+        # No point sleeping past the deadline only to give up afterwards
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            raise self._deadline_error(attempts, last_exc)
+        return delay
+
+    @staticmethod
+    def _budget(deadline: Optional[float]) -> Optional[float]:
+        # Seconds left before the deadline (time.monotonic() based), if any
+        return None if deadline is None else deadline - time.monotonic()
+
+    @staticmethod
+    def _deadline_error(attempts: _Attempts, last_exc: Optional[Exception]) -> DeadlineExceeded:
+        if last_exc is not None:
+            detail = f"last error: {last_exc}"
+        elif attempts.statuses:
+            detail = f"last status: {attempts.statuses[-1]}"
+        else:
+            detail = "no response yet"
+        return DeadlineExceeded(f"Deadline exceeded calling Mistral after {attempts.retries + 1} attempt(s); {detail}")
+
+    def _attempt_timeout(self, deadline: Optional[float], attempts: _Attempts, last_exc: Optional[Exception]) -> dict:
+        # httpx timeout keyword for one attempt: the pool's timeouts, capped
+        # at what is left of the deadline (time.monotonic() based)
+        if deadline is None:
+            return {}
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise self._deadline_error(attempts, last_exc)
+        timeout = self._http.timeout
+
+        def cap(value: Optional[float]) -> float:
+            return remaining if value is None else min(value, remaining)
+
+        return {
+            "timeout": httpx.Timeout(
+                connect=cap(timeout.connect), read=cap(timeout.read), write=cap(timeout.write), pool=cap(timeout.pool)
+            )
+        }
+
+    @staticmethod
+    def _hedged(resp: ChatResponse, started: float) -> ChatResponse:
+        # Latency as the caller saw it, from before the first of the two requests
+        resp.stats.hedged = True
+        resp.stats.latency_s = time.perf_counter() - started
+        return resp
+
+    def _payload(self, request: ChatRequest) -> dict:
+        if not self.fast:
+            return request.model_dump(by_alias=True)
+        # Same dict as model_dump (so cache keys match), without the copy/validate pass
+        return {
+            "model": request.model,
+            "messages": [{"role": m.role, "content": m.content} for m in request.messages],
+            "temperature": request.temperature,
+            "max_tokens": request.max_tokens,
+            "top_p": request.top_p,
+            "stream": request.stream,
+            "random_seed": request.random_seed,
+        }
+
+    def _body(self, json_body: dict) -> dict:
+        # Keyword arguments for httpx: pre-encoded bytes on the fast path
+        if self.fast:
+            return {"content": fastjson.dumps(json_body)}
+        return {"json": json_body}
+
+    def _accumulator(self, on_token: Optional[TokenCallback], started: float) -> StreamAccumulator:
+        return StreamAccumulator(on_token, started=started, loads=fastjson.loads if self.fast else None)
+
+    @staticmethod
+    def _payload_key(payload: dict) -> str:
+        # Streamed and non-streamed calls produce the same completion
+        return payload_hash({k: v for k, v in payload.items() if k != "stream"})
+
+    def _cache_key(self, payload: dict, use_cache: bool) -> Optional[str]:
+        if self.cache is None or not use_cache:
+            return None
+        return self._payload_key(payload)
+
+    @staticmethod
+    def _shared_response(resp: ChatResponse, on_token: Optional[TokenCallback], waited_s: float) -> ChatResponse:
+        # A waiter's copy of the leader's response, with its own stats
+        shared = resp.model_copy()
+        shared.stats = CallStats(coalesced=True, latency_s=waited_s)
+        content = shared.first_message_content()
+        if on_token is not None and content:
+            on_token(content)
+        return shared
+
+    def _cache_get(self, key: Optional[str], on_token: Optional[TokenCallback]) -> Optional[ChatResponse]:
+        if key is None:
+            return None
+        with self._phase("cache"):
+            data = self.cache.get(key)
+        if data is None:
+            return None
+        resp = ChatResponse.model_validate(data)
+        resp.stats = CallStats(cached=True, latency_s=0.0)
+        content = resp.first_message_content()
+        if on_token is not None and content:
+            on_token(content)
+        return resp
+
+    def _cache_put(self, key: Optional[str], resp: ChatResponse) -> None:
+        if key is not None:
+            with self._phase("cache"):
+                self.cache.put(key, resp.model_dump())
+
+    @staticmethod
+    def _estimate_request_tokens(json_body: dict) -> int:
+        prompt = sum(len(m.get("content") or "") // CHARS_PER_TOKEN + 4 for m in json_body.get("messages", []))
+        return prompt + (json_body.get("max_tokens") or 0)
+
+    def _observe(self, resp: httpx.Response) -> Optional[float]:
+        if self.rate_limiter is not None:
+            return self.rate_limiter.observe(resp.status_code, resp.headers)
+        return parse_retry_after(resp.headers.get("retry-after"))
+
+    def _settle(self, estimated: int, resp: ChatResponse, slot: Optional[EndpointState] = None) -> ChatResponse:
+        total = resp.usage.get("total_tokens") if resp.usage else None
+        if total is not None:
+            if self.rate_limiter is not None:
+                self.rate_limiter.settle_tokens(estimated, int(total))
+            if slot is not None:
+                self.pool.record_tokens(slot, int(total))
+        return resp
+
+    def _parse_response(self, resp: httpx.Response) -> ChatResponse:
+        if self.fast:
+            return _parse_fast(fastjson.loads(resp.content))
+        data = resp.json()
+        try:
+            return ChatResponse.model_validate(data)
+        except ValidationError as ve:
+            raise MistralAPIError(f"Invalid response schema from Mistral: {ve}")
+
+    @staticmethod
+    def _stream_failed(acc: StreamAccumulator, e: Exception) -> None:
+        if isinstance(e, StreamError):
+            raise MistralAPIError(f"Invalid stream from Mistral: {e}")
+        # Tokens already reached the caller; a retry would replay them
+        if acc.received_tokens:
+            raise MistralAPIError(f"Stream from Mistral interrupted: {e}")
+
+    @staticmethod
+    def _check_fatal(e: Exception) -> None:
+        # Only backoff on transient server errors; otherwise bail out
+        if isinstance(e, httpx.HTTPStatusError):
+            status = e.response.status_code if e.response is not None else None
+            if status is not None and status < 500 and status != 429:
+                raise MistralAPIError(f"HTTP error from Mistral: {status} {e}")
+
+    @staticmethod
+    def _raise_status(attempts: _Attempts, status: int, body: str) -> None:
+        # A retryable status on the last attempt: report it rather than back off again
+        raise MistralAPIError(f"Failed to call Mistral after {attempts.retries + 1} attempt(s): HTTP {status} {body[:500]}")
 
-    def _post_with_backoff(self, json_body: dict, max_retries: int = 5) -> ChatResponse:
-        backoff = 1.0
+    @staticmethod
+    def _raise_exhausted(last_exc: Optional[Exception]) -> None:
+        if last_exc:
+            raise MistralAPIError(f"Failed to call Mistral after retries: {last_exc}")
+        raise MistralAPIError("Failed to call Mistral: unknown error")
+
+
+class MistralClient(_BaseMistralClient):
+    # Owns its connection pool unless ``http_client`` is passed in; use it as a
+    # context manager (or call close()) to release the pool's sockets.
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        *,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        http: Optional[HTTPSettings] = None,
+        http_client: Optional[httpx.Client] = None,
+        fast: bool = False,
+        coalescer: Optional[RequestCoalescer] = None,
+        profiler: Optional[Profiler] = None,
+        pool: Optional[EndpointPool] = None,
+        hedger: Optional[Hedger] = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            timeout=timeout,
+            cache=cache,
+            rate_limiter=rate_limiter,
+            base_url=base_url,
+            fast=fast,
+            coalescer=coalescer,
+            profiler=profiler,
+            pool=pool,
+            hedger=hedger,
+        )
+        self._owns_http = http_client is None
+        self._http = http_client or build_http_client(http, self.timeout)
+
+    def __enter__(self) -> "MistralClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_http:
+            self._http.close()
+
+    def chat(
+        self,
+        request: ChatRequest,
+        on_token: Optional[TokenCallback] = None,
+        *,
+        use_cache: bool = True,
+        deadline: Optional[float] = None,
+    ) -> ChatResponse:
+        # With request.stream set, content deltas go to on_token as they arrive.
+        # deadline is a time.monotonic() value that retries, backoff sleeps and
+        # HTTP timeouts are kept within; past it, DeadlineExceeded is raised.
+        with self._phase("serialize"):
+            payload = self._payload(request)
+        key = self._cache_key(payload, use_cache)
+        cached = self._cache_get(key, on_token)
+        if cached is not None:
+            return cached
+        if self.coalescer is not None:
+            started = time.perf_counter()
+            resp, shared = self.coalescer.call(
+                self._payload_key(payload), lambda: self._send(payload, on_token, key, deadline), deadline
+            )
+            return self._shared_response(resp, on_token, time.perf_counter() - started) if shared else resp
+        return self._send(payload, on_token, key, deadline)
+
+    def _send(
+        self, payload: dict, on_token: Optional[TokenCallback], key: Optional[str], deadline: Optional[float] = None
+    ) -> ChatResponse:
+        if payload["stream"]:
+            # Not hedged: a duplicate stream would replay tokens to on_token
+            resp = self._stream_with_backoff(payload, on_token, deadline=deadline)
+        elif self.hedger is not None:
+            started = time.perf_counter()
+            resp, hedged = self.hedger.call(lambda: self._post_with_backoff(payload, deadline=deadline))
+            if hedged:
+                resp = self._hedged(resp, started)
+        else:
+            resp = self._post_with_backoff(payload, deadline=deadline)
+        self._cache_put(key, resp)
+        return resp
+
+    def _sleep(self, delay: float) -> None:
+        if delay <= 0:
+            return
+        with self._phase("backoff"):
+            time.sleep(delay)
+
+    def _stream_with_backoff(
+        self,
+        json_body: dict,
+        on_token: Optional[TokenCallback],
+        max_retries: int = 5,
+        *,
+        deadline: Optional[float] = None,
+    ) -> ChatResponse:
+        attempts = _Attempts()
+        tokens = self._estimate_request_tokens(json_body)
+        with self._phase("serialize"):
+            body = self._body(json_body)
         last_exc: Optional[Exception] = None
+        slot: Optional[EndpointState] = None
         for attempt in range(1, max_retries + 1):
+            acc = self._accumulator(on_token, attempts.started)
+            retry_after: Optional[float] = None
+            if self.rate_limiter is not None:
+                with self._phase("throttle"):
+                    waited = self.rate_limiter.acquire(tokens, budget=self._budget(deadline))
+                if waited is None:
+                    raise self._deadline_error(attempts, last_exc)
+                attempts.throttle_s += waited
+            timeout = self._attempt_timeout(deadline, attempts, last_exc)
+            slot = self._pick(slot)
             try:
-                resp = self._http.post(self.BASE_URL, headers=self._headers(), json=json_body)
-                if resp.status_code == 429 or 500 <= resp.status_code < 600:
+                with self._phase("network"), self._attempt(slot) as outcome:
+                    with self._http.stream("POST", self._url(slot), headers=self._headers(slot), **body, **timeout) as resp:
+                        outcome.status = resp.status_code
+                        attempts.statuses.append(resp.status_code)
+                        retry_after = self._observe(resp)
+                        retry = _is_retryable_status(resp.status_code)
+                        if retry and attempt >= max_retries:
+                            self._raise_status(attempts, resp.status_code, resp.read().decode("utf-8", "replace"))
+                        if not retry:
+                            resp.raise_for_status()
+                            for line in resp.iter_lines():
+                                acc.feed_line(line)
+                                if deadline is not None and time.monotonic() >= deadline:
+                                    raise self._deadline_error(attempts, None)
+                if not retry:
+                    return self._settle(tokens, attempts.finish(acc.response()), slot)
+            except (httpx.RequestError, httpx.HTTPStatusError, StreamError) as e:
+                self._stream_failed(acc, e)
+                last_exc = e
+                self._check_fatal(e)
+                if attempt >= max_retries:
+                    break
+            self._sleep(self._retry_delay(attempts, slot, retry_after, deadline=deadline, last_exc=last_exc))
+        self._raise_exhausted(last_exc)
+
+    def _post_with_backoff(
+        self, json_body: dict, max_retries: int = 5, *, deadline: Optional[float] = None
+    ) -> ChatResponse:
+        attempts = _Attempts()
+        tokens = self._estimate_request_tokens(json_body)
+        with self._phase("serialize"):
+            body = self._body(json_body)
+        last_exc: Optional[Exception] = None
+        slot: Optional[EndpointState] = None
+        for attempt in range(1, max_retries + 1):
+            if self.rate_limiter is not None:
+                with self._phase("throttle"):
+                    waited = self.rate_limiter.acquire(tokens, budget=self._budget(deadline))
+                if waited is None:
+                    raise self._deadline_error(attempts, last_exc)
+                attempts.throttle_s += waited
+            timeout = self._attempt_timeout(deadline, attempts, last_exc)
+            slot = self._pick(slot)
+            try:
+                with self._phase("network"), self._attempt(slot) as outcome:
+                    resp = self._http.post(self._url(slot), headers=self._headers(slot), **body, **timeout)
+                    outcome.status = resp.status_code
+                attempts.statuses.append(resp.status_code)
+                retry_after = self._observe(resp)
+                if _is_retryable_status(resp.status_code):
+                    if attempt >= max_retries:
+                        self._raise_status(attempts, resp.status_code, resp.text)
                     # Backoff on rate limit / server error
-                    delay = backoff * (1 + random.random() * 0.25)
-                    time.sleep(delay)
-                    backoff = min(backoff * 2, 16)
+                    self._sleep(self._retry_delay(attempts, slot, retry_after, deadline=deadline, last_exc=last_exc))
                     continue
                 resp.raise_for_status()
-                data = resp.json()
-                try:
-                    return ChatResponse.model_validate(data)
-                except ValidationError as ve:
-                    raise MistralAPIError(f"Invalid response schema from Mistral: {ve}")
+                with self._phase("parse"):
+                    parsed = self._parse_response(resp)
+                return self._settle(tokens, attempts.finish(parsed), slot)
             except (httpx.RequestError, httpx.HTTPStatusError) as e:
                 last_exc = e
-                # Only backoff on transient server errors; otherwise bail out
-                if isinstance(e, httpx.HTTPStatusError):
-                    status = e.response.status_code if e.response is not None else None
-                    if status is not None and status < 500 and status != 429:
-                        raise MistralAPIError(f"HTTP error from Mistral: {status} {e}")
+                self._check_fatal(e)
                 if attempt >= max_retries:
                     break
-                delay = backoff * (1 + random.random() * 0.25)
-                time.sleep(delay)
-                backoff = min(backoff * 2, 16)
-        if last_exc:
-            raise MistralAPIError(f"Failed to call Mistral after retries: {last_exc}")
-        raise MistralAPIError("Failed to call Mistral: unknown error")
+                self._sleep(self._retry_delay(attempts, slot, deadline=deadline, last_exc=last_exc))
+        self._raise_exhausted(last_exc)
+
+
+class AsyncMistralClient(_BaseMistralClient):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: float = 30.0,
+        *,
+        cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        base_url: Optional[str] = None,
+        http: Optional[HTTPSettings] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        fast: bool = False,
+        coalescer: Optional[RequestCoalescer] = None,
+        profiler: Optional[Profiler] = None,
+        pool: Optional[EndpointPool] = None,
+        hedger: Optional[Hedger] = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            timeout=timeout,
+            cache=cache,
+            rate_limiter=rate_limiter,
+            base_url=base_url,
+            fast=fast,
+            coalescer=coalescer,
+            profiler=profiler,
+            pool=pool,
+            hedger=hedger,
+        )
+        self._owns_http = http_client is None
+        self._http = http_client or build_async_http_client(http, self.timeout)
+
+    async def __aenter__(self) -> "AsyncMistralClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_http:
+            await self._http.aclose()
+
+    async def chat(
+        self,
+        request: ChatRequest,
+        on_token: Optional[TokenCallback] = None,
+        *,
+        use_cache: bool = True,
+        deadline: Optional[float] = None,
+    ) -> ChatResponse:
+        with self._phase("serialize"):
+            payload = self._payload(request)
+        key = self._cache_key(payload, use_cache)
+        cached = await self._acache_get(key, on_token)
+        if cached is not None:
+            return cached
+        if self.coalescer is not None:
+            started = time.perf_counter()
+            resp, shared = await self.coalescer.acall(
+                self._payload_key(payload), lambda: self._send(payload, on_token, key, deadline), deadline
+            )
+            return self._shared_response(resp, on_token, time.perf_counter() - started) if shared else resp
+        return await self._send(payload, on_token, key, deadline)
+
+    async def _send(
+        self, payload: dict, on_token: Optional[TokenCallback], key: Optional[str], deadline: Optional[float] = None
+    ) -> ChatResponse:
+        if payload["stream"]:
+            resp = await self._stream_with_backoff(payload, on_token, deadline=deadline)
+        elif self.hedger is not None:
+            started = time.perf_counter()
+            resp, hedged = await self.hedger.acall(lambda: self._post_with_backoff(payload, deadline=deadline))
+            if hedged:
+                resp = self._hedged(resp, started)
+        else:
+            resp = await self._post_with_backoff(payload, deadline=deadline)
+        await self._acache_put(key, resp)
+        return resp
+
+    # SQLite work runs on a worker thread so concurrent runs keep going
+    # while the cache reads or writes
+    async def _acache_get(self, key: Optional[str], on_token: Optional[TokenCallback]) -> Optional[ChatResponse]:
+        if key is None:
+            return None
+        resp = await asyncio.to_thread(self._cache_get, key, None)
+        content = resp.first_message_content() if resp is not None else None
+        if on_token is not None and content:
+            on_token(content)
+        return resp
+
+    async def _acache_put(self, key: Optional[str], resp: ChatResponse) -> None:
+        if key is not None:
+            await asyncio.to_thread(self._cache_put, key, resp)
+
+    async def _sleep(self, delay: float) -> None:
+        if delay <= 0:
+            return
+        with self._phase("backoff"):
+            await asyncio.sleep(delay)
+
+    async def _stream_with_backoff(
+        self,
+        json_body: dict,
+        on_token: Optional[TokenCallback],
+        max_retries: int = 5,
+        *,
+        deadline: Optional[float] = None,
+    ) -> ChatResponse:
+        attempts = _Attempts()
+        tokens = self._estimate_request_tokens(json_body)
+        with self._phase("serialize"):
+            body = self._body(json_body)
+        last_exc: Optional[Exception] = None
+        slot: Optional[EndpointState] = None
+        for attempt in range(1, max_retries + 1):
+            acc = self._accumulator(on_token, attempts.started)
+            retry_after: Optional[float] = None
+            if self.rate_limiter is not None:
+                with self._phase("throttle"):
+                    waited = await self.rate_limiter.acquire_async(tokens, budget=self._budget(deadline))
+                if waited is None:
+                    raise self._deadline_error(attempts, last_exc)
+                attempts.throttle_s += waited
+            timeout = self._attempt_timeout(deadline, attempts, last_exc)
+            slot = self._pick(slot)
+            try:
+                with self._phase("network"), self._attempt(slot) as outcome:
+                    async with self._http.stream("POST", self._url(slot), headers=self._headers(slot), **body, **timeout) as resp:
+                        outcome.status = resp.status_code
+                        attempts.statuses.append(resp.status_code)
+                        retry_after = self._observe(resp)
+                        retry = _is_retryable_status(resp.status_code)
+                        if retry and attempt >= max_retries:
+                            self._raise_status(attempts, resp.status_code, (await resp.aread()).decode("utf-8", "replace"))
+                        if not retry:
+                            resp.raise_for_status()
+                            async for line in resp.aiter_lines():
+                                acc.feed_line(line)
+                                if deadline is not None and time.monotonic() >= deadline:
+                                    raise self._deadline_error(attempts, None)
+                if not retry:
+                    return self._settle(tokens, attempts.finish(acc.response()), slot)
+            except (httpx.RequestError, httpx.HTTPStatusError, StreamError) as e:
+                self._stream_failed(acc, e)
+                last_exc = e
+                self._check_fatal(e)
+                if attempt >= max_retries:
+                    break
+            await self._sleep(self._retry_delay(attempts, slot, retry_after, deadline=deadline, last_exc=last_exc))
+        self._raise_exhausted(last_exc)
+
+    async def _post_with_backoff(
+        self, json_body: dict, max_retries: int = 5, *, deadline: Optional[float] = None
+    ) -> ChatResponse:
+        attempts = _Attempts()
+        tokens = self._estimate_request_tokens(json_body)
+        with self._phase("serialize"):
+            body = self._body(json_body)
+        last_exc: Optional[Exception] = None
+        slot: Optional[EndpointState] = None
+        for attempt in range(1, max_retries + 1):
+            if self.rate_limiter is not None:
+                with self._phase("throttle"):
+                    waited = await self.rate_limiter.acquire_async(tokens, budget=self._budget(deadline))
+                if waited is None:
+                    raise self._deadline_error(attempts, last_exc)
+                attempts.throttle_s += waited
+            timeout = self._attempt_timeout(deadline, attempts, last_exc)
+            slot = self._pick(slot)
+            try:
+                with self._phase("network"), self._attempt(slot) as outcome:
+                    resp = await self._http.post(self._url(slot), headers=self._headers(slot), **body, **timeout)
+                    outcome.status = resp.status_code
+                attempts.statuses.append(resp.status_code)
+                retry_after = self._observe(resp)
+                if _is_retryable_status(resp.status_code):
+                    if attempt >= max_retries:
+                        self._raise_status(attempts, resp.status_code, resp.text)
+                    # Backoff on rate limit / server error
+                    await self._sleep(self._retry_delay(attempts, slot, retry_after, deadline=deadline, last_exc=last_exc))
+                    continue
+                resp.raise_for_status()
+                with self._phase("parse"):
+                    parsed = self._parse_response(resp)
+                return self._settle(tokens, attempts.finish(parsed), slot)
+            except (httpx.RequestError, httpx.HTTPStatusError) as e:
+                last_exc = e
+                self._check_fatal(e)
+                if attempt >= max_retries:
+                    break
+                await self._sleep(self._retry_delay(attempts, slot, deadline=deadline, last_exc=last_exc))
+        self._raise_exhausted(last_exc)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .errors import DeadlineExceeded
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RequestCoalescer:
+    # Singleflight for chat calls: while a request is in flight, identical
+    # requests (same key) wait for it instead of going out themselves, and
+    # all of them get its response or its exception. Shared by any number
+    # of MistralClient / AsyncMistralClient instances, threads and tasks.
+    #
+    # Only worth it for deterministic settings (temperature 0 or a fixed
+    # seed); otherwise identical payloads are meant to sample differently.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        self._tasks: Dict[str, "asyncio.Future[Any]"] = {}
+        self.sent = 0  # calls that went out
+        self.saved = 0  # calls answered by another caller's in-flight request
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+    def call(self, key: str, fn: Callable[[], T], deadline: Optional[float] = None) -> Tuple[T, bool]:
+        # Returns fn()'s result and whether it came from another caller. A
+        # waiter gives up at its own deadline (time.monotonic()); the leader's
+        # call is bounded by the deadline fn was built with.
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.sent += 1
+            else:
+                self.saved += 1
+        if not leader:
+            if not flight.done.wait(self._remaining(deadline)):
+                raise DeadlineExceeded("Call deadline exceeded while waiting for an identical request")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result, False
+
+    async def acall(self, key: str, fn: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> Tuple[T, bool]:
+        # The request runs as its own task, so a cancelled caller does not
+        # cancel it for the others still waiting
+        task = self._tasks.get(key)
+        shared = task is not None
+        if not shared:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        with self._lock:
+            if shared:
+                self.saved += 1
+            else:
+                self.sent += 1
+        if not shared:
+            return await asyncio.shield(task), shared
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self._remaining(deadline)), shared
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Call deadline exceeded while waiting for an identical request")
+
+    def stats(self) -> Dict[str, int]:
+        return {"sent": self.sent, "saved": self.saved}
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+from .models import Message
+
+# full:   resend the whole history (original behaviour)
+# window: pinned system/goal messages plus the last N messages
+# latest: pinned messages plus the latest answer and what followed it
+#         (critique, instructions) only
+CONTEXT_STRATEGIES = ("full", "window", "latest")
+
+# Rough chars-per-token ratio; good enough for budgeting and logging without a tokenizer
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: List[Message]) -> int:
+    # A few tokens of per-message overhead for role markers
+    return sum(len(m.content) // CHARS_PER_TOKEN + 4 for m in messages)
+
+
+def select_context(
+    messages: List[Message],
+    strategy: str,
+    *,
+    pinned: int,
+    anchor: int,
+    window: int = 6,
+    budget_tokens: Optional[int] = None,
+) -> List[Message]:
+    # ``pinned`` leading messages (system prompt, user goal) are always kept.
+    # ``anchor`` is the index where the latest answer's exchange starts.
+    head, history = messages[:pinned], messages[pinned:]
+    if strategy == "full":
+        tail = history
+    elif strategy == "window":
+        tail = history[-max(window, 1):]
+    elif strategy == "latest":
+        tail = messages[max(anchor, pinned):]
+    else:
+        raise ValueError(f"Unknown context strategy: {strategy}")
+
+    if budget_tokens is not None:
+        # Drop oldest unpinned messages until under budget, but always keep the
+        # newest one (the instruction being answered).
+        used = estimate_tokens(head) + estimate_tokens(tail)
+        start = 0
+        while used > budget_tokens and start < len(tail) - 1:
+            used -= estimate_tokens([tail[start]])
+            start += 1
+        tail = tail[start:]
+    return head + tail
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+from .models import ChatRequest, ChatResponse
+
+REFRESH_PER_SECOND = 4.0
+
+
+class RunDashboard:
+    # Live view of many runs (batch goals, queue jobs): runs in flight and
+    # done, call and token rates, call latency percentiles, retries, 429s and
+    # cache hits. Pass it to the engine as a hook (it counts every call) and
+    # to run_batch / run_worker as monitor (it counts runs).
+    #
+    # Hooks only bump counters under a lock; the table is built by live()'s
+    # refresh thread at a fixed rate, however many calls finish in between.
+
+    def __init__(self, *, window: int = 1000, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latencies: Deque[float] = deque(maxlen=window)  # recent calls, for percentiles
+        self.started = clock()
+        self.total: Optional[int] = None  # runs to do, when known up front
+        self.skipped = 0
+        self.runs_in_flight = 0
+        self.runs_succeeded = 0
+        self.runs_failed = 0
+        self.calls_in_flight = 0
+        self.calls = 0
+        self.call_errors = 0
+        self.tokens = 0
+        self.retries = 0
+        self.rate_limited = 0  # 429 responses, retried ones included
+        self.cache_hits = 0
+
+    # Run monitor
+    def runs_planned(self, total: int, skipped: int = 0) -> None:
+        with self._lock:
+            self.total = total
+            self.skipped = skipped
+
+    def run_started(self) -> None:
+        with self._lock:
+            self.runs_in_flight += 1
+
+    def run_finished(self, ok: bool) -> None:
+        with self._lock:
+            self.runs_in_flight -= 1
+            if ok:
+                self.runs_succeeded += 1
+            else:
+                self.runs_failed += 1
+
+    # CallHook
+    def before_call(self, request: ChatRequest) -> None:
+        with self._lock:
+            self.calls_in_flight += 1
+
+    def after_call(
+        self,
+        request: ChatRequest,
+        response: Optional[ChatResponse],
+        error: Optional[BaseException],
+        elapsed_s: float,
+    ) -> None:
+        stats = response.stats if response is not None else None
+        usage = response.usage if response is not None else None
+        with self._lock:
+            self.calls_in_flight -= 1
+            self.calls += 1
+            if error is not None:
+                self.call_errors += 1
+                return
+            self._latencies.append(elapsed_s)
+            if usage:
+                self.tokens += usage.get("total_tokens") or 0
+            if stats is not None:
+                self.retries += stats.retries
+                self.rate_limited += stats.status_history.count(429)
+                if stats.cached:
+                    self.cache_hits += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = max(self._clock() - self.started, 1e-9)
+            ordered = sorted(self._latencies)
+            answered = self.calls - self.call_errors
+            return {
+                "elapsed_s": elapsed,
+                "total": self.total,
+                "skipped": self.skipped,
+                "runs_in_flight": self.runs_in_flight,
+                "runs_succeeded": self.runs_succeeded,
+                "runs_failed": self.runs_failed,
+                "calls_in_flight": self.calls_in_flight,
+                "calls": self.calls,
+                "call_errors": self.call_errors,
+                "calls_per_s": self.calls / elapsed,
+                "tokens": self.tokens,
+                "tokens_per_s": self.tokens / elapsed,
+                "p50_s": ordered[int(0.50 * (len(ordered) - 1))] if ordered else None,
+                "p95_s": ordered[int(0.95 * (len(ordered) - 1))] if ordered else None,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "cache_hit_rate": self.cache_hits / answered if answered else None,
+            }
+
+    def render(self):
+        from rich.table import Table
+
+        s = self.snapshot()
+        done = s["runs_succeeded"] + s["runs_failed"]
+        todo = s["total"] - s["skipped"] if s["total"] is not None else None
+        latency = f"p50 {s['p50_s']:.2f}s  p95 {s['p95_s']:.2f}s" if s["p50_s"] is not None else "-"
+        hit_rate = f"{s['cache_hit_rate']:.0%}" if s["cache_hit_rate"] is not None else "-"
+
+        table = Table(title=f"selftalk  {s['elapsed_s']:.0f}s", show_header=False, show_edge=False)
+        table.add_column(style="bold")
+        table.add_column(justify="right")
+        table.add_row("runs in flight", str(s["runs_in_flight"]))
+        table.add_row(
+            "runs done",
+            (f"{done} / {todo}" if todo is not None else str(done))
+            + (f"  ({s['runs_failed']} failed)" if s["runs_failed"] else ""),
+        )
+        table.add_row("calls", f"{s['calls']} ({s['calls_in_flight']} in flight, {s['call_errors']} failed)")
+        table.add_row("calls/s", f"{s['calls_per_s']:.2f}")
+        table.add_row("tokens/s", f"{s['tokens_per_s']:.1f}")
+        table.add_row("call latency", latency)
+        table.add_row("retries / 429s", f"{s['retries']} / {s['rate_limited']}")
+        table.add_row("cache hit rate", hit_rate)
+        return table
+
+    @contextmanager
+    def live(self, console, *, refresh_per_second: float = REFRESH_PER_SECOND) -> Iterator[None]:
+        # Redraws in place on a terminal; elsewhere (pipes, CI logs, dumb
+        # terminals) it shows nothing, so log output stays line by line
+        if not console.is_terminal or console.is_dumb_terminal:
+            yield
+            return
+        from rich.live import Live
+
+        with Live(console=console, get_renderable=self.render, refresh_per_second=refresh_per_second):
+            yield
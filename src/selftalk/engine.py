@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-import json
-from dataclasses import dataclass
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
 from datetime import datetime, timezone
-from typing import Optional, Tuple, List, Dict, Any
+from typing import Optional, Tuple, List, Dict, Any, Generator, Sequence, Union
 
-from rich.console import Console
-from rich.progress import track
-
-from .client import MistralClient, MissingAPIKeyError
-from .models import Message, ChatRequest
+from .client import AsyncMistralClient, MistralClient, MissingAPIKeyError
+from .errors import DeadlineExceeded
+from .context import CONTEXT_STRATEGIES, estimate_tokens, select_context
+from .metrics import summarize_transcript, usage_fields
+from .models import Message, ChatRequest, ChatResponse
 from .prompts import (
     build_initial_messages,
     CRITIC_INSTRUCTION,
@@ -17,9 +20,43 @@ from .prompts import (
     DEBATE_CON_INSTRUCTION,
     DEBATE_FINAL_INSTRUCTION,
     DEBATE_PRO_INSTRUCTION,
+    NO_ISSUES_HINT,
+    build_judge_prompt,
+)
+from .profiling import CallHook, Profiler, _ProfiledSink
+from .resume import ReplaySink
+from .stages import MAX_TEMPERATURE, STAGE_ROLES, StageSettings, stage_overrides
+from .transcript import (
+    CompactTranscript,
+    TranscriptEntry,
+    TranscriptSink,
+    write_transcript_jsonl,
+    write_transcript_split_json,
+)
+from .stopping import (
+    STOP_CONVERGED,
+    STOP_DEADLINE,
+    STOP_MAX_ITERATIONS,
+    STOP_NO_ISSUES,
+    RunBudget,
+    signals_no_issues,
+    similarity,
 )
 
-console = Console()
+_console = None
+
+
+def get_console():
+    # rich is only imported once something is printed; quiet library use
+    # (AsyncSelfTalkEngine, batch workers) never loads it
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+MODES = ("critic", "debate", "tournament")
 
 
 @dataclass
@@ -32,10 +69,75 @@ class EngineConfig:
     top_p: Optional[float] = None
     random_seed: Optional[int] = None
     iterations: int = 3
-    mode: str = "critic"  # or "debate"
+    mode: str = "critic"  # or "debate" / "tournament"
+    stream: bool = False  # stream tokens (SSE); records time-to-first-token per call
+    context: str = "full"  # or "window" / "latest", see context.py
+    context_window: int = 6  # messages kept after the pinned system/goal for "window"
+    context_budget_tokens: Optional[int] = None  # approximate prompt token cap
+    # Early stopping (off by default); the reason is recorded as a "stop" transcript entry
+    stop_similarity: Optional[float] = None  # stop once successive answers are this similar (0..1)
+    stop_on_no_issues: bool = False  # stop when the critic / Con replies NO ISSUES
+    max_total_tokens: Optional[int] = None  # stop starting new rounds past this many tokens
+    max_seconds: Optional[float] = None  # stop starting new rounds past this wall time
+    # Hard time limits (off by default): calls, their retries and backoff are
+    # cut short, and the run returns its best answer so far (the last
+    # revision, proposal or candidate) with a "deadline" stop entry. Only a
+    # run that has no answer yet raises DeadlineExceeded.
+    deadline_s: Optional[float] = None  # the whole run
+    call_deadline_s: Optional[float] = None  # each call, retries included
+    # Tournament mode: N candidates drafted concurrently, reviewed concurrently,
+    # then judged in brackets until one answer is left (iterations is unused)
+    candidates: int = 4
+    candidate_temperature_step: float = 0.1  # candidate k samples at temperature + k * step
+    bracket_size: Optional[int] = None  # candidates per judge call; None judges all at once
+    review_candidates: bool = True
+    # Per-role model/sampling overrides keyed by stages.STAGE_ROLES, e.g. a
+    # small model for critique and a large one for revision and synthesis
+    stages: Dict[str, StageSettings] = field(default_factory=dict)
+
+
+def _stop_criteria_enabled(cfg: EngineConfig) -> bool:
+    return (
+        cfg.stop_similarity is not None
+        or cfg.stop_on_no_issues
+        or cfg.max_total_tokens is not None
+        or cfg.max_seconds is not None
+        or cfg.deadline_s is not None
+        or cfg.call_deadline_s is not None
+    )
+
 
+class _Deadline:
+    # time.monotonic() deadlines for the calls of one run
+    def __init__(self, cfg: EngineConfig):
+        self.run_until = time.monotonic() + cfg.deadline_s if cfg.deadline_s is not None else None
+        self.call_s = cfg.call_deadline_s
 
-TranscriptEntry = Dict[str, Any]
+    @classmethod
+    def start(cls, cfg: EngineConfig) -> Optional["_Deadline"]:
+        if cfg.deadline_s is None and cfg.call_deadline_s is None:
+            return None
+        return cls(cfg)
+
+    def for_call(self) -> float:
+        now = time.monotonic()
+        if self.run_until is not None and now >= self.run_until:
+            raise DeadlineExceeded("Run deadline exceeded")
+        if self.call_s is None:
+            return self.run_until
+        return now + self.call_s if self.run_until is None else min(self.run_until, now + self.call_s)
+
+
+def _gathered(outcomes: List[Union[ChatResponse, BaseException]]) -> List[ChatResponse]:
+    # Raises the first failure of a fan-out; when only deadlines were missed,
+    # the DeadlineExceeded carries the responses that did arrive
+    errors = [o for o in outcomes if isinstance(o, BaseException)]
+    if not errors:
+        return outcomes
+    for e in errors:
+        if not isinstance(e, DeadlineExceeded):
+            raise e
+    raise DeadlineExceeded(str(errors[0]), responses=[None if isinstance(o, BaseException) else o for o in outcomes])
 
 
 def _ts() -> str:
@@ -43,7 +145,7 @@ def _ts() -> str:
 
 
 def _append_transcript(
-    transcript: List[TranscriptEntry],
+    transcript: Union[List[TranscriptEntry], TranscriptSink],
     role: str,
     content: str,
     model: str,
@@ -51,7 +153,12 @@ def _append_transcript(
     *,
     stage: Optional[str] = None,
     bucket: Optional[str] = None,
+    call: Optional[Dict[str, Any]] = None,
 ) -> None:
+    if type(transcript) is CompactTranscript:
+        # No dict and no timestamp formatting until the transcript is read
+        transcript.add(role, content, model, iteration, stage=stage, bucket=bucket, call=call)
+        return
     entry: TranscriptEntry = {
         "ts": _ts(),
         "role": role,
@@ -63,118 +170,734 @@ def _append_transcript(
         entry["stage"] = stage
     if bucket is not None:
         entry["bucket"] = bucket  # "improved" or "old"
+    if call is not None:
+        entry["call"] = call
     transcript.append(entry)
 
 
-def write_transcript_jsonl(transcript: List[TranscriptEntry], path: str) -> None:
-    with open(path, "w", encoding="utf-8") as f:
-        for entry in transcript:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+# The transcript is a plain list unless the caller passed a sink, which is then
+# returned as-is (entries were already written to it as they were produced).
+# sink=CompactTranscript() keeps a long run's transcript in memory compactly.
+RunResult = Tuple[str, Union[List[TranscriptEntry], TranscriptSink]]
+# A dialogue flow yields the next ChatRequest, is sent back the ChatResponse and
+# finally returns the run result. Sync and async engines only differ in how they
+# drive it, so critic/debate semantics live in one place. A flow may also yield
+# a list of independent requests; the driver sends them concurrently and sends
+# back the responses in the same order.
+Flow = Generator[
+    Union[ChatRequest, List[ChatRequest]],
+    Union[ChatResponse, List[ChatResponse]],
+    RunResult,
+]
 
 
-def write_transcript_split_json(transcript: List[TranscriptEntry], path: str) -> None:
-    buckets = {"improved": [], "old": [], "other": []}
-    for entry in transcript:
-        bucket = entry.get("bucket")
-        if bucket == "improved":
-            buckets["improved"].append(entry)
-        elif bucket == "old":
-            buckets["old"].append(entry)
-        else:
-            buckets["other"].append(entry)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(buckets, f, ensure_ascii=False, indent=2)
+class _BaseEngine:
+    def __init__(
+        self,
+        *,
+        quiet: bool = False,
+        metrics_sink=None,
+        profiler: Optional[Profiler] = None,
+        hooks: Optional[Sequence[CallHook]] = None,
+    ):
+        self.quiet = quiet
+        # Optional JsonlMetricsSink / PrometheusMetricsSink (see metrics.py)
+        self.metrics_sink = metrics_sink
+        # Times engine, console and transcript work; give the client the same
+        # profiler to split up the calls themselves (see profiling.py)
+        self.profiler = profiler
+        # before_call/after_call around every chat call, e.g. for tracing
+        self.hooks: List[CallHook] = list(hooks or [])
 
+    def _phase(self, name: str):
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
 
-class SelfTalkEngine:
-    def __init__(self, client: Optional[MistralClient] = None):
-        self.client = client or MistralClient()
+    def _profiled_sink(self, sink: Optional[TranscriptSink]):
+        if self.profiler is None:
+            return sink
+        return _ProfiledSink(sink if sink is not None else [], self.profiler)
+
+    def _before_call(self, request: ChatRequest) -> float:
+        for hook in self.hooks:
+            hook.before_call(request)
+        return time.perf_counter()
+
+    def _after_call(
+        self, request: ChatRequest, resp: Optional[ChatResponse], error: Optional[BaseException], started: float
+    ) -> None:
+        elapsed = time.perf_counter() - started
+        for hook in self.hooks:
+            hook.after_call(request, resp, error, elapsed)
+
+    @staticmethod
+    def _chat_kwargs(on_token, deadline: Optional[_Deadline]) -> Dict[str, Any]:
+        # Only what is set, so clients without streaming or deadlines still work
+        kwargs: Dict[str, Any] = {}
+        if on_token is not None:
+            kwargs["on_token"] = on_token
+        if deadline is not None:
+            kwargs["deadline"] = deadline.for_call()
+        return kwargs
+
+    def _flow(self, cfg: EngineConfig, sink: Optional[TranscriptSink] = None) -> Flow:
+        return self._summarized(cfg, self._mode_flow(cfg, self._profiled_sink(sink)))
 
-    def run(self, cfg: EngineConfig) -> Tuple[str, List[TranscriptEntry]]:
+    def _resume_flow(
+        self,
+        cfg: EngineConfig,
+        recorded: List[TranscriptEntry],
+        sink: Optional[TranscriptSink] = None,
+    ) -> Flow:
+        sink = self._profiled_sink(sink)
+        replay = ReplaySink(sink if sink is not None else [], recorded)
+        return self._summarized(cfg, self._replayed(self._mode_flow(cfg, replay), replay))
+
+    def _mode_flow(self, cfg: EngineConfig, sink) -> Flow:
+        if cfg.context not in CONTEXT_STRATEGIES:
+            raise ValueError(f"Unknown context strategy: {cfg.context}")
+        if cfg.stop_similarity is not None and not 0.0 <= cfg.stop_similarity <= 1.0:
+            raise ValueError("stop_similarity must be between 0 and 1")
+        unknown = set(cfg.stages) - set(STAGE_ROLES)
+        if unknown:
+            raise ValueError(f"Unknown stage roles: {', '.join(sorted(unknown))}")
         mode = cfg.mode.lower()
         if mode == "critic":
-            return self._run_critic(cfg)
+            return self._critic_flow(cfg, sink)
         elif mode == "debate":
-            return self._run_debate(cfg)
+            return self._debate_flow(cfg, sink)
+        elif mode == "tournament":
+            return self._tournament_flow(cfg, sink)
         else:
             raise ValueError(f"Unknown mode: {cfg.mode}")
 
-    def _chat(self, messages: List[Message], cfg: EngineConfig) -> str:
-        req = ChatRequest(
+    @staticmethod
+    def _replayed(flow: Flow, replay: ReplaySink) -> Flow:
+        # Answers requests from the recorded transcript while it lasts; only
+        # requests past the recorded point reach the driver (and the API).
+        try:
+            request = next(flow)
+            while True:
+                if isinstance(request, list):
+                    resp = replay.pending_responses(len(request))
+                else:
+                    resp = replay.pending_response()
+                if resp is None:
+                    try:
+                        resp = yield request
+                    except DeadlineExceeded as e:
+                        request = flow.throw(e)
+                        continue
+                request = flow.send(resp)
+        except StopIteration as stop:
+            replay.finish()
+            final_answer, _ = stop.value
+            return final_answer, replay.target
+
+    def _summarized(self, cfg: EngineConfig, flow: Flow) -> Flow:
+        final_answer, transcript = yield from flow
+        if isinstance(transcript, _ProfiledSink):
+            transcript = transcript.target
+        if self.metrics_sink is not None:
+            labels = {"mode": cfg.mode.lower(), "model": cfg.model}
+            self.metrics_sink.record_run(labels, summarize_transcript(transcript))
+        return final_answer, transcript
+
+    def _rule(self, title: str) -> None:
+        if not self.quiet:
+            with self._phase("console"):
+                get_console().rule(title)
+
+    def _track(self, sequence: Sequence[int], description: str, cfg: EngineConfig):
+        # A progress bar would fight with live token output for the terminal
+        if self.quiet or cfg.stream:
+            return sequence
+        from rich.progress import track
+
+        return track(sequence, description=description, console=get_console())
+
+    @staticmethod
+    def _stage_cfg(cfg: EngineConfig, role: str) -> EngineConfig:
+        # The config a role's calls are made with; see stages.STAGE_ROLES
+        changes = stage_overrides(cfg.stages, role)
+        return replace(cfg, **changes) if changes else cfg
+
+    @staticmethod
+    def _build_request(messages: List[Message], cfg: EngineConfig) -> ChatRequest:
+        return ChatRequest(
             model=cfg.model,
             messages=messages,
             temperature=cfg.temperature,
             max_tokens=cfg.max_tokens,
             top_p=cfg.top_p,
             random_seed=cfg.random_seed,
+            stream=cfg.stream,
+        )
+
+    def _request(self, messages: List[Message], cfg: EngineConfig, *, pinned: int, anchor: int) -> ChatRequest:
+        context = select_context(
+            messages,
+            cfg.context,
+            pinned=pinned,
+            anchor=anchor,
+            window=cfg.context_window,
+            budget_tokens=cfg.context_budget_tokens,
         )
-        resp = self.client.chat(req)
-        return resp.first_message_content()
+        return self._build_request(context, cfg)
 
-    def _run_critic(self, cfg: EngineConfig) -> Tuple[str, List[TranscriptEntry]]:
+    def _call_record(
+        self,
+        cfg: EngineConfig,
+        stage: str,
+        request: ChatRequest,
+        resp: ChatResponse,
+        messages: List[Message],
+    ) -> Dict[str, Any]:
+        record: Dict[str, Any] = resp.stats.model_dump(exclude_none=True) if resp.stats else {}
+        record.update(usage_fields(resp.usage))
+        if resp.choices and resp.choices[0].finish_reason is not None:
+            record["finish_reason"] = resp.choices[0].finish_reason
+        record["prompt_messages"] = len(request.messages)
+        record["prompt_tokens_est"] = estimate_tokens(request.messages)
+        # What the "full" strategy would have sent, to show the savings
+        record["history_tokens_est"] = estimate_tokens(messages)
+        if self.metrics_sink is not None and not (resp.stats and resp.stats.replayed):
+            labels = {"mode": cfg.mode.lower(), "model": request.model, "stage": stage}
+            self.metrics_sink.record_call(labels, record)
+        return record
+
+    def _token_printer(self, request: ChatRequest):
+        if self.quiet or not request.stream:
+            return None
+
+        def _print(token: str) -> None:
+            with self._phase("console"):
+                get_console().print(token, end="", markup=False, highlight=False, soft_wrap=True)
+
+        return _print
+
+    def _critic_flow(self, cfg: EngineConfig, sink: Optional[TranscriptSink] = None) -> Flow:
         messages = build_initial_messages(cfg.system_prompt, cfg.user_goal)
-        transcript: List[TranscriptEntry] = []
+        pinned = len(messages)
+        transcript = sink if sink is not None else []
         for m in messages:
             _append_transcript(transcript, m.role, m.content, cfg.model, iteration=None, stage="init", bucket="old")
+        budget = RunBudget(cfg.max_total_tokens, cfg.max_seconds)
+        draft_cfg, critic_cfg, revise_cfg = (self._stage_cfg(cfg, role) for role in ("draft", "critic", "revise"))
 
-        console.rule("Solver: initial draft")
-        draft = self._chat(messages, cfg)
+        self._rule("Solver: initial draft")
+        request = self._request(messages, draft_cfg, pinned=pinned, anchor=pinned)
+        resp = yield request
+        draft = resp.first_message_content()
+        call = self._call_record(cfg, "draft", request, resp, messages)
+        budget.add(call, draft)
+        # Index of the latest answer; "latest" context starts here
+        anchor = len(messages)
+        answer = draft
         messages.append(Message(role="assistant", content=draft))
-        _append_transcript(transcript, "assistant", draft, cfg.model, iteration=0, stage="draft", bucket="old")
+        _append_transcript(transcript, "assistant", draft, draft_cfg.model, iteration=0, stage="draft", bucket="old", call=call)
+
+        # Built once: every round's message and transcript entry share the string
+        critic_prompt = "Critic: " + CRITIC_INSTRUCTION
+        if cfg.stop_on_no_issues:
+            critic_prompt += " " + NO_ISSUES_HINT
+        revise_prompt = "Reviser: " + REVISE_INSTRUCTION
 
-        for i in track(range(1, cfg.iterations + 1), description="Critique and revise"):
-            console.rule(f"Critic: feedback round {i}")
-            critic_prompt = (
-                "Critic: " + CRITIC_INSTRUCTION
-            )
+        stop_reason = STOP_MAX_ITERATIONS
+        i = 0
+        for i in self._track(range(1, cfg.iterations + 1), description="Critique and revise", cfg=cfg):
+            exceeded = budget.exceeded()
+            if exceeded:
+                stop_reason = exceeded
+                break
+
+            self._rule(f"Critic: feedback round {i}")
             messages.append(Message(role="user", content=critic_prompt))
-            _append_transcript(transcript, "user", critic_prompt, cfg.model, iteration=i, stage="critic_prompt", bucket="old")
-            critic_feedback = self._chat(messages, cfg)
+            _append_transcript(transcript, "user", critic_prompt, critic_cfg.model, iteration=i, stage="critic_prompt", bucket="old")
+            request = self._request(messages, critic_cfg, pinned=pinned, anchor=anchor)
+            try:
+                resp = yield request
+            except DeadlineExceeded:
+                stop_reason = STOP_DEADLINE
+                break
+            critic_feedback = resp.first_message_content()
+            call = self._call_record(cfg, "critic_feedback", request, resp, messages)
+            budget.add(call, critic_feedback)
             messages.append(Message(role="assistant", content=critic_feedback))
-            _append_transcript(transcript, "assistant", critic_feedback, cfg.model, iteration=i, stage="critic_feedback", bucket="old")
+            _append_transcript(transcript, "assistant", critic_feedback, critic_cfg.model, iteration=i, stage="critic_feedback", bucket="old", call=call)
+            if cfg.stop_on_no_issues and signals_no_issues(critic_feedback):
+                stop_reason = STOP_NO_ISSUES
+                break
 
-            console.rule(f"Solver: revision round {i}")
-            revise_prompt = (
-                "Reviser: " + REVISE_INSTRUCTION
-            )
+            self._rule(f"Solver: revision round {i}")
             messages.append(Message(role="user", content=revise_prompt))
-            _append_transcript(transcript, "user", revise_prompt, cfg.model, iteration=i, stage="revise_prompt", bucket="old")
-            revised = self._chat(messages, cfg)
+            _append_transcript(transcript, "user", revise_prompt, revise_cfg.model, iteration=i, stage="revise_prompt", bucket="old")
+            request = self._request(messages, revise_cfg, pinned=pinned, anchor=anchor)
+            try:
+                resp = yield request
+            except DeadlineExceeded:
+                stop_reason = STOP_DEADLINE
+                break
+            revised = resp.first_message_content()
+            call = self._call_record(cfg, "revision", request, resp, messages)
+            budget.add(call, revised)
+            anchor = len(messages)
             messages.append(Message(role="assistant", content=revised))
-            _append_transcript(transcript, "assistant", revised, cfg.model, iteration=i, stage="revision", bucket="improved")
+            _append_transcript(transcript, "assistant", revised, revise_cfg.model, iteration=i, stage="revision", bucket="improved", call=call)
+            previous, answer = answer, revised
+            if cfg.stop_similarity is not None and similarity(previous, revised) >= cfg.stop_similarity:
+                stop_reason = STOP_CONVERGED
+                break
 
-        final_answer = messages[-1].content if messages else ""
-        return final_answer, transcript
+        if _stop_criteria_enabled(cfg):
+            _append_transcript(transcript, "engine", stop_reason, cfg.model, iteration=i, stage="stop")
+        return answer, transcript
 
-    def _run_debate(self, cfg: EngineConfig) -> Tuple[str, List[TranscriptEntry]]:
+    def _debate_flow(self, cfg: EngineConfig, sink: Optional[TranscriptSink] = None) -> Flow:
         messages = build_initial_messages(cfg.system_prompt, cfg.user_goal)
-        transcript: List[TranscriptEntry] = []
+        pinned = len(messages)
+        transcript = sink if sink is not None else []
         for m in messages:
             _append_transcript(transcript, m.role, m.content, cfg.model, iteration=None, stage="init", bucket="old")
+        budget = RunBudget(cfg.max_total_tokens, cfg.max_seconds)
+        pro_cfg, con_cfg, judge_cfg = (self._stage_cfg(cfg, role) for role in ("pro", "con", "judge"))
+
+        # "latest" context for Pro is the previous round's proposal and critique;
+        # Con and the judge see the current round.
+        prev_round = pinned
+        proposal: Optional[str] = None
+        pro_prompt = "Agent(Pro): " + DEBATE_PRO_INSTRUCTION
+        con_prompt = "Agent(Con): " + DEBATE_CON_INSTRUCTION
+        if cfg.stop_on_no_issues:
+            con_prompt += " " + NO_ISSUES_HINT
+        stop_reason = STOP_MAX_ITERATIONS
+        last_round = 0
+        for i in self._track(range(1, cfg.iterations + 1), description="Pro/Con debate", cfg=cfg):
+            exceeded = budget.exceeded()
+            if exceeded:
+                stop_reason = exceeded
+                break
+            round_start = len(messages)
+            last_round = i
 
-        for i in track(range(1, cfg.iterations + 1), description="Pro/Con debate"):
             # Pro argues
-            pro_prompt = "Agent(Pro): " + DEBATE_PRO_INSTRUCTION
+            self._rule(f"Agent Pro: round {i}")
             messages.append(Message(role="user", content=pro_prompt))
-            _append_transcript(transcript, "user", pro_prompt, cfg.model, iteration=i, stage="pro_prompt", bucket="old")
-            pro_msg = self._chat(messages, cfg)
+            _append_transcript(transcript, "user", pro_prompt, pro_cfg.model, iteration=i, stage="pro_prompt", bucket="old")
+            request = self._request(messages, pro_cfg, pinned=pinned, anchor=prev_round)
+            try:
+                resp = yield request
+            except DeadlineExceeded:
+                if proposal is None:
+                    raise
+                stop_reason = STOP_DEADLINE
+                break
+            pro_msg = resp.first_message_content()
+            call = self._call_record(cfg, "pro", request, resp, messages)
+            budget.add(call, pro_msg)
             messages.append(Message(role="assistant", content=pro_msg))
-            _append_transcript(transcript, "assistant", pro_msg, cfg.model, iteration=i, stage="pro", bucket="old")
+            _append_transcript(transcript, "assistant", pro_msg, pro_cfg.model, iteration=i, stage="pro", bucket="old", call=call)
+            if cfg.stop_similarity is not None and proposal is not None and similarity(proposal, pro_msg) >= cfg.stop_similarity:
+                # Pro restated its last proposal; another Con turn adds nothing new
+                prev_round = round_start
+                stop_reason = STOP_CONVERGED
+                break
+            proposal = pro_msg
 
             # Con responds
-            con_prompt = "Agent(Con): " + DEBATE_CON_INSTRUCTION
+            self._rule(f"Agent Con: round {i}")
             messages.append(Message(role="user", content=con_prompt))
-            _append_transcript(transcript, "user", con_prompt, cfg.model, iteration=i, stage="con_prompt", bucket="old")
-            con_msg = self._chat(messages, cfg)
+            _append_transcript(transcript, "user", con_prompt, con_cfg.model, iteration=i, stage="con_prompt", bucket="old")
+            request = self._request(messages, con_cfg, pinned=pinned, anchor=round_start)
+            try:
+                resp = yield request
+            except DeadlineExceeded:
+                stop_reason = STOP_DEADLINE
+                break
+            con_msg = resp.first_message_content()
+            call = self._call_record(cfg, "con", request, resp, messages)
+            budget.add(call, con_msg)
             messages.append(Message(role="assistant", content=con_msg))
-            _append_transcript(transcript, "assistant", con_msg, cfg.model, iteration=i, stage="con", bucket="old")
+            _append_transcript(transcript, "assistant", con_msg, con_cfg.model, iteration=i, stage="con", bucket="old", call=call)
+            prev_round = round_start
+            if cfg.stop_on_no_issues and signals_no_issues(con_msg):
+                stop_reason = STOP_NO_ISSUES
+                break
+
+        if stop_reason == STOP_DEADLINE:
+            # No time left for a synthesis; the latest proposal stands
+            _append_transcript(transcript, "engine", stop_reason, cfg.model, iteration=last_round, stage="stop")
+            return proposal, transcript
 
-        # Final synthesis
+        # Final synthesis. The stop entry is written once the judge has
+        # answered or run out of time, so the transcript gets exactly one
+        # either way (and a resumed run replays the recorded answer).
+        self._rule("Judge: final synthesis")
         final_prompt = "Judge: " + DEBATE_FINAL_INSTRUCTION
         messages.append(Message(role="user", content=final_prompt))
-        _append_transcript(transcript, "user", final_prompt, cfg.model, iteration=cfg.iterations, stage="judge_prompt", bucket="old")
-        final_answer = self._chat(messages, cfg)
+        _append_transcript(transcript, "user", final_prompt, judge_cfg.model, iteration=last_round, stage="judge_prompt", bucket="old")
+        request = self._request(messages, judge_cfg, pinned=pinned, anchor=prev_round)
+        try:
+            resp = yield request
+        except DeadlineExceeded:
+            _append_transcript(transcript, "engine", STOP_DEADLINE, cfg.model, iteration=last_round, stage="stop")
+            return proposal, transcript
+        final_answer = resp.first_message_content()
+        call = self._call_record(cfg, "final", request, resp, messages)
         messages.append(Message(role="assistant", content=final_answer))
-        _append_transcript(transcript, "assistant", final_answer, cfg.model, iteration=cfg.iterations, stage="final", bucket="improved")
+        _append_transcript(transcript, "assistant", final_answer, judge_cfg.model, iteration=last_round, stage="final", bucket="improved", call=call)
+        if _stop_criteria_enabled(cfg):
+            _append_transcript(transcript, "engine", stop_reason, cfg.model, iteration=last_round, stage="stop")
 
         return final_answer, transcript
+
+    @staticmethod
+    def _candidate_cfg(cfg: EngineConfig, k: int) -> EngineConfig:
+        # Spread candidates over seeds and temperatures so they actually differ.
+        # The spread stops at the API's maximum but never goes below the
+        # configured temperature itself.
+        seed = cfg.random_seed + k if cfg.random_seed is not None else None
+        ceiling = max(MAX_TEMPERATURE, cfg.temperature)
+        temperature = min(ceiling, max(0.0, cfg.temperature + k * cfg.candidate_temperature_step))
+        return replace(cfg, temperature=temperature, random_seed=seed)
+
+    def _tournament_flow(self, cfg: EngineConfig, sink: Optional[TranscriptSink] = None) -> Flow:
+        if cfg.candidates < 1:
+            raise ValueError("candidates must be >= 1")
+        if cfg.bracket_size is not None and cfg.bracket_size < 2:
+            raise ValueError("bracket_size must be >= 2")
+        messages = build_initial_messages(cfg.system_prompt, cfg.user_goal)
+        pinned = len(messages)
+        transcript = sink if sink is not None else []
+        for m in messages:
+            _append_transcript(transcript, m.role, m.content, cfg.model, iteration=None, stage="init", bucket="old")
+        budget = RunBudget(cfg.max_total_tokens, cfg.max_seconds)
+        draft_cfg, critic_cfg, judge_cfg = (self._stage_cfg(cfg, role) for role in ("draft", "critic", "judge"))
+
+        # Every stage is one concurrent fan-out, so wall time grows with the
+        # depth of the bracket rather than the number of calls.
+        self._rule(f"Tournament: {cfg.candidates} candidates")
+        requests = [
+            self._request(messages, self._candidate_cfg(draft_cfg, k), pinned=pinned, anchor=pinned)
+            for k in range(cfg.candidates)
+        ]
+        deadline_hit = False
+        try:
+            resps = yield requests
+        except DeadlineExceeded as e:
+            # Keep the candidates that made it in time
+            resps = e.responses or [None] * len(requests)
+            if not any(resps):
+                raise
+            deadline_hit = True
+        candidates: List[str] = []
+        for request, resp in zip(requests, resps):
+            if resp is None:
+                continue
+            content = resp.first_message_content()
+            call = self._call_record(cfg, "candidate", request, resp, messages)
+            budget.add(call, content)
+            _append_transcript(transcript, "assistant", content, draft_cfg.model, iteration=0, stage="candidate", bucket="old", call=call)
+            candidates.append(content)
+        reviews: List[Optional[str]] = [None] * len(candidates)
+        if deadline_hit:
+            _append_transcript(transcript, "engine", STOP_DEADLINE, cfg.model, iteration=0, stage="stop")
+            return candidates[0], transcript
+
+        stop_reason = STOP_MAX_ITERATIONS
+        if len(candidates) == 1:
+            # Nothing to compare
+            if _stop_criteria_enabled(cfg):
+                _append_transcript(transcript, "engine", stop_reason, cfg.model, iteration=0, stage="stop")
+            return candidates[0], transcript
+        if cfg.stop_similarity is not None and all(
+            similarity(candidates[0], c) >= cfg.stop_similarity for c in candidates[1:]
+        ):
+            # The candidates agree; judging them would only restate the first
+            _append_transcript(transcript, "engine", STOP_CONVERGED, cfg.model, iteration=0, stage="stop")
+            return candidates[0], transcript
+
+        if cfg.review_candidates:
+            exceeded = budget.exceeded()
+            if exceeded:
+                stop_reason = exceeded
+            else:
+                self._rule("Critic: reviewing candidates")
+                review_messages = [
+                    messages
+                    + [Message(role="assistant", content=c), Message(role="user", content="Critic: " + CRITIC_INSTRUCTION)]
+                    for c in candidates
+                ]
+                requests = [self._request(m, critic_cfg, pinned=pinned, anchor=pinned) for m in review_messages]
+                try:
+                    resps = yield requests
+                except DeadlineExceeded:
+                    _append_transcript(transcript, "engine", STOP_DEADLINE, cfg.model, iteration=0, stage="stop")
+                    return candidates[0], transcript
+                for k, (request, resp) in enumerate(zip(requests, resps)):
+                    reviews[k] = resp.first_message_content()
+                    call = self._call_record(cfg, "review", request, resp, review_messages[k])
+                    budget.add(call, reviews[k])
+                    _append_transcript(transcript, "assistant", reviews[k], critic_cfg.model, iteration=0, stage="review", bucket="old", call=call)
+
+        # Elimination rounds: each bracket's judge picks or merges a winner,
+        # which advances without its review. Once a budget is exhausted the
+        # remaining entrants go to a single final judge call.
+        entrants = list(zip(candidates, reviews))
+        round_no = 0
+        while True:
+            round_no += 1
+            if stop_reason == STOP_MAX_ITERATIONS:
+                exceeded = budget.exceeded()
+                if exceeded:
+                    stop_reason = exceeded
+            size = cfg.bracket_size if cfg.bracket_size and stop_reason == STOP_MAX_ITERATIONS else len(entrants)
+            brackets = [entrants[b : b + size] for b in range(0, len(entrants), size)]
+            final_round = len(brackets) == 1
+            stage = "final" if final_round else "judge"
+
+            self._rule("Judge: final pick" if final_round else f"Judge: bracket round {round_no}")
+            judged = [bracket for bracket in brackets if len(bracket) > 1]
+            judge_messages = []
+            for bracket in judged:
+                prompt = build_judge_prompt([c for c, _ in bracket], [r for _, r in bracket])
+                judge_messages.append(messages + [Message(role="user", content=prompt)])
+                _append_transcript(transcript, "user", prompt, judge_cfg.model, iteration=round_no, stage="judge_prompt", bucket="old")
+            requests = [self._request(m, judge_cfg, pinned=pinned, anchor=pinned) for m in judge_messages]
+            try:
+                resps = yield requests
+            except DeadlineExceeded as e:
+                resps = e.responses or [None] * len(requests)
+                deadline_hit = True
+            winners = []
+            for request, resp, m in zip(requests, resps, judge_messages):
+                if resp is None:
+                    continue
+                content = resp.first_message_content()
+                call = self._call_record(cfg, stage, request, resp, m)
+                budget.add(call, content)
+                bucket = "improved" if final_round else "old"
+                _append_transcript(transcript, "assistant", content, judge_cfg.model, iteration=round_no, stage=stage, bucket=bucket, call=call)
+                winners.append(content)
+            if deadline_hit:
+                # A judged winner that made it in time, else the first entrant
+                _append_transcript(transcript, "engine", STOP_DEADLINE, cfg.model, iteration=round_no, stage="stop")
+                return (winners[0] if winners else entrants[0][0]), transcript
+            if final_round:
+                # Written after the final judge call, so a deadline there does
+                # not add a second stop entry
+                if _stop_criteria_enabled(cfg):
+                    _append_transcript(transcript, "engine", stop_reason, cfg.model, iteration=round_no, stage="stop")
+                return winners[0], transcript
+            # A leftover single entrant gets a bye into the next round
+            judged_winners = iter(winners)
+            entrants = [bracket[0] if len(bracket) == 1 else (next(judged_winners), None) for bracket in brackets]
+
+
+class SelfTalkEngine(_BaseEngine):
+    def __init__(
+        self,
+        client: Optional[MistralClient] = None,
+        *,
+        quiet: bool = False,
+        metrics_sink=None,
+        profiler: Optional[Profiler] = None,
+        hooks: Optional[Sequence[CallHook]] = None,
+    ):
+        super().__init__(quiet=quiet, metrics_sink=metrics_sink, profiler=profiler, hooks=hooks)
+        self._owns_client = client is None
+        self.client = client or MistralClient()
+
+    def __enter__(self) -> "SelfTalkEngine":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_client:
+            self.client.close()
+
+    def run(self, cfg: EngineConfig, *, sink: Optional[TranscriptSink] = None) -> RunResult:
+        return self._drive(self._flow(cfg, sink), _Deadline.start(cfg))
+
+    def resume(
+        self,
+        cfg: EngineConfig,
+        recorded: List[TranscriptEntry],
+        *,
+        sink: Optional[TranscriptSink] = None,
+    ) -> RunResult:
+        # Rebuilds the conversation from a (possibly interrupted) transcript and
+        # continues it; raise cfg.iterations to extend a finished run.
+        return self._drive(self._resume_flow(cfg, recorded, sink), _Deadline.start(cfg))
+
+    def _drive(self, flow: Flow, deadline: Optional[_Deadline] = None) -> RunResult:
+        try:
+            with self._phase("engine"):
+                request = next(flow)
+            while True:
+                try:
+                    if isinstance(request, list):
+                        resps = self._call_many(request, deadline)
+                    else:
+                        resps = self._call(request, deadline)
+                except DeadlineExceeded as e:
+                    # The flow decides what its best answer so far is
+                    with self._phase("engine"):
+                        request = flow.throw(e)
+                    continue
+                with self._phase("engine"):
+                    request = flow.send(resps)
+        except StopIteration as stop:
+            return stop.value
+
+    def _call_many(self, requests: List[ChatRequest], deadline: Optional[_Deadline] = None) -> List[ChatResponse]:
+        # Fanned-out calls run on threads and never print tokens live, as
+        # their output would interleave
+        if len(requests) <= 1:
+            return [self._chat(request, None, deadline) for request in requests]
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            if deadline is None:
+                return list(pool.map(self._chat, requests))
+            futures = [pool.submit(self._chat, request, None, deadline) for request in requests]
+            return _gathered([f.exception() or f.result() for f in futures])
+
+    def _call(self, request: ChatRequest, deadline: Optional[_Deadline] = None) -> ChatResponse:
+        on_token = self._token_printer(request)
+        if on_token is None:
+            return self._chat(request, None, deadline)
+        resp = self._chat(request, on_token, deadline)
+        with self._phase("console"):
+            get_console().print()
+        return resp
+
+    def _chat(self, request: ChatRequest, on_token=None, deadline: Optional[_Deadline] = None) -> ChatResponse:
+        if not self.hooks and self.profiler is None:
+            return self.client.chat(request, **self._chat_kwargs(on_token, deadline))
+        started = self._before_call(request)
+        resp: Optional[ChatResponse] = None
+        error: Optional[BaseException] = None
+        try:
+            with self._phase("client"):
+                resp = self.client.chat(request, **self._chat_kwargs(on_token, deadline))
+            return resp
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._after_call(request, resp, error, started)
+
+    def _run_critic(self, cfg: EngineConfig) -> RunResult:
+        return self._drive(self._summarized(cfg, self._critic_flow(cfg)))
+
+    def _run_debate(self, cfg: EngineConfig) -> RunResult:
+        return self._drive(self._summarized(cfg, self._debate_flow(cfg)))
+
+
+class AsyncSelfTalkEngine(_BaseEngine):
+    # Progress bars and rules are off by default: with many runs in flight their
+    # output would interleave, and rich only allows one live display at a time.
+    def __init__(
+        self,
+        client: Optional[AsyncMistralClient] = None,
+        *,
+        concurrency: int = 8,
+        quiet: bool = True,
+        metrics_sink=None,
+        profiler: Optional[Profiler] = None,
+        hooks: Optional[Sequence[CallHook]] = None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be >= 1")
+        super().__init__(quiet=quiet, metrics_sink=metrics_sink, profiler=profiler, hooks=hooks)
+        self._owns_client = client is None
+        self.client = client or AsyncMistralClient()
+        self.concurrency = concurrency
+
+    async def __aenter__(self) -> "AsyncSelfTalkEngine":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def run(self, cfg: EngineConfig, *, sink: Optional[TranscriptSink] = None) -> RunResult:
+        return await self._drive(self._flow(cfg, sink), _Deadline.start(cfg))
+
+    async def resume(
+        self,
+        cfg: EngineConfig,
+        recorded: List[TranscriptEntry],
+        *,
+        sink: Optional[TranscriptSink] = None,
+    ) -> RunResult:
+        return await self._drive(self._resume_flow(cfg, recorded, sink), _Deadline.start(cfg))
+
+    async def run_many(
+        self,
+        cfgs: Sequence[EngineConfig],
+        *,
+        concurrency: Optional[int] = None,
+        return_exceptions: bool = False,
+    ) -> List[Union[RunResult, BaseException]]:
+        # Results come back in the order of ``cfgs`` regardless of completion order.
+        limit = asyncio.Semaphore(concurrency or self.concurrency)
+
+        async def _one(cfg: EngineConfig) -> RunResult:
+            async with limit:
+                return await self.run(cfg)
+
+        return await asyncio.gather(*(_one(cfg) for cfg in cfgs), return_exceptions=return_exceptions)
+
+    async def _drive(self, flow: Flow, deadline: Optional[_Deadline] = None) -> RunResult:
+        try:
+            with self._phase("engine"):
+                request = next(flow)
+            while True:
+                try:
+                    if isinstance(request, list):
+                        resps = await self._call_many(request, deadline)
+                    else:
+                        resps = await self._call(request, deadline)
+                except DeadlineExceeded as e:
+                    with self._phase("engine"):
+                        request = flow.throw(e)
+                    continue
+                with self._phase("engine"):
+                    request = flow.send(resps)
+        except StopIteration as stop:
+            return stop.value
+
+    async def _call_many(self, requests: List[ChatRequest], deadline: Optional[_Deadline] = None) -> List[ChatResponse]:
+        calls = (self._chat(request, None, deadline) for request in requests)
+        if deadline is None:
+            return list(await asyncio.gather(*calls))
+        return _gathered(list(await asyncio.gather(*calls, return_exceptions=True)))
+
+    async def _call(self, request: ChatRequest, deadline: Optional[_Deadline] = None) -> ChatResponse:
+        on_token = self._token_printer(request)
+        if on_token is None:
+            return await self._chat(request, None, deadline)
+        resp = await self._chat(request, on_token, deadline)
+        with self._phase("console"):
+            get_console().print()
+        return resp
+
+    async def _chat(self, request: ChatRequest, on_token=None, deadline: Optional[_Deadline] = None) -> ChatResponse:
+        if not self.hooks and self.profiler is None:
+            return await self.client.chat(request, **self._chat_kwargs(on_token, deadline))
+        started = self._before_call(request)
+        resp: Optional[ChatResponse] = None
+        error: Optional[BaseException] = None
+        try:
+            with self._phase("client"):
+                resp = await self.client.chat(request, **self._chat_kwargs(on_token, deadline))
+            return resp
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._after_call(request, resp, error, started)
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+# Kept free of heavy imports (httpx, pydantic) so the CLI can report a missing
+# key without loading the client.
+
+API_KEY_ENV = "MISTRAL_API_KEY"
+
+
+class MistralAPIError(Exception):
+    pass
+
+
+class MissingAPIKeyError(MistralAPIError):
+    def __init__(self, message: str = f"{API_KEY_ENV} is not set. Please set it in your environment or a .env file."):
+        super().__init__(message)
+
+
+class DeadlineExceeded(MistralAPIError):
+    # A call ran out of time: its own deadline or what was left of the run's
+    # (EngineConfig.call_deadline_s / deadline_s). For fanned-out calls,
+    # responses holds what did arrive, with None for the rest.
+    def __init__(self, message: str = "deadline exceeded", responses=None):
+        super().__init__(message)
+        self.responses = responses
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# A local stand-in for the Mistral chat completions endpoint, for benchmarks
+# and end-to-end tests that should exercise the real HTTP client (retries,
+# streaming, validation) without network access or an API key.
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+_FILLER = (
+    "the quick brown fox jumps over the lazy dog while a careful reviewer "
+    "checks every claim and suggests a clearer structure for the answer"
+).split()
+
+
+@dataclass
+class FakeServerConfig:
+    latency_s: float = 0.0  # mean time before the response starts
+    latency_dist: str = "fixed"  # see LATENCY_DISTRIBUTIONS
+    latency_spread: float = 0.5  # uniform: +/- fraction of the mean; lognormal: sigma
+    response_tokens: int = 64  # words in each completion
+    token_delay_s: float = 0.0  # pause between streamed chunks
+    rate_limit_rate: float = 0.0  # fraction of requests answered with 429
+    server_error_rate: float = 0.0  # fraction of requests answered with 500/502/503
+    retry_after_s: Optional[float] = 0.0  # Retry-After on 429s; None omits the header
+    seed: Optional[int] = None
+
+
+class _ServerStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.statuses: Dict[int, int] = {}
+        self.handling_s: List[float] = []
+        self.api_keys: Dict[str, int] = {}  # requests per bearer token
+
+    def connected(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    def authorized(self, api_key: str) -> None:
+        with self._lock:
+            self.api_keys[api_key] = self.api_keys.get(api_key, 0) + 1
+
+    def record(self, status: int, handling_s: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            if status == 200:
+                self.handling_s.append(handling_s)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "statuses": dict(self.statuses),
+                "handling_s": list(self.handling_s),
+                "api_keys": dict(self.api_keys),
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, the client's
+    # delayed ACK would add ~40ms to every call and swamp the measurements
+    disable_nagle_algorithm = True
+    server: "_FakeHTTPServer"
+
+    def setup(self) -> None:
+        # One handler per TCP connection; keep-alive requests reuse it
+        super().setup()
+        self.server.fake.stats.connected()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        started = time.perf_counter()
+        length = int(self.headers.get("content-length") or 0)
+        body = self.rfile.read(length)
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"message": "not found"})
+            return
+        authorization = self.headers.get("authorization") or ""
+        if not authorization.startswith("Bearer "):
+            self._send_json(401, {"message": "Unauthorized"})
+            return
+        self.server.fake.stats.authorized(authorization[len("Bearer "):])
+        try:
+            payload = json.loads(body)
+        except json.JSONDecodeError:
+            self._send_json(400, {"message": "invalid JSON"})
+            return
+
+        fake = self.server.fake
+        status = fake.pick_status()
+        # Stats are recorded before the last bytes go out, so they are
+        # complete by the time the client has the whole response
+        if status != 200:
+            headers = {}
+            if status == 429 and fake.config.retry_after_s is not None:
+                headers["Retry-After"] = str(fake.config.retry_after_s)
+            fake.stats.record(status, time.perf_counter() - started)
+            self._send_json(status, {"message": "injected error"}, headers)
+            return
+
+        time.sleep(fake.sample_latency())
+        words = fake.completion_words(payload)
+        if payload.get("stream"):
+            self._send_stream(payload, words, started)
+        else:
+            body = fake.completion(payload, words)
+            fake.stats.record(200, time.perf_counter() - started)
+            self._send_json(200, body)
+
+    def _send_json(self, status: int, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        raw = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _send_stream(self, payload: Dict[str, Any], words: List[str], started: float) -> None:
+        fake = self.server.fake
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        meta = {"id": "cmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": payload.get("model", "")}
+        for n, word in enumerate(words):
+            delta = {"role": "assistant", "content": word} if n == 0 else {"content": " " + word}
+            self._write_event({**meta, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+            if fake.config.token_delay_s:
+                time.sleep(fake.config.token_delay_s)
+        last = {**meta, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": fake.usage(payload, words)}
+        self._write_event(last)
+        fake.stats.record(200, time.perf_counter() - started)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_event(self, chunk: Dict[str, Any]) -> None:
+        self._write_chunk(b"data: " + json.dumps(chunk).encode() + b"\n\n")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class _FakeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Benchmarks open many connections at once; the default backlog of 5
+    # makes some of them wait for a SYN retry
+    request_queue_size = 128
+    fake: "FakeMistralServer"
+
+
+class FakeMistralServer:
+    # Serves /v1/chat/completions on a background thread:
+    #
+    #   with FakeMistralServer(FakeServerConfig(latency_s=0.05)) as server:
+    #       client = MistralClient(api_key="fake", base_url=server.base_url)
+    #
+    # Completions are filler text of config.response_tokens words; usage
+    # counts words as tokens. Streaming requests get SSE chunks, one per word.
+
+    def __init__(self, config: Optional[FakeServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeServerConfig()
+        if self.config.latency_dist not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {self.config.latency_dist}")
+        self.stats = _ServerStats()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._httpd = _FakeHTTPServer((host, port), _Handler)
+        self._httpd.fake = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeMistralServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-mistral", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "FakeMistralServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def pick_status(self) -> int:
+        with self._rng_lock:
+            roll = self._rng.random()
+            if roll < self.config.rate_limit_rate:
+                return 429
+            if roll < self.config.rate_limit_rate + self.config.server_error_rate:
+                return self._rng.choice((500, 502, 503))
+        return 200
+
+    def sample_latency(self) -> float:
+        cfg = self.config
+        if cfg.latency_s <= 0:
+            return 0.0
+        with self._rng_lock:
+            if cfg.latency_dist == "uniform":
+                return self._rng.uniform(cfg.latency_s * (1 - cfg.latency_spread), cfg.latency_s * (1 + cfg.latency_spread))
+            if cfg.latency_dist == "exponential":
+                return self._rng.expovariate(1 / cfg.latency_s)
+            if cfg.latency_dist == "lognormal":
+                # Scaled so the median is latency_s; the tail grows with spread
+                return cfg.latency_s * self._rng.lognormvariate(0.0, cfg.latency_spread)
+        return cfg.latency_s
+
+    def completion_words(self, payload: Dict[str, Any]) -> List[str]:
+        count = self.config.response_tokens
+        if payload.get("max_tokens"):
+            count = min(count, int(payload["max_tokens"]))
+        return [_FILLER[n % len(_FILLER)] for n in range(count)]
+
+    @staticmethod
+    def usage(payload: Dict[str, Any], words: List[str]) -> Dict[str, int]:
+        prompt = sum(len((m.get("content") or "").split()) for m in payload.get("messages", []))
+        return {"prompt_tokens": prompt, "completion_tokens": len(words), "total_tokens": prompt + len(words)}
+
+    @staticmethod
+    def completion(payload: Dict[str, Any], words: List[str]) -> Dict[str, Any]:
+        return {
+            "id": "cmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", ""),
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}
+            ],
+            "usage": FakeMistralServer.usage(payload, words),
+        }
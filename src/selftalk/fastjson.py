@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+# orjson when installed (pip install 'selftalk[fast]'), else the stdlib. Only
+# used on the client's fast path; cache keys keep using json.dumps so they do
+# not depend on which backend is present.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def backend() -> str:
+    return "orjson" if orjson is not None else "json"
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class Hedger:
+    # Hedged requests against tail latency: a call that has not answered
+    # within the given percentile of recent call latencies gets a duplicate,
+    # and whichever answers first wins. Shared by any number of
+    # MistralClient / AsyncMistralClient instances, threads and tasks.
+    #
+    # Costs roughly (100 - percentile)% extra requests. No hedging happens
+    # until min_samples calls have been seen. Async losers are cancelled;
+    # sync ones run to completion on the hedger's threads and are discarded.
+
+    def __init__(self, percentile: float = 95.0, *, min_samples: int = 20, window: int = 200, max_workers: int = 64):
+        if not 0.0 < percentile < 100.0:
+            raise ValueError("percentile must be between 0 and 100")
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self._latencies: Deque[float] = deque(maxlen=max(window, self.min_samples))
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.calls = 0
+        self.hedged = 0  # duplicates sent
+        self.wins = 0  # duplicates that answered first
+
+    def observe(self, latency_s: float) -> None:
+        with self._lock:
+            self._latencies.append(latency_s)
+
+    def delay(self) -> Optional[float]:
+        # How long a call may run before it is hedged; None while warming up
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(self.percentile / 100.0 * (len(ordered) - 1))]
+
+    def _count(self, calls: int = 0, hedged: int = 0, wins: int = 0) -> None:
+        with self._lock:
+            self.calls += calls
+            self.hedged += hedged
+            self.wins += wins
+
+    def call(self, fn: Callable[[], T]) -> Tuple[T, bool]:
+        # Returns fn()'s result and whether a duplicate was sent
+        self._count(calls=1)
+        delay = self.delay()
+        started = time.perf_counter()
+        if delay is None:
+            result = fn()
+            self.observe(time.perf_counter() - started)
+            return result, False
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="selftalk-hedge")
+            executor = self._executor
+        primary = executor.submit(fn)
+        try:
+            result = primary.result(timeout=delay)
+        except FutureTimeout:
+            pass
+        else:
+            self.observe(time.perf_counter() - started)
+            return result, False
+        hedge = executor.submit(fn)
+        self._count(hedged=1)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # For the primary this is a lower bound when the hedge won
+                    self.observe(time.perf_counter() - started)
+                    self._count(wins=int(future is hedge))
+                    return future.result(), True
+                error = error or future.exception()
+        raise error
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        self._count(calls=1)
+        delay = self.delay()
+        started = time.perf_counter()
+        if delay is None:
+            result = await fn()
+            self.observe(time.perf_counter() - started)
+            return result, False
+        primary = asyncio.ensure_future(fn())
+        pending = {primary}
+        hedged = False
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                pending = {primary, asyncio.ensure_future(fn())}
+                hedged = True
+                self._count(hedged=1)
+            error: Optional[BaseException] = None
+            while done or pending:
+                for task in done:
+                    if task.exception() is None:
+                        self.observe(time.perf_counter() - started)
+                        self._count(wins=int(task is not primary))
+                        return task.result(), hedged
+                    error = error or task.exception()
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "hedged": self.hedged, "wins": self.wins, "delay_s": self.delay()}
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
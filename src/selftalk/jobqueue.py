@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from .batch import BatchItem
+from .engine import EngineConfig
+from .metrics import summarize_transcript
+from .stages import parse_stage_settings
+from .transcript import TranscriptEntry
+
+# A job queue in one SQLite file, so workers on any number of processes or
+# machines (sharing the file) can split the work without another service.
+#
+# A worker claims a job with a lease; while it runs, it renews the lease. A
+# worker that crashes stops renewing, and once the lease expires the job is
+# handed to the next worker that asks. Each claim gets its own lease token,
+# and only the current holder can renew, complete or fail the job. A job
+# that fails, or whose lease runs out, is retried until max_attempts.
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS jobs ("
+    " id TEXT PRIMARY KEY, status TEXT NOT NULL, config TEXT NOT NULL,"
+    " attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,"
+    " available REAL NOT NULL, worker TEXT, lease_token TEXT, lease_until REAL,"
+    " created REAL NOT NULL, updated REAL NOT NULL, error TEXT,"
+    " final TEXT, summary TEXT, transcript TEXT)",
+    "CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, available)",
+)
+
+
+def config_to_json(cfg: EngineConfig) -> str:
+    return json.dumps(asdict(cfg), ensure_ascii=False)
+
+
+def config_from_json(text: str) -> EngineConfig:
+    data = json.loads(text)
+    data["stages"] = parse_stage_settings(data.get("stages") or {})
+    return EngineConfig(**data)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class Job:
+    id: str
+    cfg: EngineConfig
+    attempts: int
+    max_attempts: int
+    lease_token: str
+
+
+@dataclass
+class WorkerStats:
+    succeeded: int = 0
+    failed: int = 0  # attempts that raised, including ones that will be retried
+    lost: int = 0  # jobs whose lease was taken over before they finished
+
+
+class JobQueue:
+    def __init__(self, path: Union[str, Path], *, clock: Callable[[], float] = time.time):
+        self.path = Path(path)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; claims use BEGIN IMMEDIATE so two workers never take
+        # the same job. The busy timeout covers other processes' writes.
+        self._db = sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def enqueue(self, items: Iterable[BatchItem], *, max_attempts: int = 3, replace: bool = False) -> int:
+        # Returns how many jobs were added; known ids are kept unless replace
+        now = self._clock()
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        rows = [(item.id, config_to_json(item.cfg), max(1, max_attempts), now, now, now) for item in items]
+        with self._lock:
+            before = self._db.total_changes
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    f"{verb} INTO jobs (id, status, config, max_attempts, available, created, updated)"
+                    " VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return self._db.total_changes - before
+
+    def claim(self, worker: str, lease_s: float) -> Optional[Job]:
+        now = self._clock()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # Expired leases on a last attempt end the job for good
+                self._db.execute(
+                    "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), updated = ?"
+                    " WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, now),
+                )
+                row = self._db.execute(
+                    "SELECT id, config, attempts, max_attempts FROM jobs"
+                    " WHERE (status = 'queued' AND available <= ?) OR (status = 'running' AND lease_until < ?)"
+                    " ORDER BY available, created, id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                token = uuid.uuid4().hex
+                self._db.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, worker = ?, lease_token = ?,"
+                    " lease_until = ?, updated = ? WHERE id = ?",
+                    (worker, token, now + lease_s, now, row[0]),
+                )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return Job(id=row[0], cfg=config_from_json(row[1]), attempts=row[2] + 1, max_attempts=row[3], lease_token=token)
+
+    def _update_held(self, job: Job, sql: str, params: tuple) -> bool:
+        # Applies an update only while job's lease token is still current
+        with self._lock:
+            cur = self._db.execute(
+                f"UPDATE jobs SET {sql} WHERE id = ? AND lease_token = ? AND status = 'running'",
+                params + (job.id, job.lease_token),
+            )
+            return cur.rowcount == 1
+
+    def renew(self, job: Job, lease_s: float) -> bool:
+        now = self._clock()
+        return self._update_held(job, "lease_until = ?, updated = ?", (now + lease_s, now))
+
+    def complete(self, job: Job, final: str, transcript: List[TranscriptEntry]) -> bool:
+        lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in transcript)
+        summary = json.dumps(summarize_transcript(transcript))
+        return self._update_held(
+            job,
+            "status = 'done', final = ?, summary = ?, transcript = ?, error = NULL, lease_token = NULL, updated = ?",
+            (final, summary, lines, self._clock()),
+        )
+
+    def fail(self, job: Job, error: BaseException, *, retry_delay_s: float = 5.0) -> bool:
+        now = self._clock()
+        if job.attempts < job.max_attempts:
+            # Exponential backoff between attempts
+            available = now + retry_delay_s * 2 ** (job.attempts - 1)
+            return self._update_held(
+                job, "status = 'queued', available = ?, error = ?, lease_token = NULL, updated = ?", (available, str(error), now)
+            )
+        return self._update_held(job, "status = 'failed', error = ?, lease_token = NULL, updated = ?", (str(error), now))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        counts.update(rows)
+        return counts
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        # Finished jobs as `selftalk batch --out` records
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, status, config, final, summary, transcript, error FROM jobs"
+                " WHERE status IN ('done', 'failed') ORDER BY created, id"
+            ).fetchall()
+        for job_id, status, config, final, summary, transcript, error in rows:
+            goal = json.loads(config).get("user_goal")
+            if status == "failed":
+                yield {"id": job_id, "status": "error", "goal": goal, "error": error}
+                continue
+            yield {
+                "id": job_id,
+                "status": "ok",
+                "goal": goal,
+                "final": final,
+                "summary": json.loads(summary),
+                "transcript": [json.loads(line) for line in transcript.splitlines()],
+            }
+
+
+class _LeaseKeeper(threading.Thread):
+    # Renews a job's lease every third of its length until stopped; notes
+    # when the lease was lost (expired and claimed by another worker)
+
+    def __init__(self, queue: JobQueue, job: Job, lease_s: float):
+        super().__init__(name=f"lease-{job.id}", daemon=True)
+        self.queue = queue
+        self.job = job
+        self.lease_s = lease_s
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.lease_s / 3):
+            if not self.queue.renew(self.job, self.lease_s):
+                self.lost = True
+                return
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+def run_worker(
+    queue: JobQueue,
+    engine,
+    *,
+    worker_id: Optional[str] = None,
+    lease_s: float = 60.0,
+    poll_s: float = 1.0,
+    retry_delay_s: float = 5.0,
+    wait: bool = False,
+    max_jobs: Optional[int] = None,
+    store=None,
+    monitor=None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> WorkerStats:
+    # Claims and runs jobs with engine (a SelfTalkEngine) until the queue has
+    # nothing left to do, or forever with wait=True. store is an optional
+    # TranscriptStore that also receives each finished transcript; monitor
+    # (e.g. a dashboard.RunDashboard) is told when jobs start and finish.
+    worker_id = worker_id or default_worker_id()
+    stats = WorkerStats()
+    handled = 0
+    while max_jobs is None or handled < max_jobs:
+        job = queue.claim(worker_id, lease_s)
+        if job is None:
+            # Retries waiting out their backoff still count as work to do, and
+            # so do running jobs: if their worker crashed, the job comes back
+            # once its lease expires (or is failed for good on a last attempt)
+            counts = queue.counts()
+            if not wait and not counts["queued"] and not counts["running"]:
+                break
+            sleep(poll_s)
+            continue
+        handled += 1
+        keeper = _LeaseKeeper(queue, job, lease_s)
+        keeper.start()
+        if monitor is not None:
+            monitor.run_started()
+        try:
+            final, transcript = engine.run(job.cfg)
+        except Exception as e:  # noqa: BLE001
+            keeper.stop()
+            if monitor is not None:
+                monitor.run_finished(ok=False)
+            stats.failed += 1
+            if not queue.fail(job, e, retry_delay_s=retry_delay_s):
+                stats.lost += 1
+            continue
+        keeper.stop()
+        if monitor is not None:
+            monitor.run_finished(ok=True)
+        transcript = list(transcript)
+        if not queue.complete(job, final, transcript):
+            # Another worker owns the job now; its result will be the one kept
+            stats.lost += 1
+            continue
+        if store is not None:
+            store.add_run(job.id, job.cfg.mode, transcript)
+        stats.succeeded += 1
+    return stats
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+# Numeric per-call fields summed into per-stage and run totals
+SUMMED_FIELDS = (
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "latency_s",
+    "retries",
+    "backoff_s",
+)
+
+
+def usage_fields(usage: Optional[dict]) -> Dict[str, int]:
+    usage = usage or {}
+    return {k: int(usage[k]) for k in ("prompt_tokens", "completion_tokens", "total_tokens") if usage.get(k) is not None}
+
+
+def _empty_totals() -> Dict[str, Any]:
+    totals: Dict[str, Any] = {"calls": 0}
+    totals.update({k: 0 for k in SUMMED_FIELDS})
+    return totals
+
+
+def _add_call(totals: Dict[str, Any], call: Dict[str, Any]) -> None:
+    totals["calls"] += 1
+    for k in SUMMED_FIELDS:
+        value = call.get(k)
+        if value is not None:
+            totals[k] += value
+
+
+def summarize_transcript(transcript: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    # Aggregate the "call" records of a transcript into run totals plus
+    # per-stage totals (draft, critic_feedback, revision, pro, con, final) and
+    # per-model totals, which differ once stages are routed to other models.
+    total = _empty_totals()
+    stages: Dict[str, Dict[str, Any]] = {}
+    models: Dict[str, Dict[str, Any]] = {}
+    for entry in transcript:
+        call = entry.get("call")
+        if not call:
+            continue
+        stage = entry.get("stage") or "unknown"
+        _add_call(total, call)
+        totals = stages.setdefault(stage, _empty_totals())
+        _add_call(totals, call)
+        totals["model"] = entry.get("model", "")
+        _add_call(models.setdefault(entry.get("model", ""), _empty_totals()), call)
+    return {"total": total, "stages": stages, "models": models}
+
+
+class JsonlMetricsSink:
+    # One JSON object per call and per finished run, appended to a file.
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._fh = open(self.path, "a", encoding="utf-8")
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+
+    def record_call(self, labels: Dict[str, str], call: Dict[str, Any]) -> None:
+        self._write({"type": "call", "ts": time.time(), **labels, **call})
+
+    def record_run(self, labels: Dict[str, str], summary: Dict[str, Any]) -> None:
+        self._write({"type": "run", "ts": time.time(), **labels, **summary})
+
+    def close(self) -> None:
+        with self._lock:
+            self._fh.close()
+
+
+class PrometheusMetricsSink:
+    # Accumulates counters and rewrites a Prometheus text-format file (suitable
+    # for node_exporter's textfile collector) after every run and on close.
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._calls: Dict[Tuple[str, str, str], Dict[str, Any]] = defaultdict(_empty_totals)
+        self._runs: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def record_call(self, labels: Dict[str, str], call: Dict[str, Any]) -> None:
+        key = (labels.get("mode", ""), labels.get("model", ""), labels.get("stage", ""))
+        with self._lock:
+            _add_call(self._calls[key], call)
+
+    def record_run(self, labels: Dict[str, str], summary: Dict[str, Any]) -> None:
+        with self._lock:
+            self._runs[(labels.get("mode", ""), labels.get("model", ""))] += 1
+        self.flush()
+
+    def render(self) -> str:
+        metrics = [("calls", "selftalk_calls_total", "Chat completion calls")]
+        metrics += [
+            ("prompt_tokens", "selftalk_prompt_tokens_total", "Prompt tokens reported by the API"),
+            ("completion_tokens", "selftalk_completion_tokens_total", "Completion tokens reported by the API"),
+            ("latency_s", "selftalk_call_latency_seconds_total", "Summed client-side call latency"),
+            ("retries", "selftalk_retries_total", "Retried HTTP attempts"),
+            ("backoff_s", "selftalk_backoff_seconds_total", "Time spent sleeping between retries"),
+        ]
+        lines = []
+        with self._lock:
+            for field, name, help_text in metrics:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for (mode, model, stage), totals in sorted(self._calls.items()):
+                    labels = f'mode="{mode}",model="{model}",stage="{stage}"'
+                    lines.append(f"{name}{{{labels}}} {totals[field]}")
+            lines.append("# HELP selftalk_runs_total Completed engine runs")
+            lines.append("# TYPE selftalk_runs_total counter")
+            for (mode, model), count in sorted(self._runs.items()):
+                lines.append(f'selftalk_runs_total{{mode="{mode}",model="{model}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def flush(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+    def close(self) -> None:
+        self.flush()
+
+
+def open_metrics_sink(path: Union[str, Path]):
+    # .prom -> Prometheus text format, anything else -> JSON lines
+    if str(path).endswith(".prom"):
+        return PrometheusMetricsSink(path)
+    return JsonlMetricsSink(path)
@@ -31,6 +31,22 @@ class ChatChoice(BaseModel):
     finish_reason: Optional[str] = None
 
 
+class CallStats(BaseModel):
+    # Client-side measurements for one chat call; never part of the API payload.
+    streamed: bool = False
+    cached: bool = False
+    coalesced: bool = False  # answered by an identical request already in flight
+    hedged: bool = False  # a duplicate request was sent after a slow start
+    replayed: bool = False  # rebuilt from a transcript when resuming, not sent
+    latency_s: Optional[float] = None
+    ttft_s: Optional[float] = None
+    tokens_per_sec: Optional[float] = None
+    retries: int = 0
+    backoff_s: float = 0.0
+    throttle_s: float = 0.0  # time spent waiting on a shared RateLimiter
+    status_history: List[int] = Field(default_factory=list)
+
+
 class ChatResponse(BaseModel):
     id: str
     object: str
@@ -38,6 +54,7 @@ class ChatResponse(BaseModel):
     model: str
     choices: List[ChatChoice]
     usage: Optional[dict] = None
+    stats: Optional[CallStats] = Field(default=None, exclude=True)
 
     def first_message_content(self) -> str:
         if not self.choices:
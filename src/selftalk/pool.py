@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+BALANCE_STRATEGIES = ("weighted", "least-loaded")
+
+
+class PoolConfigError(ValueError):
+    pass
+
+
+@dataclass
+class Endpoint:
+    url: str  # API root, as for base_url: https://eu.proxy.example/v1
+    api_key: Optional[str] = None  # None uses the client's key
+    weight: float = 1.0
+    name: Optional[str] = None
+
+
+class EndpointState:
+    # Health and load of one endpoint; handed out by EndpointPool.acquire and
+    # given back to release(). Only read or changed under the pool's lock.
+
+    def __init__(self, endpoint: Endpoint):
+        self.endpoint = endpoint
+        self.name = endpoint.name or endpoint.url
+        self.chat_url = endpoint.url.rstrip("/") + "/chat/completions"
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0  # 429, 5xx and transport errors
+        self.rate_limited = 0
+        self.trips = 0  # times the circuit opened
+        self.consecutive_failures = 0
+        self.open_until: Optional[float] = None  # set while out of rotation
+        self.probing = False  # a half-open trial call is in flight
+        self.latency_s = 0.0  # summed over answered attempts
+        self.tokens = 0
+
+    def state(self, now: float) -> str:
+        if self.open_until is None:
+            return "closed"
+        return "open" if now < self.open_until else "half-open"
+
+    def available(self, now: float) -> bool:
+        state = self.state(now)
+        return state == "closed" or (state == "half-open" and not self.probing)
+
+
+class EndpointPool:
+    # Spreads calls over several (endpoint, API key) pairs, e.g. keys that
+    # split one quota or regional proxies. Shared by any number of
+    # MistralClient / AsyncMistralClient instances, threads and tasks.
+    #
+    # Each attempt (including each retry) picks an endpoint: at random by
+    # weight, or the one with the fewest calls in flight per unit of weight.
+    # failure_threshold consecutive 429/5xx/transport errors take an endpoint
+    # out of rotation for cooldown_s; after that a single trial call is let
+    # through (half-open), and its outcome closes the circuit or reopens it.
+    # If every endpoint is out, the one due back soonest is used anyway.
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        *,
+        strategy: str = "weighted",
+        failure_threshold: int = 3,
+        cooldown_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        if not endpoints:
+            raise PoolConfigError("an endpoint pool needs at least one endpoint")
+        if strategy not in BALANCE_STRATEGIES:
+            raise PoolConfigError(f"strategy must be one of: {', '.join(BALANCE_STRATEGIES)}")
+        for endpoint in endpoints:
+            if endpoint.weight <= 0:
+                raise PoolConfigError(f"endpoint {endpoint.name or endpoint.url}: weight must be positive")
+        self.strategy = strategy
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_s = cooldown_s
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._states = [EndpointState(e) for e in endpoints]
+        self._created = clock()
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        return [s.endpoint for s in self._states]
+
+    def acquire(self, avoid: Optional[EndpointState] = None) -> EndpointState:
+        # Picks the endpoint for one attempt; avoid is the one that just
+        # failed, used again only if nothing else is in rotation
+        with self._lock:
+            now = self._clock()
+            candidates = [s for s in self._states if s.available(now)]
+            if len(candidates) > 1 and avoid in candidates:
+                candidates.remove(avoid)
+            if not candidates:
+                chosen = min(self._states, key=lambda s: s.open_until)
+            elif self.strategy == "least-loaded":
+                chosen = min(candidates, key=lambda s: ((s.in_flight + 1) / s.endpoint.weight, s.requests))
+            else:
+                chosen = self._rng.choices(candidates, weights=[s.endpoint.weight for s in candidates])[0]
+            if chosen.state(now) != "closed":
+                chosen.probing = True
+            chosen.in_flight += 1
+            chosen.requests += 1
+            return chosen
+
+    def release(self, state: EndpointState, status: Optional[int], latency_s: float) -> None:
+        # Outcome of one attempt: the HTTP status, or None for a transport error
+        with self._lock:
+            now = self._clock()
+            state.in_flight -= 1
+            probe = state.probing
+            state.probing = False
+            if status is None or status == 429 or 500 <= status < 600:
+                state.failures += 1
+                state.consecutive_failures += 1
+                if status == 429:
+                    state.rate_limited += 1
+                if probe or state.consecutive_failures >= self.failure_threshold:
+                    if state.open_until is None or probe:
+                        state.trips += 1
+                    state.open_until = now + self.cooldown_s
+                return
+            # Any answer that is not a 429/5xx means the endpoint is healthy
+            state.successes += 1
+            state.consecutive_failures = 0
+            state.open_until = None
+            state.latency_s += latency_s
+
+    def cancel(self, state: EndpointState) -> None:
+        # An attempt that was never sent (or was cancelled) says nothing about health
+        with self._lock:
+            state.in_flight -= 1
+            state.requests -= 1
+            state.probing = False
+
+    def record_tokens(self, state: EndpointState, tokens: int) -> None:
+        with self._lock:
+            state.tokens += tokens
+
+    def has_alternative(self, state: EndpointState) -> bool:
+        # Whether another endpoint could take a retry right now
+        with self._lock:
+            now = self._clock()
+            return any(s is not state and s.available(now) for s in self._states)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            now = self._clock()
+            elapsed = max(now - self._created, 1e-9)
+            return [
+                {
+                    "name": s.name,
+                    "url": s.endpoint.url,
+                    "state": s.state(now),
+                    "weight": s.endpoint.weight,
+                    "in_flight": s.in_flight,
+                    "requests": s.requests,
+                    "successes": s.successes,
+                    "failures": s.failures,
+                    "rate_limited": s.rate_limited,
+                    "trips": s.trips,
+                    "mean_latency_s": s.latency_s / s.successes if s.successes else None,
+                    "tokens": s.tokens,
+                    "requests_per_s": s.successes / elapsed,
+                    "tokens_per_s": s.tokens / elapsed,
+                }
+                for s in self._states
+            ]
+
+
+def _endpoint(data: Any, n: int) -> Endpoint:
+    if isinstance(data, str):
+        return Endpoint(url=data)
+    if not isinstance(data, dict):
+        raise PoolConfigError(f"endpoints[{n}] must be an object or a URL string")
+    unknown = set(data) - {"url", "key", "key_env", "weight", "name"}
+    if unknown:
+        raise PoolConfigError(f"endpoints[{n}]: unknown setting(s): {', '.join(sorted(unknown))}")
+    url = data.get("url")
+    if not isinstance(url, str) or not url:
+        raise PoolConfigError(f"endpoints[{n}] needs a url")
+    # Keys are best kept out of the file: key_env names an environment variable
+    key = data.get("key")
+    if "key_env" in data:
+        key = os.getenv(str(data["key_env"]))
+        if not key:
+            raise PoolConfigError(f"endpoints[{n}]: environment variable {data['key_env']} is not set")
+    weight = data.get("weight", 1.0)
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+        raise PoolConfigError(f"endpoints[{n}]: weight must be a number")
+    name = data.get("name")
+    return Endpoint(url=url, api_key=key, weight=float(weight), name=str(name) if name is not None else None)
+
+
+def load_endpoint_pool(path: Union[str, Path], **overrides: Any) -> EndpointPool:
+    # JSON or TOML:
+    #   strategy = "least-loaded"      # optional, also failure_threshold, cooldown_s
+    #   [[endpoints]]
+    #   url = "https://eu.proxy.example/v1"
+    #   key_env = "MISTRAL_KEY_EU"      # or key = "..."; default: MISTRAL_API_KEY
+    #   weight = 2
+    # A JSON file may also be a bare list of endpoints.
+    path = Path(path)
+    try:
+        if path.suffix.lower() == ".toml":
+            import tomllib
+
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PoolConfigError(f"cannot read endpoint pool {path}: {e}")
+    if isinstance(data, list):
+        data = {"endpoints": data}
+    if not isinstance(data, dict) or not isinstance(data.get("endpoints"), list):
+        raise PoolConfigError(f"{path}: expected a list of endpoints")
+    unknown = set(data) - {"endpoints", "strategy", "failure_threshold", "cooldown_s"}
+    if unknown:
+        raise PoolConfigError(f"{path}: unknown setting(s): {', '.join(sorted(unknown))}")
+    settings = {k: data[k] for k in ("strategy", "failure_threshold", "cooldown_s") if k in data}
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    endpoints = [_endpoint(item, n) for n, item in enumerate(data["endpoints"])]
+    return EndpointPool(endpoints, **settings)
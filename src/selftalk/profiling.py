@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Tuple, Union
+
+from .models import ChatRequest, ChatResponse
+
+# Phases a profiled run is split into. Times are exclusive: a phase nested in
+# another (token printing inside a streamed read, say) is only counted once.
+PHASES = {
+    "engine": "dialogue flow logic between calls (prompts, context selection, stop checks)",
+    "console": "rich output: rules and live tokens",
+    "transcript": "transcript sink writes",
+    "client": "client work not covered below (hashing, copies, hooks)",
+    "cache": "response cache lookups and writes",
+    "serialize": "building and encoding request payloads",
+    "throttle": "waiting on a shared RateLimiter",
+    "network": "HTTP round trips, including reading streamed chunks",
+    "parse": "decoding and validating responses",
+    "backoff": "sleeping between retries",
+}
+
+
+class CallHook(Protocol):
+    # Attach tracing to every chat call an engine makes. Fanned-out calls
+    # (tournament mode) invoke hooks from worker threads or tasks.
+    def before_call(self, request: ChatRequest) -> None: ...
+
+    def after_call(
+        self,
+        request: ChatRequest,
+        response: Optional[ChatResponse],
+        error: Optional[BaseException],
+        elapsed_s: float,
+    ) -> None: ...
+
+
+class _Frame:
+    __slots__ = ("children_s",)
+
+    def __init__(self):
+        self.children_s = 0.0
+
+
+# Open phases of the current thread or task, innermost last
+_open_phases: ContextVar[Tuple[_Frame, ...]] = ContextVar("selftalk_open_phases", default=())
+
+
+class Profiler:
+    # Collects per-phase wall time for a run. Shared by the engine and its
+    # client; safe to use from fan-out threads and tasks, whose times add up
+    # (so totals can exceed the elapsed time of a concurrent run).
+    #
+    # cprofile=True also runs cProfile between start() and stop(); it only
+    # sees the thread that called start().
+
+    def __init__(self, *, cprofile: bool = False):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, List[float]] = {}
+        self._cprofile = None
+        if cprofile:
+            import cProfile
+
+            self._cprofile = cProfile.Profile()
+        self.started: Optional[float] = None
+        self.elapsed_s = 0.0
+
+    def start(self) -> "Profiler":
+        self.started = time.perf_counter()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+        return self
+
+    def stop(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if self.started is not None:
+            self.elapsed_s += time.perf_counter() - self.started
+            self.started = None
+
+    def __enter__(self) -> "Profiler":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        frame = _Frame()
+        token = _open_phases.set(_open_phases.get() + (frame,))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            _open_phases.reset(token)
+            parents = _open_phases.get()
+            if parents:
+                parents[-1].children_s += elapsed
+            self.add(name, elapsed - frame.children_s)
+
+    def add(self, name: str, seconds: float, count: int = 1) -> None:
+        with self._lock:
+            totals = self._totals.setdefault(name, [0, 0.0])
+            totals[0] += count
+            totals[1] += seconds
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        # {phase: {"count", "total_s", "mean_s"}} in PHASES order, then any others
+        with self._lock:
+            totals = {name: list(values) for name, values in self._totals.items()}
+        order = [p for p in PHASES if p in totals] + sorted(set(totals) - set(PHASES))
+        return {
+            name: {"count": totals[name][0], "total_s": totals[name][1], "mean_s": totals[name][1] / max(1, totals[name][0])}
+            for name in order
+        }
+
+    def dump_stats(self, path: Union[str, Path]) -> None:
+        # pstats file for snakeviz, `python -m pstats` etc.
+        if self._cprofile is None:
+            raise ValueError("cProfile was not enabled for this profiler")
+        self._cprofile.dump_stats(str(path))
+
+    def top_functions(self, limit: int = 15) -> str:
+        # Text of the functions with the highest cumulative time
+        if self._cprofile is None:
+            return ""
+        import io
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+
+class _ProfiledSink:
+    # Times transcript writes; wraps the engine's sink (or plain list)
+    def __init__(self, target: Any, profiler: Profiler):
+        self.target = target
+        self.profiler = profiler
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        with self.profiler.phase("transcript"):
+            self.target.append(entry)
+
+    def __iter__(self):
+        return iter(self.target)
+
+    def __len__(self) -> int:
+        return len(self.target)
+
+    def flush(self) -> None:
+        if hasattr(self.target, "flush"):
+            with self.profiler.phase("transcript"):
+                self.target.flush()
+
+    def close(self) -> None:
+        if hasattr(self.target, "close"):
+            with self.profiler.phase("transcript"):
+                self.target.close()
@@ -33,6 +33,12 @@ DEBATE_FINAL_INSTRUCTION = (
     "Be concise and directly provide the answer."
 )
 
+TOURNAMENT_JUDGE_INSTRUCTION = (
+    "Act as a fair judge. Compare the candidate answers below and pick the best one, "
+    "or merge their strengths into a single better answer for the user. "
+    "Be concise and directly provide the answer."
+)
+
 
 def resolve_prompt_input(system_prompt_input: str) -> str:
     # If it's a file path that exists, read it; otherwise treat as literal content
@@ -47,3 +53,19 @@ def build_initial_messages(system_prompt: str, user_goal: Optional[str]) -> list
     if user_goal:
         messages.append(Message(role="user", content=user_goal))
     return messages
+
+
+def build_judge_prompt(candidates: list[str], reviews: list[Optional[str]]) -> str:
+    parts = ["Judge: " + TOURNAMENT_JUDGE_INSTRUCTION]
+    for n, (candidate, review) in enumerate(zip(candidates, reviews), start=1):
+        parts.append(f"Candidate {n}:\n{candidate}")
+        if review:
+            parts.append(f"Review of candidate {n}:\n{review}")
+    return "\n\n".join(parts)
+
+
+NO_ISSUES_MARKER = "NO ISSUES"
+
+NO_ISSUES_HINT = (
+    f"If the answer is already correct and complete and needs no changes, reply with exactly: {NO_ISSUES_MARKER}"
+)
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Mapping, Optional
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    # Retry-After is either delay-seconds or an HTTP-date
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (time.time() if now is None else now))
+
+
+def _header_float(headers: Mapping[str, str], *names: str) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            # OpenAI-style reset durations such as "1.5s" or "20ms"
+            value = value.strip().lower()
+            try:
+                if value.endswith("ms"):
+                    return float(value[:-2]) / 1000
+                if value.endswith("s"):
+                    return float(value[:-1])
+            except ValueError:
+                continue
+    return None
+
+
+class _Bucket:
+    # Reservation-style token bucket: the level may go negative, and a caller
+    # waits until its share of the debt has been refilled. This keeps ordering
+    # fair without holding a lock while sleeping.
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float, now: float) -> float:
+        # How long a reservation of amount would wait, without making it
+        self.refill(now)
+        level = self.level - amount
+        return 0.0 if level >= 0 else -level / self.rate
+
+    def reserve(self, amount: float, now: float) -> float:
+        wait = self.wait_for(amount, now)
+        self.level -= amount
+        return wait
+
+
+class RateLimiter:
+    # Client-side limiter shared by any number of MistralClient /
+    # AsyncMistralClient instances, threads and tasks.
+    #
+    # Limits requests/sec and tokens/min. A 429 halves the request rate (down
+    # to min_fraction of the configured one) and pauses every sharer until
+    # Retry-After or the advertised reset; successful calls grow it back
+    # additively. Rate-limit headers on any response can lower the limits
+    # or pause sharers when the remaining budget hits zero.
+
+    def __init__(
+        self,
+        requests_per_sec: Optional[float] = None,
+        tokens_per_min: Optional[float] = None,
+        *,
+        burst: Optional[float] = None,
+        min_fraction: float = 0.1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._lock = threading.Lock()
+        now = clock()
+        self.max_requests_per_sec = requests_per_sec
+        self.min_fraction = min_fraction
+        self._requests = (
+            _Bucket(requests_per_sec, burst if burst is not None else max(1.0, requests_per_sec), now)
+            if requests_per_sec
+            else None
+        )
+        self._tokens = _Bucket(tokens_per_min / 60.0, tokens_per_min, now) if tokens_per_min else None
+        self._blocked_until = 0.0
+        self.acquired = 0
+        self.rate_limited = 0
+        self.waited_s = 0.0
+
+    def reserve(self, tokens: int = 0, *, budget: Optional[float] = None) -> Optional[float]:
+        # Claims capacity for one request and returns how long to wait before
+        # sending it. With a budget (seconds the caller can still spend), a
+        # wait that would use it all up claims nothing and returns None.
+        with self._lock:
+            now = self._clock()
+            if self._tokens is not None and tokens:
+                tokens = min(tokens, self._tokens.capacity)
+            wait = max(0.0, self._blocked_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.wait_for(1, now))
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.wait_for(tokens, now))
+            if budget is not None and wait >= budget:
+                return None
+            if self._requests is not None:
+                self._requests.reserve(1, now)
+            if self._tokens is not None and tokens:
+                self._tokens.reserve(tokens, now)
+            self.acquired += 1
+            self.waited_s += wait
+            return wait
+
+    def acquire(self, tokens: int = 0, *, budget: Optional[float] = None) -> Optional[float]:
+        wait = self.reserve(tokens, budget=budget)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0, *, budget: Optional[float] = None) -> Optional[float]:
+        wait = self.reserve(tokens, budget=budget)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def settle_tokens(self, estimated: int, actual: int) -> None:
+        # Correct a token reservation once the real usage is known
+        if self._tokens is None:
+            return
+        with self._lock:
+            self._tokens.refill(self._clock())
+            self._tokens.level -= actual - estimated
+
+    def observe(self, status: int, headers: Mapping[str, str]) -> Optional[float]:
+        # Feeds a response back; returns the server-requested delay, if any
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        remaining_req = _header_float(headers, "x-ratelimit-remaining-requests", "x-ratelimit-remaining-req-minute", "ratelimit-remaining")
+        remaining_tok = _header_float(headers, "x-ratelimit-remaining-tokens", "x-ratelimit-remaining-tokens-minute")
+        reset = _header_float(headers, "x-ratelimit-reset-requests", "x-ratelimit-reset", "ratelimit-reset")
+        limit_tok = _header_float(headers, "x-ratelimit-limit-tokens-minute", "x-ratelimit-limit-tokens")
+        with self._lock:
+            now = self._clock()
+            pause = retry_after
+            if pause is None and ((remaining_req is not None and remaining_req <= 0) or (remaining_tok is not None and remaining_tok <= 0)):
+                pause = reset
+            if status == 429:
+                self.rate_limited += 1
+                if pause is None:
+                    pause = reset
+                if self._requests is not None:
+                    floor = self.max_requests_per_sec * self.min_fraction
+                    self._requests.refill(now)
+                    self._requests.rate = max(floor, self._requests.rate / 2)
+            elif self._requests is not None and 200 <= status < 300:
+                self._requests.refill(now)
+                step = self.max_requests_per_sec * 0.05
+                self._requests.rate = min(self.max_requests_per_sec, self._requests.rate + step)
+            if limit_tok and self._tokens is not None and limit_tok / 60.0 < self._tokens.rate:
+                self._tokens.refill(now)
+                self._tokens.rate = limit_tok / 60.0
+                self._tokens.capacity = limit_tok
+            if pause:
+                self._blocked_until = max(self._blocked_until, now + pause)
+        return retry_after
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            state: Dict[str, Any] = {
+                "blocked_for_s": max(0.0, self._blocked_until - now),
+                "acquired": self.acquired,
+                "rate_limited": self.rate_limited,
+                "waited_s": self.waited_s,
+            }
+            if self._requests is not None:
+                self._requests.refill(now)
+                state["requests_per_sec"] = self._requests.rate
+                state["requests_available"] = self._requests.level
+            if self._tokens is not None:
+                self._tokens.refill(now)
+                state["tokens_per_min"] = self._tokens.rate * 60.0
+                state["tokens_available"] = self._tokens.level
+        return state
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+
+from .models import CallStats, ChatChoice, ChatResponse, Message
+from .transcript import TranscriptEntry, read_transcript_jsonl
+
+# Debate turns that a finished run ends with; when the run is extended the
+# replay stops at them and the new rounds plus a fresh synthesis run live.
+_DEBATE_TAIL_STAGES = {"judge_prompt", "final"}
+_DEBATE_STAGES = {"pro_prompt", "pro", "con_prompt", "con"}
+_TOURNAMENT_STAGES = {"candidate", "review", "judge"}
+
+
+class ResumeError(ValueError):
+    pass
+
+
+@dataclass
+class ResumeInfo:
+    entries: List[TranscriptEntry]
+    system_prompt: str
+    user_goal: Optional[str]
+    mode: str
+    model: str
+    iterations_done: int
+
+
+def load_resume_info(path: Union[str, Path]) -> ResumeInfo:
+    entries = list(read_transcript_jsonl(path))
+    init = [e for e in entries if e.get("stage") == "init"]
+    if not init or init[0].get("role") != "system":
+        raise ResumeError(f"{path}: transcript does not start with the system prompt")
+    user_goal = next((e["content"] for e in init if e.get("role") == "user"), None)
+    stages = {e.get("stage") for e in entries}
+    if stages & _TOURNAMENT_STAGES:
+        mode = "tournament"
+    elif stages & _DEBATE_STAGES:
+        mode = "debate"
+    else:
+        mode = "critic"
+    # Only count rounds that got an answer
+    answered = [e["iteration"] for e in entries if e.get("role") == "assistant" and e.get("iteration") is not None]
+    return ResumeInfo(
+        entries=entries,
+        system_prompt=init[0]["content"],
+        user_goal=user_goal,
+        mode=mode,
+        model=init[0].get("model", ""),
+        iterations_done=max(answered, default=0),
+    )
+
+
+def _recorded_response(entry: TranscriptEntry) -> ChatResponse:
+    call = entry.get("call") or {}
+    usage = {k: call[k] for k in ("prompt_tokens", "completion_tokens", "total_tokens") if k in call}
+    return ChatResponse(
+        id="replayed",
+        object="chat.completion",
+        created=0,
+        model=entry.get("model", ""),
+        choices=[
+            ChatChoice(
+                index=0,
+                message=Message(role="assistant", content=entry["content"]),
+                finish_reason=call.get("finish_reason"),
+            )
+        ],
+        usage=usage or None,
+        stats=CallStats(replayed=True),
+    )
+
+
+def _same_turn(recorded: TranscriptEntry, entry: TranscriptEntry) -> bool:
+    return all(recorded.get(k) == entry.get(k) for k in ("role", "stage", "iteration", "content"))
+
+
+class ReplaySink:
+    # Sits between the engine and the real transcript while a run is rebuilt.
+    # As long as the engine reproduces the recorded turns, the recorded
+    # entries (original timestamps and call stats) are passed through; the
+    # first new turn switches to live mode. Stop entries are not replayed:
+    # the resumed loop decides afresh why it stops.
+
+    def __init__(self, target, recorded: List[TranscriptEntry]):
+        self.target = target
+        self.recorded = [e for e in recorded if e.get("stage") != "stop"]
+        self.pos = 0
+        self.replaying = True
+
+    def pending_response(self) -> Optional[ChatResponse]:
+        # The recorded answer to the request the engine is about to send, if any
+        if self.replaying and self.pos < len(self.recorded) and self.recorded[self.pos].get("role") == "assistant":
+            return _recorded_response(self.recorded[self.pos])
+        return None
+
+    def pending_responses(self, count: int) -> Optional[List[ChatResponse]]:
+        # Recorded answers to a fanned-out batch; its entries are written
+        # together once every call returned, so either all or none are there
+        if not self.replaying:
+            return None
+        batch = self.recorded[self.pos : self.pos + count]
+        if len(batch) < count or any(e.get("role") != "assistant" for e in batch):
+            return None
+        return [_recorded_response(e) for e in batch]
+
+    def append(self, entry: TranscriptEntry) -> None:
+        if self.replaying:
+            if self.pos < len(self.recorded) and _same_turn(self.recorded[self.pos], entry):
+                self.target.append(self.recorded[self.pos])
+                self.pos += 1
+                return
+            self.finish()
+        self.target.append(entry)
+
+    def finish(self) -> None:
+        if not self.replaying:
+            return
+        self.replaying = False
+        leftover = self.recorded[self.pos:]
+        if any(e.get("stage") not in _DEBATE_TAIL_STAGES for e in leftover):
+            entry = leftover[0]
+            raise ResumeError(
+                f"transcript diverges from the configuration at entry {self.pos + 1} "
+                f"(stage={entry.get('stage')}, iteration={entry.get('iteration')}); "
+                "check system prompt, goal, mode and stop options"
+            )
+
+    @property
+    def replayed(self) -> int:
+        return self.pos
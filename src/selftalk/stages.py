@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, Iterable, Mapping, Optional, Union
+
+# Roles a run can route to their own model and sampling settings, and the
+# transcript stages each covers:
+#   draft   - critic draft, tournament candidates
+#   critic  - critic feedback, tournament reviews
+#   revise  - critic revisions
+#   pro/con - debate turns
+#   judge   - debate synthesis, tournament judging
+STAGE_ROLES = ("draft", "critic", "revise", "pro", "con", "judge")
+
+# Highest temperature the API accepts. The CLI rejects anything above it and
+# tournament candidates spread up to it.
+MAX_TEMPERATURE = 1.0
+
+
+class StageConfigError(ValueError):
+    pass
+
+
+@dataclass
+class StageSettings:
+    # None keeps the run-wide EngineConfig value
+    model: Optional[str] = None
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    top_p: Optional[float] = None
+
+
+_FIELD_TYPES = {"model": str, "temperature": float, "max_tokens": int, "top_p": float}
+StageMap = Dict[str, StageSettings]
+
+
+def _check_role(role: str) -> str:
+    role = role.lower()
+    if role not in STAGE_ROLES:
+        raise StageConfigError(f"unknown stage {role!r}; expected one of: {', '.join(STAGE_ROLES)}")
+    return role
+
+
+def _coerce(role: str, name: str, value: Any) -> Any:
+    if name not in _FIELD_TYPES:
+        raise StageConfigError(f"{role}: unknown setting {name!r}; expected one of: {', '.join(_FIELD_TYPES)}")
+    if value is None:
+        return None
+    kind = _FIELD_TYPES[name]
+    if kind is int and (isinstance(value, bool) or (isinstance(value, float) and not value.is_integer())):
+        raise StageConfigError(f"{role}.{name}: expected an integer, got {value!r}")
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise StageConfigError(f"{role}.{name}: expected {kind.__name__}, got {value!r}")
+
+
+def parse_stage_settings(data: Mapping[str, Any]) -> StageMap:
+    # {"critic": {"model": "mistral-small-latest", "max_tokens": 256}, ...}
+    stages: StageMap = {}
+    for role, settings in data.items():
+        role = _check_role(str(role))
+        if not isinstance(settings, Mapping):
+            raise StageConfigError(f"{role}: expected a table of settings")
+        stages[role] = StageSettings(**{name: _coerce(role, name, value) for name, value in settings.items()})
+    return stages
+
+
+def load_stage_config(path: Union[str, Path]) -> StageMap:
+    # JSON, or TOML for a .toml file; either maps role -> settings
+    path = Path(path)
+    try:
+        if path.suffix.lower() == ".toml":
+            import tomllib
+
+            with open(path, "rb") as f:
+                data = tomllib.load(f)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+    except OSError as e:
+        raise StageConfigError(f"cannot read {path}: {e}")
+    except ValueError as e:
+        raise StageConfigError(f"{path}: {e}")
+    if not isinstance(data, Mapping):
+        raise StageConfigError(f"{path}: expected a mapping of stage -> settings")
+    return parse_stage_settings(data)
+
+
+def parse_stage_options(options: Iterable[str]) -> StageMap:
+    # CLI form: ROLE.SETTING=VALUE, e.g. critic.model=mistral-small-latest
+    data: Dict[str, Dict[str, str]] = {}
+    for option in options:
+        key, sep, value = option.partition("=")
+        role, dot, name = key.strip().partition(".")
+        if not sep or not dot:
+            raise StageConfigError(f"{option!r}: expected ROLE.SETTING=VALUE, e.g. critic.model=mistral-small-latest")
+        data.setdefault(role, {})[name.strip()] = value.strip()
+    return parse_stage_settings(data)
+
+
+def merge_stage_settings(base: StageMap, overrides: StageMap) -> StageMap:
+    # Settings given in overrides win; unset ones fall back to base
+    merged = dict(base)
+    for role, settings in overrides.items():
+        if role not in merged:
+            merged[role] = settings
+            continue
+        merged[role] = replace(merged[role], **stage_overrides(overrides, role))
+    return merged
+
+
+def stage_overrides(stages: StageMap, role: str) -> Dict[str, Any]:
+    # EngineConfig fields to replace for one role's calls
+    settings = stages.get(role)
+    if settings is None:
+        return {}
+    return {f.name: getattr(settings, f.name) for f in fields(settings) if getattr(settings, f.name) is not None}
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import re
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, Optional
+
+from .context import CHARS_PER_TOKEN
+from .prompts import NO_ISSUES_MARKER
+
+# Reasons recorded on the transcript's "stop" entry
+STOP_CONVERGED = "converged"
+STOP_NO_ISSUES = "no_issues"
+STOP_TOKEN_BUDGET = "token_budget"
+STOP_TIME_BUDGET = "time_budget"
+STOP_MAX_ITERATIONS = "max_iterations"
+STOP_DEADLINE = "deadline"  # a call ran out of time; the run kept its best answer so far
+
+_NO_ISSUES_RE = re.compile(r"^\W*" + re.escape(NO_ISSUES_MARKER).replace(r"\ ", r"[\s_-]*") + r"\W*$", re.IGNORECASE)
+
+
+def similarity(a: str, b: str) -> float:
+    # Word-level ratio: cheaper than a character diff on long answers and not
+    # thrown off by re-wrapped whitespace.
+    return SequenceMatcher(None, a.split(), b.split(), autojunk=False).ratio()
+
+
+def signals_no_issues(feedback: str) -> bool:
+    return bool(_NO_ISSUES_RE.match(feedback.strip()))
+
+
+class RunBudget:
+    # Tracks tokens and wall time spent by one run against the optional
+    # EngineConfig.max_total_tokens / max_seconds limits.
+
+    def __init__(self, max_total_tokens: Optional[int] = None, max_seconds: Optional[float] = None):
+        self.max_total_tokens = max_total_tokens
+        self.max_seconds = max_seconds
+        self.started = time.monotonic()
+        self.tokens = 0
+
+    def add(self, call: Dict[str, Any], content: str) -> None:
+        total = call.get("total_tokens")
+        if total is None:
+            # No usage reported: fall back to the same estimate used for context sizing
+            total = call.get("prompt_tokens_est", 0) + len(content) // CHARS_PER_TOKEN
+        self.tokens += total
+
+    def exceeded(self) -> Optional[str]:
+        if self.max_total_tokens is not None and self.tokens >= self.max_total_tokens:
+            return STOP_TOKEN_BUDGET
+        if self.max_seconds is not None and time.monotonic() - self.started >= self.max_seconds:
+            return STOP_TIME_BUDGET
+        return None
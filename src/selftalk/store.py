@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .transcript import TranscriptEntry
+
+# Columns a query can filter on; every one of them is indexed. mode belongs to
+# the run, the rest to individual entries (models can differ per stage).
+QUERY_FILTERS = ("run_id", "mode", "model", "stage", "bucket", "since", "until")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs ("
+    " run_id TEXT PRIMARY KEY, mode TEXT NOT NULL, model TEXT, started TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS entries ("
+    " run_id TEXT NOT NULL, seq INTEGER NOT NULL, ts TEXT, role TEXT, model TEXT,"
+    " stage TEXT, bucket TEXT, iteration INTEGER, body TEXT NOT NULL,"
+    " PRIMARY KEY (run_id, seq))",
+    "CREATE INDEX IF NOT EXISTS runs_mode ON runs(mode)",
+    "CREATE INDEX IF NOT EXISTS runs_started ON runs(started)",
+    "CREATE INDEX IF NOT EXISTS entries_model ON entries(model)",
+    "CREATE INDEX IF NOT EXISTS entries_stage ON entries(stage)",
+    "CREATE INDEX IF NOT EXISTS entries_bucket ON entries(bucket)",
+    "CREATE INDEX IF NOT EXISTS entries_ts ON entries(ts)",
+)
+
+
+def new_run_id() -> str:
+    # Sortable by start time, unique across processes
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+
+
+def _row(run_id: str, seq: int, entry: TranscriptEntry) -> Tuple[Any, ...]:
+    return (
+        run_id,
+        seq,
+        entry.get("ts"),
+        entry.get("role"),
+        entry.get("model"),
+        entry.get("stage"),
+        entry.get("bucket"),
+        entry.get("iteration"),
+        # Stored exactly as JsonlTranscriptSink writes the line, so exports
+        # are byte-for-byte the JSONL the run would have produced
+        json.dumps(entry, ensure_ascii=False),
+    )
+
+
+class TranscriptStore:
+    # Transcripts of many runs in a single SQLite file (WAL, so readers such
+    # as `selftalk transcripts` do not block a run that is writing). Each run
+    # has an id, its mode and first model; entries keep their order in the run.
+    #
+    #   with TranscriptStore("runs.sqlite") as store:
+    #       engine.run(cfg, sink=store.sink(mode=cfg.mode))
+    #       for entry in store.query(mode="debate", stage="final"): ...
+
+    def __init__(self, path: Union[str, Path], *, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        if read_only:
+            self._db = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps the database consistent on a crash; NORMAL only risks
+            # the last commits on power loss and avoids an fsync per batch
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            for statement in _SCHEMA:
+                self._db.execute(statement)
+            self._db.commit()
+
+    def __enter__(self) -> "TranscriptStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def begin_run(self, run_id: str, mode: str, model: Optional[str] = None) -> None:
+        # A run id holds one transcript: starting it again replaces the old one
+        with self._lock:
+            with self._db:
+                self._db.execute("DELETE FROM entries WHERE run_id = ?", (run_id,))
+                self._db.execute(
+                    "INSERT OR REPLACE INTO runs (run_id, mode, model, started) VALUES (?, ?, ?, ?)",
+                    (run_id, mode.lower(), model, datetime.now(timezone.utc).isoformat()),
+                )
+
+    def insert(self, run_id: str, first_seq: int, entries: List[TranscriptEntry]) -> None:
+        # One transaction and one executemany per batch of entries
+        if not entries:
+            return
+        rows = [_row(run_id, first_seq + n, entry) for n, entry in enumerate(entries)]
+        with self._lock:
+            with self._db:
+                self._db.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                if rows[0][4]:
+                    self._db.execute("UPDATE runs SET model = COALESCE(model, ?) WHERE run_id = ?", (rows[0][4], run_id))
+
+    def add_run(self, run_id: str, mode: str, transcript: Iterable[TranscriptEntry]) -> None:
+        # Stores a finished transcript in one go, e.g. a batch item
+        entries = list(transcript)
+        self.begin_run(run_id, mode, entries[0].get("model") if entries else None)
+        self.insert(run_id, 0, entries)
+
+    def sink(self, run_id: Optional[str] = None, *, mode: str, batch_size: int = 64) -> "StoreTranscriptSink":
+        return StoreTranscriptSink(self, run_id or new_run_id(), mode=mode, batch_size=batch_size)
+
+    def _where(self, filters: Dict[str, Any]) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        for name, value in filters.items():
+            if name not in QUERY_FILTERS:
+                raise ValueError(f"Unknown transcript filter: {name}")
+            if value is None:
+                continue
+            if name == "since":
+                clauses.append("e.ts >= ?")
+            elif name == "until":
+                clauses.append("e.ts < ?")
+            elif name == "mode":
+                clauses.append("r.mode = ?")
+                value = value.lower()
+            else:
+                clauses.append(f"e.{name} = ?")
+            params.append(value)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def query(self, *, limit: Optional[int] = None, **filters: Any) -> Iterator[TranscriptEntry]:
+        # Entries matching every filter, run by run in start order. since and
+        # until compare ISO timestamps, so a bare date such as 2024-05-01 works.
+        where, params = self._where(filters)
+        sql = (
+            "SELECT e.body FROM entries e JOIN runs r ON r.run_id = e.run_id"
+            f"{where} ORDER BY r.started, e.run_id, e.seq"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        for (body,) in rows:
+            yield json.loads(body)
+
+    def runs(self, **filters: Any) -> List[Dict[str, Any]]:
+        # One summary per run with at least one matching entry
+        where, params = self._where(filters)
+        sql = (
+            "SELECT r.run_id, r.mode, r.model, r.started, COUNT(*), MAX(e.ts)"
+            f" FROM entries e JOIN runs r ON r.run_id = e.run_id{where}"
+            " GROUP BY r.run_id ORDER BY r.started, r.run_id"
+        )
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        keys = ("run_id", "mode", "model", "started", "entries", "last_ts")
+        return [dict(zip(keys, row)) for row in rows]
+
+
+class StoreTranscriptSink:
+    # Writes one run into a TranscriptStore as the engine produces it. Entries
+    # are buffered and inserted batch_size at a time; flush() and close()
+    # write whatever is pending. Closing the sink leaves the store open, so
+    # one store can take many runs.
+
+    def __init__(self, store: TranscriptStore, run_id: str, *, mode: str, batch_size: int = 64):
+        self.store = store
+        self.run_id = run_id
+        self.batch_size = max(1, batch_size)
+        self.count = 0
+        self._pending: List[TranscriptEntry] = []
+        store.begin_run(run_id, mode)
+
+    def append(self, entry: TranscriptEntry) -> None:
+        self._pending.append(entry)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        self.store.insert(self.run_id, self.count, pending)
+        self.count += len(pending)
+
+    def __iter__(self) -> Iterator[TranscriptEntry]:
+        self.flush()
+        return self.store.query(run_id=self.run_id)
+
+    def __len__(self) -> int:
+        return self.count + len(self._pending)
+
+    def close(self) -> None:
+        self.flush()
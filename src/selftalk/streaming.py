@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .models import CallStats, ChatChoice, ChatResponse, Message
+
+TokenCallback = Callable[[str], None]
+
+
+class StreamError(ValueError):
+    pass
+
+
+class StreamAccumulator:
+    # Incrementally parses Mistral's server-sent-events chat stream
+    # ("data: {chunk}" lines terminated by "data: [DONE]"), forwards content
+    # deltas of the first choice to ``on_token`` and rebuilds a full ChatResponse.
+
+    def __init__(
+        self,
+        on_token: Optional[TokenCallback] = None,
+        started: Optional[float] = None,
+        *,
+        loads: Optional[Callable[[str], Any]] = None,
+    ):
+        self.on_token = on_token
+        self._loads = loads or json.loads
+        self.started = time.perf_counter() if started is None else started
+        self.first_token_at: Optional[float] = None
+        self.done = False
+        self.chunks = 0
+        self._meta: Dict[str, object] = {}
+        self._parts: Dict[int, List[str]] = {}
+        self._roles: Dict[int, str] = {}
+        self._finish: Dict[int, Optional[str]] = {}
+        self._usage: Optional[dict] = None
+
+    @property
+    def received_tokens(self) -> bool:
+        return self.first_token_at is not None
+
+    def feed_line(self, line: str) -> None:
+        if self.done:
+            return
+        line = line.strip()
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            # Blank separators, comments and event/id fields carry no content
+            return
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            self.done = True
+            return
+        try:
+            chunk = self._loads(data)
+        except ValueError as e:
+            raise StreamError(f"Invalid stream chunk: {e}")
+        self._feed_chunk(chunk)
+
+    def _feed_chunk(self, chunk: dict) -> None:
+        self.chunks += 1
+        for key in ("id", "model", "created"):
+            if key in chunk and key not in self._meta:
+                self._meta[key] = chunk[key]
+        if chunk.get("usage"):
+            self._usage = chunk["usage"]
+        for choice in chunk.get("choices") or []:
+            index = choice.get("index", 0)
+            delta = choice.get("delta") or {}
+            if delta.get("role"):
+                self._roles[index] = delta["role"]
+            content = delta.get("content")
+            if content:
+                self._parts.setdefault(index, []).append(content)
+                if index == 0:
+                    if self.first_token_at is None:
+                        self.first_token_at = time.perf_counter()
+                    if self.on_token is not None:
+                        self.on_token(content)
+            if choice.get("finish_reason") is not None:
+                self._finish[index] = choice["finish_reason"]
+
+    def stats(self) -> CallStats:
+        now = time.perf_counter()
+        ttft = tps = None
+        if self.first_token_at is not None:
+            ttft = self.first_token_at - self.started
+            tokens = (self._usage or {}).get("completion_tokens") or len(self._parts.get(0, []))
+            gen_time = now - self.first_token_at
+            if gen_time > 0:
+                tps = tokens / gen_time
+        return CallStats(streamed=True, latency_s=now - self.started, ttft_s=ttft, tokens_per_sec=tps)
+
+    def response(self) -> ChatResponse:
+        if not self.chunks:
+            raise StreamError("Stream ended without any chunks")
+        indexes = sorted(set(self._parts) | set(self._roles) | set(self._finish))
+        choices = [
+            ChatChoice(
+                index=i,
+                message=Message(role=self._roles.get(i, "assistant"), content="".join(self._parts.get(i, []))),
+                finish_reason=self._finish.get(i),
+            )
+            for i in indexes
+        ]
+        return ChatResponse(
+            id=str(self._meta.get("id", "")),
+            object="chat.completion",
+            created=int(self._meta.get("created", 0)),
+            model=str(self._meta.get("model", "")),
+            choices=choices,
+            usage=self._usage,
+            stats=self.stats(),
+        )
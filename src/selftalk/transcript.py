@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Union
+
+TranscriptEntry = Dict[str, Any]
+
+
+class TranscriptSink(Protocol):
+    # Receives transcript entries as the engine produces them
+    def append(self, entry: TranscriptEntry) -> None: ...
+
+    def __iter__(self) -> Iterator[TranscriptEntry]: ...
+
+    def flush(self) -> None: ...
+
+    def close(self) -> None: ...
+
+
+SPLIT_BUCKETS = ("improved", "old", "other")
+
+
+def write_transcript_jsonl(transcript: Iterable[TranscriptEntry], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in transcript:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def read_transcript_jsonl(path: Union[str, Path]) -> Iterator[TranscriptEntry]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _split_bucket(entry: TranscriptEntry) -> str:
+    bucket = entry.get("bucket")
+    return bucket if bucket in ("improved", "old") else "other"
+
+
+def write_transcript_split_json(transcript: Iterable[TranscriptEntry], path: str) -> None:
+    # Streams entries into one spool file per bucket, then stitches them into
+    # the same document json.dump(buckets, indent=2) would produce, so only
+    # one entry is ever held in memory.
+    spools = {name: tempfile.TemporaryFile("w+", encoding="utf-8") for name in SPLIT_BUCKETS}
+    counts = dict.fromkeys(SPLIT_BUCKETS, 0)
+    try:
+        for entry in transcript:
+            name = _split_bucket(entry)
+            spool = spools[name]
+            if counts[name]:
+                spool.write(",\n")
+            text = json.dumps(entry, ensure_ascii=False, indent=2)
+            spool.write("\n".join("    " + line for line in text.split("\n")))
+            counts[name] += 1
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{")
+            for n, name in enumerate(SPLIT_BUCKETS):
+                f.write(",\n" if n else "\n")
+                if not counts[name]:
+                    f.write(f'  "{name}": []')
+                    continue
+                f.write(f'  "{name}": [\n')
+                spools[name].seek(0)
+                shutil.copyfileobj(spools[name], f)
+                f.write("\n  ]")
+            f.write("\n}")
+    finally:
+        for spool in spools.values():
+            spool.close()
+
+
+def split_jsonl_to_json(src: Union[str, Path], dst: Union[str, Path]) -> None:
+    # Builds the split .json view from a streamed JSONL transcript in one pass
+    write_transcript_split_json(read_transcript_jsonl(src), str(dst))
+
+
+_ENTRY_KEYS = ("ts", "role", "content", "model", "iteration")
+_OPTIONAL_KEYS = ("stage", "bucket", "call")
+
+
+class _Entry:
+    # One turn of a CompactTranscript. content is the same str object as in the
+    # message history; role/model/stage/bucket are interned, so a run holds one
+    # copy of each; ts is time.time() until the entry is serialized (or the
+    # original string of an entry that came in as a dict, e.g. when replaying).
+    __slots__ = ("ts", "role", "content", "model", "iteration", "stage", "bucket", "call")
+
+    def __init__(self, ts, role, content, model, iteration, stage, bucket, call):
+        self.ts = ts
+        self.role = role
+        self.content = content
+        self.model = model
+        self.iteration = iteration
+        self.stage = stage
+        self.bucket = bucket
+        self.call = call
+
+    def to_dict(self) -> TranscriptEntry:
+        # Same keys in the same order as the dicts engine._append_transcript
+        # builds, so JSONL written from either is byte for byte the same
+        ts = self.ts
+        if not isinstance(ts, str):
+            ts = datetime.fromtimestamp(ts, timezone.utc).isoformat()
+        entry: TranscriptEntry = {
+            "ts": ts,
+            "role": self.role,
+            "content": self.content,
+            "model": self.model,
+            "iteration": self.iteration,
+        }
+        if self.stage is not None:
+            entry["stage"] = self.stage
+        if self.bucket is not None:
+            entry["bucket"] = self.bucket
+        if self.call is not None:
+            entry["call"] = self.call
+        return entry
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if type(value) is str else value
+
+
+class CompactTranscript:
+    # Opt-in in-memory sink for long runs: engine.run(cfg, sink=CompactTranscript()).
+    # Nothing in the package uses it by default. Entries are kept as slotted
+    # records rather than dicts (about 60% of the memory of the dicts; about
+    # 70% of a whole run's transcript once content and call stats are counted)
+    # and turned back into dicts only when iterated or indexed. Dicts appended
+    # from outside that do not follow the engine's layout are kept as they are.
+
+    def __init__(self, entries: Iterable[TranscriptEntry] = ()):
+        self._entries: List[Union[_Entry, TranscriptEntry]] = []
+        for entry in entries:
+            self.append(entry)
+
+    def add(
+        self,
+        role: str,
+        content: str,
+        model: str,
+        iteration: Optional[int],
+        *,
+        stage: Optional[str] = None,
+        bucket: Optional[str] = None,
+        call: Optional[Dict[str, Any]] = None,
+        ts: Optional[float] = None,
+    ) -> None:
+        self._entries.append(
+            _Entry(
+                time.time() if ts is None else ts,
+                _intern(role),
+                content,
+                _intern(model),
+                iteration,
+                _intern(stage),
+                _intern(bucket),
+                call,
+            )
+        )
+
+    def append(self, entry: TranscriptEntry) -> None:
+        keys = tuple(entry)
+        n = len(_ENTRY_KEYS)
+        # Compact only what to_dict() gives back unchanged
+        if (
+            keys[:n] == _ENTRY_KEYS
+            and keys[n:] == tuple(k for k in _OPTIONAL_KEYS if k in entry)
+            and all(entry[k] is not None for k in keys[n:])
+            and isinstance(entry["ts"], str)
+        ):
+            self._entries.append(
+                _Entry(
+                    entry["ts"],
+                    _intern(entry["role"]),
+                    entry["content"],
+                    _intern(entry["model"]),
+                    entry["iteration"],
+                    _intern(entry.get("stage")),
+                    _intern(entry.get("bucket")),
+                    entry.get("call"),
+                )
+            )
+        else:
+            self._entries.append(entry)
+
+    @staticmethod
+    def _as_dict(item: Union[_Entry, TranscriptEntry]) -> TranscriptEntry:
+        return item.to_dict() if type(item) is _Entry else item
+
+    def __iter__(self) -> Iterator[TranscriptEntry]:
+        return map(self._as_dict, self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._as_dict(item) for item in self._entries[index]]
+        return self._as_dict(self._entries[index])
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (CompactTranscript, Sequence)) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"CompactTranscript({list(self)!r})"
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class JsonlTranscriptSink:
+    # Appends each entry to a JSONL file as soon as the engine produces it, so
+    # an interrupted run keeps every completed turn and memory stays flat.
+    #
+    # Lines go through a write buffer; flush_every entries force a flush to the
+    # OS and fsync_interval_s (if set) bounds how long data may sit in the OS
+    # cache before an fsync. close() always flushes and fsyncs.
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        *,
+        append: bool = False,
+        flush_every: int = 1,
+        fsync_interval_s: Optional[float] = None,
+        buffer_size: int = 64 * 1024,
+    ):
+        self.path = Path(path)
+        self.flush_every = max(1, flush_every)
+        self.fsync_interval_s = fsync_interval_s
+        self.count = 0
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh: Optional[IO[str]] = open(
+            self.path, "a" if append else "w", encoding="utf-8", buffering=buffer_size
+        )
+
+    def __enter__(self) -> "JsonlTranscriptSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(self, entry: TranscriptEntry) -> None:
+        self._fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._fh is None:
+            return
+        self._fh.flush()
+        self._pending = 0
+        if self.fsync_interval_s is not None and time.monotonic() - self._last_fsync >= self.fsync_interval_s:
+            os.fsync(self._fh.fileno())
+            self._last_fsync = time.monotonic()
+
+    def __iter__(self) -> Iterator[TranscriptEntry]:
+        # Re-reads the file, e.g. for summaries, without keeping entries around
+        self.flush()
+        return read_transcript_jsonl(self.path)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        if self._fh is None:
+            return
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._fh.close()
+        self._fh = None
+
+
+class TeeTranscriptSink:
+    # Forwards every entry to several sinks, e.g. the JSONL file and a
+    # TranscriptStore; iterating reads back from the first one.
+
+    def __init__(self, *sinks: TranscriptSink):
+        self.sinks = sinks
+
+    def append(self, entry: TranscriptEntry) -> None:
+        for sink in self.sinks:
+            sink.append(entry)
+
+    def __iter__(self) -> Iterator[TranscriptEntry]:
+        return iter(self.sinks[0])
+
+    def __len__(self) -> int:
+        return len(self.sinks[0])
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+
+from selftalk.client import AsyncMistralClient
+from selftalk.engine import AsyncSelfTalkEngine, EngineConfig
+from selftalk.models import ChatRequest, ChatResponse, ChatChoice, Message
+
+
+class FakeAsyncClient:
+    def __init__(self, model: str = "mistral-large-latest"):
+        self.model = model
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def chat(self, request):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+        finally:
+            self.in_flight -= 1
+        # Echo the goal so results can be matched to their configs
+        goal = request.messages[1].content
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=self.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"{goal} #{len(request.messages)}"))],
+        )
+
+
+def _cfg(goal: str, mode: str = "critic") -> EngineConfig:
+    return EngineConfig(system_prompt="You are helpful.", user_goal=goal, iterations=2, mode=mode)
+
+
+def test_async_engine_matches_sync_transcript_shape():
+    fake = FakeAsyncClient()
+    engine = AsyncSelfTalkEngine(client=fake)
+
+    final, transcript = asyncio.run(engine.run(_cfg("g")))
+    assert final == "g #10"
+    assert len(transcript) == 11
+    assert fake.calls == 5
+
+    final, transcript = asyncio.run(engine.run(_cfg("g", mode="debate")))
+    assert final == "g #11"
+    assert len(transcript) == 12
+
+
+def test_run_many_respects_concurrency_and_order():
+    fake = FakeAsyncClient()
+    engine = AsyncSelfTalkEngine(client=fake, concurrency=3)
+    cfgs = [_cfg(f"goal {n}") for n in range(10)]
+
+    results = asyncio.run(engine.run_many(cfgs))
+
+    assert [final for final, _ in results] == [f"goal {n} #10" for n in range(10)]
+    assert fake.max_in_flight == 3
+    assert fake.calls == 50
+
+
+def test_run_many_return_exceptions():
+    fake = FakeAsyncClient()
+    engine = AsyncSelfTalkEngine(client=fake)
+    cfgs = [_cfg("ok"), _cfg("bad", mode="nope")]
+
+    results = asyncio.run(engine.run_many(cfgs, return_exceptions=True))
+
+    assert results[0][0] == "ok #10"
+    assert isinstance(results[1], ValueError)
+
+
+def test_async_client_retries_with_asyncio_sleep(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr("selftalk.client.asyncio.sleep", fake_sleep)
+
+    statuses = iter([429, 503, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(statuses)
+        if status != 200:
+            return httpx.Response(status)
+        return httpx.Response(
+            200,
+            json={
+                "id": "x",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "m",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "hi"}}],
+            },
+        )
+
+    async def go():
+        client = AsyncMistralClient(api_key="k")
+        client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async with client:
+            req = ChatRequest(model="m", messages=[Message(role="user", content="q")])
+            return await client.chat(req)
+
+    resp = asyncio.run(go())
+    assert resp.first_message_content() == "hi"
+    assert len(sleeps) == 2
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+
+from selftalk.batch import BatchInputError, DirBatchOutput, JsonlBatchOutput, parse_batch_items, run_batch
+from selftalk.engine import AsyncSelfTalkEngine, EngineConfig
+from selftalk.models import ChatResponse, ChatChoice, Message
+from selftalk.store import TranscriptStore
+
+
+class FakeAsyncClient:
+    def __init__(self, fail_goals=()):
+        self.fail_goals = set(fail_goals)
+        self.goals = []
+
+    async def chat(self, request):
+        goal = request.messages[1].content
+        self.goals.append(goal)
+        if goal in self.fail_goals:
+            raise RuntimeError(f"boom on {goal}")
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"answer to {goal}"))],
+        )
+
+
+DEFAULTS = EngineConfig(system_prompt="You are helpful.", user_goal=None, iterations=1)
+
+
+def test_parse_batch_items_overrides_and_ids():
+    lines = [
+        json.dumps({"id": "a", "goal": "first", "model": "small", "iterations": 2}),
+        "",
+        json.dumps("second"),
+    ]
+    items = parse_batch_items(lines, DEFAULTS)
+
+    assert [i.id for i in items] == ["a", "3"]
+    assert items[0].cfg.user_goal == "first"
+    assert items[0].cfg.model == "small"
+    assert items[0].cfg.iterations == 2
+    assert items[1].cfg.model == DEFAULTS.model
+    assert items[1].cfg.system_prompt == "You are helpful."
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "{not json",
+        json.dumps({"goal": "x", "colour": "red"}),
+        json.dumps({"goal": "x", "mode": "chaos"}),
+        json.dumps({"id": "../x", "goal": "x"}),
+    ],
+)
+def test_parse_batch_items_rejects_bad_lines(line):
+    with pytest.raises(BatchInputError):
+        parse_batch_items([line], DEFAULTS)
+
+
+def test_run_batch_jsonl_resumes_after_failure(tmp_path):
+    items = parse_batch_items([json.dumps({"id": str(n), "goal": f"g{n}"}) for n in range(5)], DEFAULTS)
+    out = tmp_path / "results.jsonl"
+
+    fake = FakeAsyncClient(fail_goals={"g3"})
+    stats = asyncio.run(run_batch(AsyncSelfTalkEngine(client=fake), items, JsonlBatchOutput(out), concurrency=2))
+    assert (stats.succeeded, stats.failed, stats.skipped) == (4, 1, 0)
+
+    fake = FakeAsyncClient()
+    stats = asyncio.run(run_batch(AsyncSelfTalkEngine(client=fake), items, JsonlBatchOutput(out), concurrency=2))
+    assert (stats.succeeded, stats.failed, stats.skipped) == (1, 0, 4)
+    assert set(fake.goals) == {"g3"}
+
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    ok = {r["id"]: r for r in records if r["status"] == "ok"}
+    assert sorted(ok) == ["0", "1", "2", "3", "4"]
+    assert ok["3"]["final"] == "answer to g3"
+    assert len(ok["3"]["transcript"]) == 7
+
+
+def test_run_batch_jsonl_resumes_twice_after_a_torn_line(tmp_path):
+    items = parse_batch_items([json.dumps({"id": str(n), "goal": f"g{n}"}) for n in range(3)], DEFAULTS)
+    out = tmp_path / "results.jsonl"
+    asyncio.run(run_batch(AsyncSelfTalkEngine(client=FakeAsyncClient()), items[:2], JsonlBatchOutput(out)))
+    with open(out, "a", encoding="utf-8") as f:
+        f.write('{"id": "2", "status": "o')  # crashed mid-write
+
+    fake = FakeAsyncClient()
+    stats = asyncio.run(run_batch(AsyncSelfTalkEngine(client=fake), items, JsonlBatchOutput(out)))
+    assert (stats.succeeded, stats.skipped) == (1, 2)
+    assert set(fake.goals) == {"g2"}
+
+    fake = FakeAsyncClient()
+    stats = asyncio.run(run_batch(AsyncSelfTalkEngine(client=fake), items, JsonlBatchOutput(out)))
+    assert (stats.succeeded, stats.skipped) == (0, 3)
+    assert fake.goals == []
+    assert [json.loads(line)["id"] for line in out.read_text(encoding="utf-8").splitlines()] == ["0", "1", "2"]
+
+
+def test_torn_line_is_cut_across_read_chunks(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text('{"id": "0"}\n' + "x" * 50, encoding="utf-8")
+    output = JsonlBatchOutput(out)
+    output._cut_torn_line(chunk_size=8)
+    assert out.read_text(encoding="utf-8") == '{"id": "0"}\n'
+
+    out.write_text("x" * 50, encoding="utf-8")
+    output._cut_torn_line(chunk_size=8)
+    assert out.read_text(encoding="utf-8") == ""
+
+
+def test_run_batch_out_dir(tmp_path):
+    items = parse_batch_items([json.dumps({"id": "x", "goal": "gx"}), json.dumps({"id": "y", "goal": "gy"})], DEFAULTS)
+    out_dir = tmp_path / "out"
+
+    asyncio.run(run_batch(AsyncSelfTalkEngine(client=FakeAsyncClient()), items, DirBatchOutput(out_dir)))
+
+    assert (out_dir / "x.result.txt").read_text(encoding="utf-8") == "answer to gx"
+    assert len((out_dir / "y.transcript.jsonl").read_text(encoding="utf-8").splitlines()) == 7
+    assert DirBatchOutput(out_dir).completed_ids() == {"x", "y"}
+
+
+def test_run_batch_records_goals_in_store(tmp_path):
+    items = parse_batch_items([json.dumps({"id": "x", "goal": "gx"}), json.dumps({"id": "y", "goal": "gy", "mode": "debate"})], DEFAULTS)
+    with TranscriptStore(tmp_path / "t.sqlite") as store:
+        asyncio.run(run_batch(AsyncSelfTalkEngine(client=FakeAsyncClient()), items, DirBatchOutput(tmp_path / "out"), store=store))
+        assert {r["run_id"]: r["mode"] for r in store.runs()} == {"x": "critic", "y": "debate"}
+        assert len(list(store.query(run_id="x"))) == 7
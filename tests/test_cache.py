@@ -0,0 +1,166 @@
+import asyncio
+import sqlite3
+import threading
+
+import httpx
+import pytest
+
+from selftalk.cache import ResponseCache, payload_hash
+from selftalk.client import AsyncMistralClient, MistralClient
+from selftalk.models import ChatRequest, Message
+
+
+def _response(content: str) -> dict:
+    return {
+        "id": "x",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "m",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": None,
+    }
+
+
+def test_payload_hash_is_order_independent():
+    assert payload_hash({"a": 1, "b": [1, 2]}) == payload_hash({"b": [1, 2], "a": 1})
+    assert payload_hash({"a": 1}) != payload_hash({"a": 2})
+
+
+def test_cache_roundtrip_and_counters(tmp_path):
+    with ResponseCache(tmp_path / "c.sqlite") as cache:
+        assert cache.get("k") is None
+        cache.put("k", _response("hi"))
+        assert cache.get("k")["choices"][0]["message"]["content"] == "hi"
+        stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"], stats["entries"]) == (1, 1, 1, 1)
+
+
+def test_cache_lru_eviction_by_entries_and_bytes(tmp_path, monkeypatch):
+    clock = iter(range(100, 1000))
+    monkeypatch.setattr("selftalk.cache.time.time", lambda: next(clock))
+    cache = ResponseCache(tmp_path / "c.sqlite", max_entries=2)
+    cache.put("a", _response("a"))
+    cache.put("b", _response("b"))
+    cache.get("a")  # a is now more recently used than b
+    cache.put("c", _response("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+    cache.max_entries = None
+    cache.max_bytes = cache.stats()["bytes"] // 2
+    cache.evict()
+    assert cache.stats()["entries"] == 1
+    assert cache.get("c") is not None
+
+
+def test_cache_age_limit(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("selftalk.cache.time.time", lambda: now[0])
+    cache = ResponseCache(tmp_path / "c.sqlite", max_age_s=60)
+    cache.put("k", _response("old"))
+    now[0] += 61
+    assert cache.get("k") is None
+
+
+def test_cache_read_only_never_writes(tmp_path):
+    path = tmp_path / "c.sqlite"
+    ResponseCache(path).close()
+    cache = ResponseCache(path, read_only=True)
+    cache.put("k", _response("x"))
+    assert cache.get("k") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_client_serves_repeats_from_cache_and_can_bypass(tmp_path):
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=_response(f"answer {len(calls)}"))
+
+    cache = ResponseCache(tmp_path / "c.sqlite")
+    client = MistralClient(api_key="k", cache=cache)
+    client._http = httpx.Client(transport=httpx.MockTransport(handler))
+    req = ChatRequest(model="m", messages=[Message(role="user", content="q")], temperature=0.0)
+
+    first = client.chat(req)
+    second = client.chat(req)
+    bypass = client.chat(req, use_cache=False)
+
+    assert first.first_message_content() == "answer 1"
+    assert second.first_message_content() == "answer 1"
+    assert second.stats.cached
+    assert bypass.first_message_content() == "answer 2"
+    assert len(calls) == 2
+
+    # Replay without credentials or network
+    replay = MistralClient(api_key=None, cache=ResponseCache(tmp_path / "c.sqlite", read_only=True))
+    replay.api_key = None
+    assert replay.chat(req).first_message_content() == "answer 1"
+
+
+def test_cache_hits_write_access_times_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr("selftalk.cache.time.time", lambda: 500.0)
+    path = tmp_path / "c.sqlite"
+    cache = ResponseCache(path, touch_batch=3)
+    for key in "abc":
+        cache.put(key, _response(key))
+    monkeypatch.setattr("selftalk.cache.time.time", lambda: 900.0)
+
+    def accessed():
+        with sqlite3.connect(path) as db:
+            return dict(db.execute("SELECT key, accessed FROM responses"))
+
+    cache.get("a")
+    cache.get("b")
+    assert accessed() == {"a": 500.0, "b": 500.0, "c": 500.0}
+    cache.get("a")
+    cache.get("c")  # third distinct key fills the batch
+    assert accessed() == {"a": 900.0, "b": 900.0, "c": 900.0}
+    cache.close()
+
+
+def test_async_client_uses_the_cache_off_the_event_loop(tmp_path):
+    threads = []
+
+    class RecordingCache(ResponseCache):
+        def get(self, key):
+            threads.append(threading.current_thread())
+            return super().get(key)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=_response("answer"))
+
+    req = ChatRequest(model="m", messages=[Message(role="user", content="q")], temperature=0.0)
+
+    async def go():
+        client = AsyncMistralClient(api_key="k", cache=RecordingCache(tmp_path / "c.sqlite"))
+        client._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        tokens = []
+        await client.chat(req)
+        resp = await client.chat(req, on_token=tokens.append)
+        await client.aclose()
+        return resp, tokens
+
+    resp, tokens = asyncio.run(go())
+    assert resp.stats.cached and tokens == ["answer"]
+    assert threads and all(t is not threading.main_thread() for t in threads)
+
+
+def test_cli_cache_limits(tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+
+    from selftalk.cli import app
+    from selftalk.fakeserver import FakeMistralServer
+
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    path = tmp_path / "c.sqlite"
+    with FakeMistralServer() as server:
+        result = CliRunner().invoke(
+            app,
+            ["run", "--system-prompt", "s", "--iterations", "2", "--base-url", server.base_url, "--cache", str(path),
+             "--cache-max-entries", "2", "--out", str(tmp_path / "t.jsonl"), "--result", str(tmp_path / "r.txt")],
+        )
+    assert result.exit_code == 0, result.output
+    with ResponseCache(path) as cache:
+        assert cache.stats()["entries"] == 2
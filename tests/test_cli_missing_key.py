@@ -25,3 +25,19 @@ def test_cli_missing_api_key(monkeypatch):
 
     assert result.exit_code == 1
     assert "MISTRAL_API_KEY is not set" in result.stdout
+
+
+def test_cli_batch_missing_api_key(monkeypatch, tmp_path):
+    runner = CliRunner()
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    goals = tmp_path / "goals.jsonl"
+    goals.write_text('{"goal": "Test goal"}\n', encoding="utf-8")
+
+    result = runner.invoke(
+        app,
+        ["batch", "--input", str(goals), "--system-prompt", "You are helpful", "--out", str(tmp_path / "r.jsonl")],
+        catch_exceptions=False,
+    )
+
+    assert result.exit_code == 1
+    assert "MISTRAL_API_KEY is not set" in result.stdout
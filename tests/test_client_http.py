@@ -0,0 +1,105 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from selftalk.client import (
+    AsyncMistralClient,
+    HTTPSettings,
+    MistralAPIError,
+    MistralClient,
+    build_http_client,
+)
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.fakeserver import FakeMistralServer
+from selftalk.models import ChatRequest, Message
+
+REQUEST = ChatRequest(model="m", messages=[Message(role="user", content="hi")], max_tokens=4)
+
+
+def test_settings_map_to_httpx_timeouts():
+    timeout = HTTPSettings(connect_timeout_s=2.0, read_timeout_s=60.0).timeout(30.0)
+    assert (timeout.connect, timeout.read, timeout.write, timeout.pool) == (2.0, 60.0, 30.0, 30.0)
+
+    client = MistralClient(api_key="k", timeout=10.0, http=HTTPSettings(write_timeout_s=1.0))
+    assert client._http.timeout.write == 1.0 and client._http.timeout.read == 10.0
+    client.close()
+
+
+def test_owned_pool_is_closed_and_shared_pool_is_not():
+    with MistralClient(api_key="k") as owned:
+        pass
+    assert owned._http.is_closed
+
+    shared = build_http_client()
+    with MistralClient(api_key="a", http_client=shared), MistralClient(api_key="b", http_client=shared):
+        pass
+    assert not shared.is_closed
+    shared.close()
+
+
+def test_connections_are_reused_across_threads_and_clients():
+    with FakeMistralServer() as server:
+        pool = build_http_client(HTTPSettings(max_connections=4))
+        clients = [MistralClient(api_key=f"k{n}", base_url=server.base_url, http_client=pool) for n in range(2)]
+
+        def work(client):
+            for _ in range(10):
+                client.chat(REQUEST)
+
+        threads = [threading.Thread(target=work, args=(clients[n % 2],)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        pool.close()
+        stats = server.stats.snapshot()
+    assert stats["requests"] == 40
+    assert stats["connections"] <= 4
+
+
+def test_engine_closes_only_its_own_client():
+    with FakeMistralServer() as server:
+        client = MistralClient(api_key="k", base_url=server.base_url)
+        cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=1)
+        with SelfTalkEngine(client=client, quiet=True) as engine:
+            engine.run(cfg)
+        assert not client._http.is_closed
+        client.chat(REQUEST)
+        client.close()
+        assert server.stats.snapshot()["connections"] == 1
+
+
+def test_async_client_shares_pool():
+    async def _go(base_url):
+        async with httpx.AsyncClient() as pool:
+            async with AsyncMistralClient(api_key="k", base_url=base_url, http_client=pool) as client:
+                await asyncio.gather(*(client.chat(REQUEST) for _ in range(5)))
+            assert not pool.is_closed
+
+    with FakeMistralServer() as server:
+        asyncio.run(_go(server.base_url))
+
+
+def test_http2_without_h2_is_reported(monkeypatch):
+    import builtins
+
+    real_import = builtins.__import__
+
+    def no_h2(name, *args, **kwargs):
+        if name == "h2":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_h2)
+    with pytest.raises(MistralAPIError, match="h2"):
+        MistralClient(api_key="k", http=HTTPSettings(http2=True))
+
+
+def test_cli_timeouts_map_to_settings():
+    from selftalk.cli import _http_settings
+
+    settings = _http_settings(10, 30.0, False, 1.0, 2.0, 3.0, 4.0)
+    timeout = settings.timeout(30.0)
+    assert (timeout.connect, timeout.read, timeout.write, timeout.pool) == (1.0, 2.0, 3.0, 4.0)
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.cli import app
+from selftalk.client import AsyncMistralClient, MistralClient
+from selftalk.coalesce import RequestCoalescer
+from selftalk.errors import DeadlineExceeded
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.models import ChatRequest, Message
+
+
+def _request(seed=1, stream=False):
+    return ChatRequest(
+        model="m", messages=[Message(role="user", content="hi")], temperature=0.0, random_seed=seed, stream=stream
+    )
+
+
+def test_identical_in_flight_requests_go_out_once():
+    coalescer = RequestCoalescer()
+    with FakeMistralServer(FakeServerConfig(latency_s=0.3, response_tokens=3)) as server:
+        clients = [MistralClient(api_key="k", base_url=server.base_url, coalescer=coalescer) for _ in range(2)]
+        results = [None] * 6
+        tokens = []
+        barrier = threading.Barrier(6)
+
+        def call(n):
+            barrier.wait()
+            # Streamed and plain requests share a flight, like cache keys
+            results[n] = clients[n % 2].chat(_request(stream=n == 0), on_token=tokens.append if n else None)
+
+        threads = [threading.Thread(target=call, args=(n,)) for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for client in clients:
+            client.close()
+        requests = server.stats.snapshot()["requests"]
+
+    assert requests == 1
+    assert coalescer.stats() == {"sent": 1, "saved": 5}
+    assert len({r.first_message_content() for r in results}) == 1
+    assert sum(r.stats.coalesced for r in results) == 5
+    # Waiters that asked for tokens get the whole completion at once
+    assert len(tokens) == sum(1 for n in range(1, 6) if results[n].stats.coalesced)
+
+
+def test_different_payloads_and_sequential_calls_are_not_coalesced():
+    coalescer = RequestCoalescer()
+    with FakeMistralServer() as server, MistralClient(api_key="k", base_url=server.base_url, coalescer=coalescer) as client:
+        client.chat(_request(seed=1))
+        client.chat(_request(seed=1))
+        client.chat(_request(seed=2))
+        assert server.stats.snapshot()["requests"] == 3
+    assert coalescer.saved == 0
+
+
+def test_waiters_get_the_leaders_exception():
+    coalescer = RequestCoalescer()
+    started = threading.Event()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    def call():
+        try:
+            coalescer.call("k", failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait(5)
+    waiter = threading.Thread(target=call)
+    waiter.start()
+    while coalescer.saved == 0:
+        pass
+    release.set()
+    leader.join()
+    waiter.join()
+    assert [str(e) for e in errors] == ["boom", "boom"]
+    # The failed flight is gone; the next call goes out again
+    assert coalescer.call("k", lambda: 1) == (1, False)
+
+
+def test_waiters_give_up_at_their_own_deadline():
+    coalescer = RequestCoalescer()
+    release = threading.Event()
+    leader = threading.Thread(target=coalescer.call, args=("k", lambda: release.wait(5) and "slow"))
+    leader.start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        coalescer.call("k", lambda: "never", deadline=started + 0.1)
+    assert time.monotonic() - started < 1.0
+    release.set()
+    leader.join()
+
+    async def go():
+        gate = asyncio.Event()
+
+        async def slow():
+            await gate.wait()
+            return "slow"
+
+        first = asyncio.ensure_future(coalescer.acall("k", slow))
+        await asyncio.sleep(0)
+        with pytest.raises(DeadlineExceeded):
+            await coalescer.acall("k", slow, deadline=time.monotonic() + 0.1)
+        gate.set()
+        return await first  # the leader's call was not cancelled
+
+    assert asyncio.run(go()) == ("slow", False)
+
+
+def test_async_client_coalesces_concurrent_tasks():
+    coalescer = RequestCoalescer()
+
+    async def go(base_url):
+        async with AsyncMistralClient(api_key="k", base_url=base_url, coalescer=coalescer) as client:
+            return await asyncio.gather(*(client.chat(_request()) for _ in range(5)))
+
+    with FakeMistralServer(FakeServerConfig(latency_s=0.1)) as server:
+        results = asyncio.run(go(server.base_url))
+        assert server.stats.snapshot()["requests"] == 1
+    assert [r.stats.coalesced for r in results] == [False, True, True, True, True]
+
+
+def test_cli_batch_coalesce(tmp_path, monkeypatch):
+    goals = tmp_path / "goals.jsonl"
+    goals.write_text("\n".join(json.dumps({"id": str(n), "goal": "same goal"}) for n in range(4)), encoding="utf-8")
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    with FakeMistralServer(FakeServerConfig(latency_s=0.05, response_tokens=4)) as server:
+        result = CliRunner().invoke(
+            app,
+            ["batch", "--input", str(goals), "--system-prompt", "s", "--iterations", "1", "--temperature", "0",
+             "--seed", "7", "--coalesce", "--out", str(tmp_path / "r.jsonl"), "--base-url", server.base_url],
+        )
+        requests = server.stats.snapshot()["requests"]
+    assert result.exit_code == 0, result.output
+    # Every step of the four identical runs is in flight together
+    assert requests == 3
+    assert "Coalescing: 9 calls saved, 3 sent" in result.output
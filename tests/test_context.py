@@ -0,0 +1,81 @@
+import pytest
+
+from selftalk.context import estimate_tokens, select_context
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.models import ChatChoice, ChatResponse, Message
+
+
+def _msgs(n):
+    head = [Message(role="system", content="sys"), Message(role="user", content="goal")]
+    return head + [Message(role="assistant" if k % 2 else "user", content=f"m{k}" * 10) for k in range(n)]
+
+
+def test_select_context_strategies():
+    messages = _msgs(6)
+    assert select_context(messages, "full", pinned=2, anchor=2) == messages
+    window = select_context(messages, "window", pinned=2, anchor=2, window=2)
+    assert window == messages[:2] + messages[-2:]
+    latest = select_context(messages, "latest", pinned=2, anchor=5)
+    assert latest == messages[:2] + messages[5:]
+    with pytest.raises(ValueError):
+        select_context(messages, "everything", pinned=2, anchor=2)
+
+
+def test_select_context_budget_keeps_pinned_and_newest():
+    messages = _msgs(6)
+    budget = estimate_tokens(messages[:2] + messages[-1:])
+    trimmed = select_context(messages, "full", pinned=2, anchor=2, budget_tokens=budget)
+    assert trimmed == messages[:2] + messages[-1:]
+    # An impossible budget still sends the instruction being answered
+    assert select_context(messages, "full", pinned=2, anchor=2, budget_tokens=1)[-1] == messages[-1]
+
+
+class RecordingClient:
+    def __init__(self):
+        self.prompt_sizes = []
+        self.calls = 0
+
+    def chat(self, request):
+        self.calls += 1
+        self.prompt_sizes.append(len(request.messages))
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"out {self.calls}"))],
+        )
+
+
+def _run(mode, context, iterations=5):
+    fake = RecordingClient()
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=iterations, mode=mode, context=context)
+    final, transcript = SelfTalkEngine(client=fake, quiet=True).run(cfg)
+    return fake, final, transcript
+
+
+def test_critic_latest_context_stays_bounded():
+    full, full_final, _ = _run("critic", "full")
+    latest, latest_final, transcript = _run("critic", "latest")
+
+    assert full.prompt_sizes[-1] == 22
+    # draft, then per round: answer+critic prompt, answer+critic prompt+critique+revise prompt
+    assert latest.prompt_sizes == [2] + [4, 6] * 5
+    assert latest_final == full_final
+    calls = [e["call"] for e in transcript if "call" in e]
+    assert calls[-1]["prompt_messages"] == 6
+    assert calls[-1]["prompt_tokens_est"] < calls[-1]["history_tokens_est"]
+
+
+def test_debate_latest_and_window_context_stay_bounded():
+    latest, _, _ = _run("debate", "latest")
+    # Pro sees the previous round, Con and the judge the current one
+    assert latest.prompt_sizes == [3, 5] + [7, 5] * 4 + [7]
+
+    window, _, _ = _run("debate", "window")
+    assert max(window.prompt_sizes) == 8
+
+
+def test_engine_rejects_unknown_context():
+    with pytest.raises(ValueError):
+        _run("critic", "nope")
@@ -0,0 +1,124 @@
+import io
+import json
+
+import pytest
+from rich.console import Console
+from typer.testing import CliRunner
+
+from selftalk import cli
+from selftalk.batch import parse_batch_items
+from selftalk.cli import app
+from selftalk.client import MistralClient
+from selftalk.dashboard import RunDashboard
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.jobqueue import JobQueue, run_worker
+from selftalk.models import CallStats, ChatChoice, ChatRequest, ChatResponse, Message
+
+REQUEST = ChatRequest(model="m", messages=[Message(role="user", content="hi")])
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _response(**stats):
+    return ChatResponse(
+        id="chatcmpl_fake",
+        object="chat.completion",
+        created=0,
+        model="m",
+        choices=[ChatChoice(index=0, message=Message(role="assistant", content="ok"))],
+        usage={"prompt_tokens": 6, "completion_tokens": 4, "total_tokens": 10},
+        stats=CallStats(**stats),
+    )
+
+
+def test_counts_calls_and_runs():
+    clock = Clock()
+    board = RunDashboard(clock=clock)
+    board.runs_planned(5, skipped=1)
+    for n in range(20):
+        board.run_started()
+        board.before_call(REQUEST)
+        board.after_call(REQUEST, _response(cached=n < 5), None, 0.1 * (n + 1))
+        board.run_finished(ok=n % 10 != 9)
+    board.before_call(REQUEST)
+    board.after_call(REQUEST, _response(retries=2, status_history=[429, 503, 200]), None, 5.0)
+    board.before_call(REQUEST)
+    board.after_call(REQUEST, None, RuntimeError("boom"), 1.0)
+    board.run_started()
+    board.before_call(REQUEST)
+    clock.now = 10.0
+
+    s = board.snapshot()
+    assert (s["runs_in_flight"], s["runs_succeeded"], s["runs_failed"]) == (1, 18, 2)
+    assert (s["calls"], s["calls_in_flight"], s["call_errors"]) == (22, 1, 1)
+    assert (s["calls_per_s"], s["tokens_per_s"]) == pytest.approx((2.2, 21.0))
+    assert (s["p50_s"], s["p95_s"]) == pytest.approx((1.1, 2.0))
+    assert (s["retries"], s["rate_limited"]) == (2, 1)
+    assert s["cache_hit_rate"] == 5 / 21
+
+
+def test_live_view_only_on_a_terminal():
+    board = RunDashboard()
+    board.runs_planned(3)
+    board.run_started()
+
+    terminal = Console(file=io.StringIO(), force_terminal=True, width=80)
+    with board.live(terminal, refresh_per_second=20):
+        pass
+    text = terminal.file.getvalue()
+    assert "runs in flight" in text and "0 / 3" in text and "cache hit rate" in text
+
+    log = Console(file=io.StringIO(), force_terminal=False)
+    with board.live(log):
+        pass
+    assert log.file.getvalue() == ""
+
+
+def _batch(tmp_path, server, *extra):
+    goals = tmp_path / "goals.jsonl"
+    goals.write_text("".join(json.dumps({"id": f"g{n}", "goal": f"goal {n}"}) + "\n" for n in range(3)), encoding="utf-8")
+    return CliRunner().invoke(
+        app,
+        ["batch", "--input", str(goals), "--system-prompt", "s", "--iterations", "1", "--base-url", server.base_url,
+         "--out", str(tmp_path / "out.jsonl"), *extra],
+    )
+
+
+def test_cli_batch_dashboard(tmp_path, monkeypatch):
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    terminal = Console(file=io.StringIO(), force_terminal=True, width=100)
+    with FakeMistralServer(FakeServerConfig(rate_limit_rate=0.3, retry_after_s=None, seed=1)) as server:
+        # CliRunner output is not a terminal: plain summary lines only
+        result = _batch(tmp_path, server)
+        assert result.exit_code == 0, result.output
+        assert "runs in flight" not in result.output
+
+        monkeypatch.setattr(cli, "console", terminal)
+        result = _batch(tmp_path, server, "--no-resume")
+        assert result.exit_code == 0, result.output
+        text = terminal.file.getvalue()
+        assert "3 / 3" in text and "retries / 429s" in text and "Batch done" in text
+
+        terminal.file.truncate(0)
+        result = _batch(tmp_path, server, "--no-resume", "--no-dashboard")
+        assert result.exit_code == 0, result.output
+        assert "runs in flight" not in terminal.file.getvalue()
+
+
+def test_worker_reports_jobs(tmp_path):
+    board = RunDashboard()
+    items = parse_batch_items(['"a"', '"b"'], EngineConfig(system_prompt="s", user_goal=None, iterations=1))
+    with FakeMistralServer(FakeServerConfig()) as server, JobQueue(tmp_path / "q.sqlite") as queue:
+        queue.enqueue(items)
+        with MistralClient(api_key="k", base_url=server.base_url) as client:
+            run_worker(queue, SelfTalkEngine(client=client, quiet=True, hooks=[board]), monitor=board)
+    s = board.snapshot()
+    assert (s["runs_in_flight"], s["runs_succeeded"], s["calls"]) == (0, 2, 6)
+    assert s["tokens"] > 0 and s["p95_s"] is not None
@@ -0,0 +1,237 @@
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.cli import app
+from selftalk.client import AsyncMistralClient, MistralClient
+from selftalk.engine import AsyncSelfTalkEngine, EngineConfig, SelfTalkEngine
+from selftalk.errors import DeadlineExceeded, MistralAPIError
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.hedging import Hedger
+from selftalk.models import ChatChoice, ChatRequest, ChatResponse, Message
+from selftalk.ratelimit import RateLimiter
+
+REQUEST = ChatRequest(model="m", messages=[Message(role="user", content="hi")], max_tokens=4)
+
+
+class ScriptedClient:
+    # Answers "answer N"; calls for which slow(n, request) holds miss their deadline
+    def __init__(self, slow):
+        self.slow = slow
+        self.deadlines = []
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def _answer(self, request, deadline):
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+            self.deadlines.append(deadline)
+        if self.slow(n, request):
+            raise DeadlineExceeded("too slow")
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"answer {n}"))],
+        )
+
+    def chat(self, request, on_token=None, *, deadline=None):
+        return self._answer(request, deadline)
+
+
+class AsyncScriptedClient(ScriptedClient):
+    async def chat(self, request, on_token=None, *, deadline=None):
+        return self._answer(request, deadline)
+
+
+def _stop(transcript):
+    return [e["content"] for e in transcript if e.get("stage") == "stop"]
+
+
+def test_critic_keeps_last_revision():
+    client = ScriptedClient(lambda n, r: n == 4)  # critic of round 2
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=3, call_deadline_s=30)
+    final, transcript = SelfTalkEngine(client=client, quiet=True).run(cfg)
+    assert final == "answer 3"
+    assert _stop(transcript) == ["deadline"]
+    assert all(d is not None and d > time.monotonic() for d in client.deadlines)
+
+
+def test_no_answer_yet_raises():
+    client = ScriptedClient(lambda n, r: False)
+    cfg = EngineConfig(system_prompt="s", user_goal="g", deadline_s=0.0)
+    with pytest.raises(DeadlineExceeded):
+        SelfTalkEngine(client=client, quiet=True).run(cfg)
+    assert client.calls == 0
+
+
+def test_debate_keeps_latest_proposal():
+    client = ScriptedClient(lambda n, r: n == 5)  # the judge after two rounds
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="debate", iterations=2, deadline_s=30)
+    final, transcript = SelfTalkEngine(client=client, quiet=True).run(cfg)
+    assert final == "answer 3"
+    assert _stop(transcript) == ["deadline"]
+    assert [e["stage"] for e in transcript[-2:]] == ["judge_prompt", "stop"]
+
+
+@pytest.mark.parametrize("engine_cls", [SelfTalkEngine, AsyncSelfTalkEngine])
+def test_tournament_keeps_candidates_that_made_it(engine_cls):
+    async_engine = engine_cls is AsyncSelfTalkEngine
+    client = (AsyncScriptedClient if async_engine else ScriptedClient)(lambda n, r: r.temperature < 0.45)
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", candidates=4, deadline_s=30)
+    engine = engine_cls(client=client, quiet=True)
+    final, transcript = asyncio.run(engine.run(cfg)) if async_engine else engine.run(cfg)
+    candidates = [e for e in transcript if e.get("stage") == "candidate"]
+    assert len(candidates) == 2 and final == candidates[0]["content"]
+    assert _stop(transcript) == ["deadline"]
+
+
+def test_tournament_final_judge_deadline_writes_one_stop_entry():
+    client = ScriptedClient(lambda n, r: n == 3)  # the judge of two candidates
+    cfg = EngineConfig(
+        system_prompt="s", user_goal="g", mode="tournament", candidates=2, review_candidates=False, deadline_s=30
+    )
+    final, transcript = SelfTalkEngine(client=client, quiet=True).run(cfg)
+    candidates = [e["content"] for e in transcript if e.get("stage") == "candidate"]
+    assert final == candidates[0]
+    assert _stop(transcript) == ["deadline"]
+    assert [e["stage"] for e in transcript[-2:]] == ["judge_prompt", "stop"]
+
+
+def test_client_gives_up_instead_of_sleeping_past_the_deadline():
+    with FakeMistralServer(FakeServerConfig(server_error_rate=1.0)) as server:
+        with MistralClient(api_key="k", base_url=server.base_url) as client:
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceeded, match="last status"):
+                client.chat(REQUEST, deadline=started + 0.5)
+        assert time.monotonic() - started < 0.5
+        assert server.stats.snapshot()["requests"] == 1
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_last_attempt_reports_its_status_without_sleeping(stream):
+    def handler(request):
+        return httpx.Response(503, text="overloaded", headers={"Retry-After": "1"})
+
+    client = MistralClient(api_key="k", http_client=httpx.Client(transport=httpx.MockTransport(handler)))
+    sleeps = []
+    client._sleep = sleeps.append
+    with pytest.raises(MistralAPIError, match="5 attempt.*HTTP 503 overloaded"):
+        client.chat(REQUEST.model_copy(update={"stream": stream}))
+    assert sleeps == [1.0] * 4
+
+
+@pytest.mark.parametrize("async_client", [False, True])
+def test_client_does_not_wait_on_the_rate_limiter_past_the_deadline(async_client):
+    # The first call takes the only token; the second would wait 2s for the next
+    limiter = RateLimiter(requests_per_sec=0.5)
+
+    def twice(base_url):
+        with MistralClient(api_key="k", base_url=base_url, rate_limiter=limiter) as client:
+            client.chat(REQUEST)
+            client.chat(REQUEST, deadline=time.monotonic() + 0.3)
+
+    async def twice_async(base_url):
+        async with AsyncMistralClient(api_key="k", base_url=base_url, rate_limiter=limiter) as client:
+            await client.chat(REQUEST)
+            await client.chat(REQUEST, deadline=time.monotonic() + 0.3)
+
+    with FakeMistralServer(FakeServerConfig()) as server:
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded, match="no response yet"):
+            asyncio.run(twice_async(server.base_url)) if async_client else twice(server.base_url)
+        assert time.monotonic() - started < 1.0
+        assert server.stats.snapshot()["requests"] == 1
+    assert limiter.state()["acquired"] == 1
+
+
+def test_client_caps_http_timeout_at_the_deadline():
+    with FakeMistralServer(FakeServerConfig(latency_s=2.0)) as server:
+        with MistralClient(api_key="k", base_url=server.base_url) as client:
+            started = time.monotonic()
+            with pytest.raises(DeadlineExceeded):
+                client.chat(REQUEST, deadline=started + 0.3)
+            assert time.monotonic() - started < 1.0
+
+
+def _primed(latency_s=0.01):
+    hedger = Hedger(95, min_samples=5)
+    for _ in range(5):
+        hedger.observe(latency_s)
+    return hedger
+
+
+def test_hedger_duplicates_slow_calls():
+    hedger = _primed()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(1.0 if len(calls) == 1 else 0.0)
+        return len(calls)
+
+    started = time.perf_counter()
+    assert hedger.call(fn) == (2, True)
+    assert time.perf_counter() - started < 0.5
+    assert hedger.call(lambda: "fast") == ("fast", False)
+    assert (hedger.calls, hedger.hedged, hedger.wins) == (2, 1, 1)
+    hedger.close()
+
+
+def test_async_hedger_cancels_the_loser():
+    hedger = _primed()
+    cancelled = []
+
+    async def go():
+        calls = []
+
+        async def fn():
+            calls.append(1)
+            try:
+                await asyncio.sleep(1.0 if len(calls) == 1 else 0.0)
+            except asyncio.CancelledError:
+                cancelled.append(len(calls))
+                raise
+            return len(calls)
+
+        result = await hedger.acall(fn)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(go()) == (2, True)
+    assert cancelled and hedger.wins == 1
+
+
+def test_client_marks_hedged_calls():
+    with FakeMistralServer(FakeServerConfig(latency_s=0.2)) as server:
+        with MistralClient(api_key="k", base_url=server.base_url, hedger=_primed()) as client:
+            resp = client.chat(REQUEST)
+            # The losing request finishes in the background
+            for _ in range(50):
+                if server.stats.snapshot()["requests"] == 2:
+                    break
+                time.sleep(0.02)
+        assert resp.stats.hedged and resp.stats.latency_s >= 0.2
+        assert server.stats.snapshot()["requests"] == 2
+
+
+def test_cli_deadline_returns_best_answer(tmp_path, monkeypatch):
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    out = tmp_path / "t.jsonl"
+    with FakeMistralServer(FakeServerConfig(latency_s=0.2)) as server:
+        result = CliRunner().invoke(
+            app,
+            ["run", "--system-prompt", "s", "--iterations", "5", "--deadline", "0.5", "--base-url", server.base_url,
+             "--out", str(out), "--result", str(tmp_path / "r.txt")],
+        )
+    assert result.exit_code == 0, result.output
+    transcript = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert _stop(transcript) == ["deadline"]
+    assert (tmp_path / "r.txt").read_text(encoding="utf-8")
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.cli import app
+from selftalk.engine import AsyncSelfTalkEngine, EngineConfig, SelfTalkEngine
+from selftalk.models import ChatChoice, ChatResponse, Message
+from selftalk.resume import load_resume_info
+from selftalk.transcript import JsonlTranscriptSink
+
+
+def _reply(request):
+    prompt = request.messages[-1].content
+    if prompt.startswith("Judge:"):
+        content = "merged " + "+".join(line for line in prompt.splitlines() if line.startswith("cand"))
+    elif prompt.startswith("Critic:"):
+        content = "review of " + request.messages[-2].content
+    else:
+        content = f"cand t={request.temperature:.1f} s={request.random_seed}"
+    return ChatResponse(
+        id="chatcmpl_fake",
+        object="chat.completion",
+        created=0,
+        model=request.model,
+        choices=[ChatChoice(index=0, message=Message(role="assistant", content=content))],
+        usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    )
+
+
+class BarrierClient:
+    # Every fan-out must be in flight at once or the barrier times out
+    def __init__(self, width):
+        self.barrier = threading.Barrier(width, timeout=5)
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def chat(self, request):
+        with self._lock:
+            self.requests.append(request)
+        if request.messages[-1].content.startswith("Judge:"):
+            return _reply(request)
+        self.barrier.wait()
+        return _reply(request)
+
+
+class AsyncFakeClient:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def chat(self, request):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return _reply(request)
+
+
+def test_tournament_fans_out_candidates_and_reviews():
+    client = BarrierClient(3)
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", candidates=3, random_seed=7)
+    final, transcript = SelfTalkEngine(client=client, quiet=True).run(cfg)
+
+    stages = [e.get("stage") for e in transcript]
+    assert stages == ["init", "init"] + ["candidate"] * 3 + ["review"] * 3 + ["judge_prompt", "final"]
+    candidates = [e["content"] for e in transcript if e.get("stage") == "candidate"]
+    assert candidates == ["cand t=0.3 s=7", "cand t=0.4 s=8", "cand t=0.5 s=9"]
+    assert final == "merged " + "+".join(candidates)
+    judge_prompt = transcript[-2]["content"]
+    assert "Review of candidate 3:\nreview of cand t=0.5 s=9" in judge_prompt
+    assert len(client.requests) == 7
+
+
+def test_candidate_temperatures_stay_in_the_api_range():
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", candidates=8, temperature=0.7, review_candidates=False)
+    _, transcript = asyncio.run(AsyncSelfTalkEngine(client=AsyncFakeClient(), quiet=True).run(cfg))
+    candidates = [e["content"].split()[1] for e in transcript if e.get("stage") == "candidate"]
+    assert candidates == ["t=0.7", "t=0.8", "t=0.9"] + ["t=1.0"] * 5
+
+    # A temperature set above the cap is kept as it is, not lowered
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", candidates=2, temperature=1.2, review_candidates=False)
+    _, transcript = asyncio.run(AsyncSelfTalkEngine(client=AsyncFakeClient(), quiet=True).run(cfg))
+    assert [e["content"].split()[1] for e in transcript if e.get("stage") == "candidate"] == ["t=1.2", "t=1.2"]
+
+
+@pytest.mark.parametrize("command", ["run", "batch", "worker"])
+def test_cli_rejects_temperatures_above_the_api_range(command):
+    result = CliRunner().invoke(app, [command, "--temperature", "1.5"])
+    assert result.exit_code == 2
+    assert "--temperature" in result.output
+
+
+def test_tournament_brackets_and_byes():
+    client = BarrierClient(5)
+    cfg = EngineConfig(
+        system_prompt="s", user_goal="g", mode="tournament", candidates=5, bracket_size=2, review_candidates=False
+    )
+    final, transcript = SelfTalkEngine(client=client, quiet=True).run(cfg)
+    judged = [(e["stage"], e["iteration"]) for e in transcript if e.get("stage") in ("judge", "final")]
+    # 5 -> 2 judges + bye -> 1 judge + bye -> final
+    assert judged == [("judge", 1), ("judge", 1), ("judge", 2), ("final", 3)]
+    assert transcript[-1]["bucket"] == "improved"
+    assert final == transcript[-1]["content"]
+
+
+def test_async_tournament_runs_candidates_concurrently():
+    client = AsyncFakeClient()
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", candidates=4)
+    final, transcript = asyncio.run(AsyncSelfTalkEngine(client=client).run(cfg))
+    assert client.peak == 4
+    assert final.startswith("merged cand")
+
+
+def test_tournament_stops_early_when_candidates_agree():
+    cfg = EngineConfig(
+        system_prompt="s", user_goal="g", mode="tournament", candidates=3, candidate_temperature_step=0.0, stop_similarity=0.9
+    )
+    final, transcript = SelfTalkEngine(client=BarrierClient(3), quiet=True).run(cfg)
+    assert final == "cand t=0.3 s=None"
+    assert transcript[-1]["stage"] == "stop" and transcript[-1]["content"] == "converged"
+
+
+def test_tournament_resume_replays_fanned_out_calls(tmp_path):
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", candidates=2, bracket_size=2)
+    path = tmp_path / "t.jsonl"
+    with JsonlTranscriptSink(path) as sink:
+        SelfTalkEngine(client=BarrierClient(2), quiet=True).run(cfg, sink=sink)
+    info = load_resume_info(path)
+    assert info.mode == "tournament"
+
+    class NoCalls:
+        def chat(self, request):
+            raise AssertionError("replayed run must not call the API")
+
+    final, transcript = SelfTalkEngine(client=NoCalls(), quiet=True).resume(cfg, info.entries)
+    assert final == info.entries[-1]["content"]
+
+
+def test_tournament_rejects_bad_bracket_size():
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", bracket_size=1)
+    with pytest.raises(ValueError):
+        SelfTalkEngine(client=BarrierClient(1), quiet=True).run(cfg)
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from selftalk.client import AsyncMistralClient, MistralAPIError, MistralClient
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.models import ChatRequest, Message
+
+
+def _request(stream=False):
+    return ChatRequest(model="m", messages=[Message(role="user", content="hi there")], max_tokens=8, stream=stream)
+
+
+def test_client_round_trip_against_fake_server():
+    with FakeMistralServer(FakeServerConfig(response_tokens=20)) as server:
+        client = MistralClient(api_key="fake", base_url=server.base_url)
+        resp = client.chat(_request())
+        assert len(resp.first_message_content().split()) == 8
+        assert resp.usage == {"prompt_tokens": 2, "completion_tokens": 8, "total_tokens": 10}
+
+        tokens = []
+        streamed = client.chat(_request(stream=True), on_token=tokens.append)
+        assert streamed.first_message_content() == resp.first_message_content()
+        assert len(tokens) == 8 and streamed.stats.streamed
+        assert streamed.usage == resp.usage
+        assert server.stats.snapshot()["statuses"] == {200: 2}
+
+
+def test_injected_errors_are_retried(monkeypatch):
+    monkeypatch.setattr("selftalk.client.time.sleep", lambda s: None)
+    cfg = FakeServerConfig(rate_limit_rate=0.3, server_error_rate=0.2, seed=3)
+    with FakeMistralServer(cfg) as server:
+        client = MistralClient(api_key="fake", base_url=server.base_url)
+        results = [client.chat(_request()) for _ in range(10)]
+        stats = server.stats.snapshot()
+    assert stats["statuses"][200] == 10
+    assert stats["requests"] > 10
+    assert sum(r.stats.retries for r in results) == stats["requests"] - 10
+
+
+def test_persistent_errors_exhaust_retries(monkeypatch):
+    monkeypatch.setattr("selftalk.client.time.sleep", lambda s: None)
+    with FakeMistralServer(FakeServerConfig(server_error_rate=1.0)) as server:
+        with pytest.raises(MistralAPIError):
+            MistralClient(api_key="fake", base_url=server.base_url).chat(_request())
+
+
+def test_engines_run_end_to_end_over_http():
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=1)
+    with FakeMistralServer(FakeServerConfig(latency_s=0.01, latency_dist="uniform", seed=1)) as server:
+        final, transcript = SelfTalkEngine(MistralClient(api_key="fake", base_url=server.base_url), quiet=True).run(cfg)
+        assert final and len(transcript) == 7
+
+        async def _async():
+            async with AsyncMistralClient(api_key="fake", base_url=server.base_url) as client:
+                return await asyncio.gather(*(client.chat(_request(stream=True)) for _ in range(4)))
+
+        assert len(asyncio.run(_async())) == 4
+
+
+def test_unknown_latency_distribution():
+    with pytest.raises(ValueError):
+        FakeMistralServer(FakeServerConfig(latency_dist="pareto"))
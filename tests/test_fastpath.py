@@ -0,0 +1,78 @@
+import json
+
+import httpx
+import pytest
+
+from selftalk import fastjson
+from selftalk.client import MistralAPIError, MistralClient
+from selftalk.fakeserver import FakeMistralServer
+from selftalk.models import ChatRequest, Message
+from selftalk.streaming import StreamAccumulator
+
+REQUEST = ChatRequest(
+    model="m",
+    messages=[Message(role="system", content="s"), Message(role="user", content="héllo")],
+    max_tokens=16,
+    random_seed=3,
+)
+
+COMPLETION = {
+    "id": "c1",
+    "object": "chat.completion",
+    "created": 5,
+    "model": "m",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 2, "completion_tokens": 1, "total_tokens": 3},
+}
+
+
+def test_fast_payload_matches_model_dump():
+    fast = MistralClient(api_key="k", fast=True)
+    slow = MistralClient(api_key="k")
+    assert fast._payload(REQUEST) == slow._payload(REQUEST)
+    assert json.loads(fast._body(fast._payload(REQUEST))["content"]) == REQUEST.model_dump(by_alias=True)
+
+
+def test_fast_parse_matches_validated_parse():
+    raw = httpx.Response(200, content=json.dumps(COMPLETION).encode())
+    fast = MistralClient(api_key="k", fast=True)._parse_response(raw)
+    slow = MistralClient(api_key="k")._parse_response(raw)
+    assert fast.model_dump() == slow.model_dump()
+    assert fast.first_message_content() == "ok"
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {"id": "x"},
+        {"choices": "nope"},
+        {"choices": [{"message": {"role": "assistant", "content": None}}]},
+        {"choices": [{"index": 0}]},
+    ],
+)
+def test_fast_parse_rejects_what_the_engine_cannot_use(body):
+    raw = httpx.Response(200, content=json.dumps(body).encode())
+    with pytest.raises(MistralAPIError):
+        MistralClient(api_key="k", fast=True)._parse_response(raw)
+
+
+def test_fast_client_against_fake_server():
+    with FakeMistralServer() as server:
+        with MistralClient(api_key="k", base_url=server.base_url, fast=True) as client:
+            resp = client.chat(REQUEST)
+            streamed = client.chat(REQUEST.model_copy(update={"stream": True}))
+    assert len(resp.first_message_content().split()) == 16
+    assert streamed.first_message_content() == resp.first_message_content()
+    assert resp.stats.latency_s is not None and streamed.stats.streamed
+
+
+def test_stdlib_fallback_without_orjson(monkeypatch):
+    monkeypatch.setattr(fastjson, "orjson", None)
+    assert fastjson.backend() == "json"
+    assert fastjson.loads(fastjson.dumps({"a": "é"})) == {"a": "é"}
+
+
+def test_accumulator_reports_bad_chunks_with_any_backend():
+    acc = StreamAccumulator(loads=fastjson.loads)
+    with pytest.raises(ValueError):
+        acc.feed_line("data: {not json")
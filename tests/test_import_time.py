@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+
+# Modules the CLI must not load before a command actually needs them
+HEAVY = ("httpx", "pydantic", "asyncio", "sqlite3", "dotenv", "selftalk.engine", "selftalk.client")
+
+# Import time of selftalk.cli on top of typer (which brings rich), in microseconds.
+# Measured around 10ms; the budget leaves room for slow CI machines.
+CLI_IMPORT_BUDGET_US = 60_000
+
+
+def _python(code, *args, cwd=None, env=None):
+    return subprocess.run(
+        [sys.executable, *args, "-c", code], capture_output=True, text=True, cwd=cwd, env=env, timeout=60
+    )
+
+
+def _loaded_heavy(extra=""):
+    return f"""
+import json, sys
+{extra}
+print(json.dumps(sorted(m for m in {HEAVY!r} if m in sys.modules)))
+"""
+
+
+def test_cli_import_loads_no_heavy_modules():
+    proc = _python(_loaded_heavy("import selftalk.cli"))
+    assert proc.returncode == 0, proc.stderr
+    assert json.loads(proc.stdout.splitlines()[-1]) == []
+
+
+def test_missing_key_fails_before_loading_the_client(tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != "MISTRAL_API_KEY"}
+    extra = """
+from selftalk.cli import app
+try:
+    app(["run", "--system-prompt", "s", "--goal", "g"])
+except SystemExit as e:
+    print("exit", e.code)
+"""
+    proc = _python(_loaded_heavy(extra), cwd=tmp_path, env=env)
+    assert "MISTRAL_API_KEY is not set" in proc.stdout
+    assert "exit 1" in proc.stdout
+    loaded = json.loads(proc.stdout.splitlines()[-1])
+    assert "httpx" not in loaded and "pydantic" not in loaded and "selftalk.engine" not in loaded
+
+
+def test_cli_import_time_budget():
+    proc = _python("import selftalk.cli", "-X", "importtime")
+    assert proc.returncode == 0, proc.stderr
+    # importtime lists children before their parent, two spaces deeper
+    rows = []
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[0].strip().split(":")[-1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        rows.append((len(name) - len(name.lstrip()), name.strip(), int(parts[0].split(":")[-1]), int(parts[1])))
+    index = next(n for n, row in enumerate(rows) if row[1] == "selftalk.cli")
+    depth, _, own, _ = rows[index]
+    for child_depth, name, _, cumulative in reversed(rows[:index]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 2 and name.split(".")[0] not in ("typer", "rich"):
+            own += cumulative
+    assert own < CLI_IMPORT_BUDGET_US, f"selftalk.cli import took {own}us on top of typer"
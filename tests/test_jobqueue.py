@@ -0,0 +1,149 @@
+import json
+import threading
+
+from typer.testing import CliRunner
+
+from selftalk.batch import parse_batch_items
+from selftalk.cli import app
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.jobqueue import JobQueue, config_from_json, config_to_json, run_worker
+from selftalk.models import ChatChoice, ChatResponse, Message
+from selftalk.stages import StageSettings
+from selftalk.store import TranscriptStore
+
+DEFAULTS = EngineConfig(system_prompt="s", user_goal=None, iterations=1)
+
+
+class FakeClient:
+    def __init__(self, fail_goals=()):
+        self.fail_goals = set(fail_goals)
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def chat(self, request):
+        goal = request.messages[1].content
+        with self._lock:
+            self.calls += 1
+        if goal in self.fail_goals:
+            raise RuntimeError(f"boom on {goal}")
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"answer to {goal}"))],
+        )
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _items(*goals):
+    return parse_batch_items([json.dumps({"id": g, "goal": g}) for g in goals], DEFAULTS)
+
+
+def test_config_roundtrip_keeps_stages():
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="debate", stages={"judge": StageSettings(model="big")})
+    assert config_from_json(config_to_json(cfg)) == cfg
+
+
+def test_worker_runs_jobs_and_writes_results_back(tmp_path):
+    with JobQueue(tmp_path / "q.sqlite") as queue, TranscriptStore(tmp_path / "t.sqlite") as store:
+        assert queue.enqueue(_items("a", "b", "c")) == 3
+        assert queue.enqueue(_items("a", "d")) == 1  # known ids are skipped
+        stats = run_worker(queue, SelfTalkEngine(client=FakeClient(), quiet=True), store=store)
+        assert (stats.succeeded, stats.failed, stats.lost) == (4, 0, 0)
+        assert queue.counts() == {"queued": 0, "running": 0, "done": 4, "failed": 0}
+        records = {r["id"]: r for r in queue.results()}
+        assert records["b"]["final"] == "answer to b"
+        assert len(records["b"]["transcript"]) == 7
+        assert records["b"]["summary"]["total"]["calls"] == 3
+        assert [r["run_id"] for r in store.runs()] == ["a", "b", "c", "d"]
+
+
+def test_failed_jobs_are_retried_then_marked_failed(tmp_path):
+    with JobQueue(tmp_path / "q.sqlite") as queue:
+        queue.enqueue(_items("ok", "bad"), max_attempts=2)
+        client = FakeClient(fail_goals={"bad"})
+        stats = run_worker(queue, SelfTalkEngine(client=client, quiet=True), retry_delay_s=0.0, poll_s=0.01)
+        assert (stats.succeeded, stats.failed) == (1, 2)
+        records = {r["id"]: r for r in queue.results()}
+        assert records["bad"] == {"id": "bad", "status": "error", "goal": "bad", "error": "boom on bad"}
+
+
+def test_expired_lease_is_reclaimed_and_stale_holder_is_ignored(tmp_path):
+    clock = Clock()
+    with JobQueue(tmp_path / "q.sqlite", clock=clock) as queue:
+        queue.enqueue(_items("a"), max_attempts=2)
+        crashed = queue.claim("w1", lease_s=10)
+        assert queue.claim("w2", lease_s=10) is None
+
+        clock.now += 5
+        assert queue.renew(crashed, lease_s=10)
+        clock.now += 9
+        assert queue.claim("w2", lease_s=10) is None  # renewed, still held
+
+        clock.now += 2
+        reclaimed = queue.claim("w2", lease_s=10)
+        assert (reclaimed.id, reclaimed.attempts) == ("a", 2)
+        # The old holder can no longer touch the job
+        assert not queue.renew(crashed, lease_s=10)
+        assert not queue.complete(crashed, "late", [])
+        assert queue.complete(reclaimed, "done", [])
+        assert next(queue.results())["final"] == "done"
+
+
+def test_worker_waits_for_a_crashed_workers_lease(tmp_path):
+    clock = Clock()
+
+    def sleep(seconds):
+        clock.now += seconds
+
+    with JobQueue(tmp_path / "q.sqlite", clock=clock) as queue:
+        queue.enqueue(_items("a", "b"), max_attempts=2)
+        queue.claim("crashed", lease_s=30)
+        stats = run_worker(queue, SelfTalkEngine(client=FakeClient(), quiet=True), poll_s=1.0, sleep=sleep)
+        assert (stats.succeeded, stats.lost) == (2, 0)
+        assert clock.now >= 1030.0  # b ran at once, a only after its lease ran out
+        assert queue.counts()["done"] == 2
+
+
+def test_expired_last_attempt_fails_the_job(tmp_path):
+    clock = Clock()
+    with JobQueue(tmp_path / "q.sqlite", clock=clock) as queue:
+        queue.enqueue(_items("a"), max_attempts=1)
+        queue.claim("w1", lease_s=10)
+        clock.now += 11
+        assert queue.claim("w2", lease_s=10) is None
+        assert next(queue.results())["error"] == "lease expired"
+
+
+def test_cli_enqueue_and_worker_processes(tmp_path, monkeypatch):
+    goals = tmp_path / "goals.jsonl"
+    goals.write_text("\n".join(json.dumps({"id": f"g{n}", "goal": f"goal {n}"}) for n in range(6)), encoding="utf-8")
+    queue = tmp_path / "q.sqlite"
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+
+    result = CliRunner().invoke(app, ["enqueue", "--queue", str(queue), "--input", str(goals), "--system-prompt", "s", "--iterations", "1"])
+    assert result.exit_code == 0, result.output
+    assert "Queued 6 of 6" in result.output
+
+    with FakeMistralServer(FakeServerConfig(response_tokens=4)) as server:
+        result = CliRunner().invoke(
+            app, ["worker", "--queue", str(queue), "--processes", "2", "--base-url", server.base_url, "--lease", "5"]
+        )
+    assert result.exit_code == 0, result.output
+    assert "6 succeeded" in result.output
+
+    out = tmp_path / "results.jsonl"
+    result = CliRunner().invoke(app, ["jobs", "--queue", str(queue), "--out", str(out)])
+    assert result.exit_code == 0, result.output
+    records = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert sorted(r["id"] for r in records) == [f"g{n}" for n in range(6)]
+    assert all(r["status"] == "ok" for r in records)
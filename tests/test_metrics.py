@@ -0,0 +1,86 @@
+import json
+
+import httpx
+
+from selftalk.client import MistralClient
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.metrics import JsonlMetricsSink, PrometheusMetricsSink, summarize_transcript
+from selftalk.models import CallStats, ChatChoice, ChatRequest, ChatResponse, Message
+
+
+def test_client_records_retries_backoff_and_status_history(monkeypatch):
+    monkeypatch.setattr("selftalk.client.time.sleep", lambda s: None)
+    statuses = iter([429, 502, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = next(statuses)
+        if status != 200:
+            return httpx.Response(status)
+        return httpx.Response(
+            200,
+            json={
+                "id": "x",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "m",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "hi"}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+            },
+        )
+
+    client = MistralClient(api_key="k")
+    client._http = httpx.Client(transport=httpx.MockTransport(handler))
+    resp = client.chat(ChatRequest(model="m", messages=[Message(role="user", content="q")]))
+
+    assert resp.stats.retries == 2
+    assert resp.stats.status_history == [429, 502, 200]
+    assert resp.stats.backoff_s > 0
+    assert resp.stats.latency_s is not None
+
+
+class UsageClient:
+    def chat(self, request):
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content="ok"), finish_reason="stop")],
+            usage={"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+            stats=CallStats(latency_s=0.5, retries=1, backoff_s=1.0, status_history=[429, 200]),
+        )
+
+
+def test_transcript_and_summary_carry_per_call_usage(tmp_path):
+    jsonl = JsonlMetricsSink(tmp_path / "m.jsonl")
+    engine = SelfTalkEngine(client=UsageClient(), quiet=True, metrics_sink=jsonl)
+    _, transcript = engine.run(EngineConfig(system_prompt="s", user_goal="g", iterations=2))
+    jsonl.close()
+
+    draft = next(e for e in transcript if e.get("stage") == "draft")
+    for key, value in {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13, "retries": 1,
+                       "backoff_s": 1.0, "status_history": [429, 200], "finish_reason": "stop", "latency_s": 0.5}.items():
+        assert draft["call"][key] == value
+
+    summary = summarize_transcript(transcript)
+    assert summary["total"]["calls"] == 5
+    assert summary["total"]["total_tokens"] == 65
+    assert summary["stages"]["revision"]["calls"] == 2
+    assert summary["stages"]["critic_feedback"]["retries"] == 2
+
+    records = [json.loads(line) for line in (tmp_path / "m.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [r["type"] for r in records] == ["call"] * 5 + ["run"]
+    assert records[0]["stage"] == "draft" and records[0]["mode"] == "critic"
+    assert records[-1]["total"]["calls"] == 5
+
+
+def test_prometheus_sink_renders_counters(tmp_path):
+    prom = PrometheusMetricsSink(tmp_path / "selftalk.prom")
+    engine = SelfTalkEngine(client=UsageClient(), quiet=True, metrics_sink=prom)
+    engine.run(EngineConfig(system_prompt="s", user_goal="g", iterations=1, mode="debate", model="small"))
+
+    text = (tmp_path / "selftalk.prom").read_text(encoding="utf-8")
+    assert "# TYPE selftalk_calls_total counter" in text
+    assert 'selftalk_calls_total{mode="debate",model="small",stage="pro"} 1' in text
+    assert 'selftalk_prompt_tokens_total{mode="debate",model="small",stage="final"} 10' in text
+    assert 'selftalk_runs_total{mode="debate",model="small"} 1' in text
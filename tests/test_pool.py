@@ -0,0 +1,138 @@
+import asyncio
+import json
+import random
+from contextlib import ExitStack
+
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.cli import app
+from selftalk.client import AsyncMistralClient, MistralClient
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.models import ChatRequest, Message
+from selftalk.pool import Endpoint, EndpointPool, PoolConfigError, load_endpoint_pool
+
+REQUEST = ChatRequest(model="m", messages=[Message(role="user", content="hi")], max_tokens=4)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _servers(stack, *configs):
+    return [stack.enter_context(FakeMistralServer(config)) for config in configs]
+
+
+def test_circuit_opens_half_opens_and_closes():
+    clock = Clock()
+    pool = EndpointPool([Endpoint("http://a/v1", name="a"), Endpoint("http://b/v1", name="b")], failure_threshold=2, cooldown_s=10, clock=clock)
+    a, b = pool._states
+
+    for _ in range(2):
+        pool.acquire(avoid=b)
+        pool.release(a, 503, 0.1)
+    assert a.state(clock.now) == "open"
+    assert all(pool.acquire() is b for _ in range(5))
+
+    clock.now += 10
+    assert pool.acquire(avoid=b) is a  # the single half-open trial
+    assert pool.acquire(avoid=b) is b  # a is not offered again while it runs
+    pool.release(a, None, 0.1)
+    assert a.state(clock.now) == "open" and a.trips == 2
+
+    clock.now += 10
+    pool.acquire(avoid=b)
+    pool.release(a, 200, 0.1)
+    assert a.state(clock.now) == "closed"
+    assert pool.stats()[0]["successes"] == 1
+
+
+def test_weighted_and_least_loaded_selection():
+    pool = EndpointPool([Endpoint("http://a/v1", weight=3), Endpoint("http://b/v1")], rng=random.Random(1))
+    picks = [pool.acquire().endpoint.url for _ in range(4000)]
+    assert 0.72 < picks.count("http://a/v1") / 4000 < 0.78
+
+    pool = EndpointPool([Endpoint("http://a/v1", weight=2), Endpoint("http://b/v1")], strategy="least-loaded")
+    # Calls that have not finished yet count as load: a takes two for every one on b
+    assert [pool.acquire().endpoint.url[7] for _ in range(6)] == ["a", "b", "a", "a", "b", "a"]
+
+
+def test_failing_endpoint_is_taken_out_of_rotation_and_brought_back():
+    clock = Clock()
+    with ExitStack() as stack:
+        bad, good1, good2 = _servers(stack, FakeServerConfig(server_error_rate=1.0), FakeServerConfig(), FakeServerConfig())
+        pool = EndpointPool(
+            [Endpoint(s.base_url, api_key=f"key{n}") for n, s in enumerate((bad, good1, good2))],
+            failure_threshold=3,
+            cooldown_s=30,
+            clock=clock,
+        )
+        with MistralClient(pool=pool) as client:
+            responses = [client.chat(REQUEST) for _ in range(30)]
+            # Failed attempts moved to a healthy endpoint without sleeping
+            assert all(r.stats.backoff_s == 0 for r in responses)
+            assert bad.stats.snapshot()["requests"] == 3
+            assert pool.stats()[0]["state"] == "open"
+            assert good1.stats.snapshot()["api_keys"] == {"key1": pool.stats()[1]["successes"]}
+            assert pool.stats()[2]["tokens"] > 0
+
+            bad.config.server_error_rate = 0.0
+            clock.now += 30
+            for _ in range(30):
+                client.chat(REQUEST)
+        assert pool.stats()[0]["state"] == "closed"
+        assert bad.stats.snapshot()["statuses"][200] > 0
+
+
+def test_async_client_spreads_concurrent_calls():
+    with ExitStack() as stack:
+        servers = _servers(stack, FakeServerConfig(latency_s=0.02), FakeServerConfig(latency_s=0.02))
+        pool = EndpointPool([Endpoint(s.base_url) for s in servers], strategy="least-loaded")
+
+        async def go():
+            async with AsyncMistralClient(api_key="k", pool=pool) as client:
+                await asyncio.gather(*(client.chat(REQUEST) for _ in range(20)))
+
+        asyncio.run(go())
+        assert [s.stats.snapshot()["requests"] for s in servers] == [10, 10]
+    assert all(e["in_flight"] == 0 for e in pool.stats())
+
+
+def test_load_endpoint_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("EU_KEY", "secret")
+    path = tmp_path / "pool.toml"
+    path.write_text(
+        'strategy = "least-loaded"\ncooldown_s = 5\n\n'
+        '[[endpoints]]\nurl = "https://eu.example/v1"\nkey_env = "EU_KEY"\nweight = 2\nname = "eu"\n\n'
+        '[[endpoints]]\nurl = "https://us.example/v1"\n',
+        encoding="utf-8",
+    )
+    pool = load_endpoint_pool(path)
+    assert (pool.strategy, pool.cooldown_s) == ("least-loaded", 5)
+    assert pool.endpoints == [Endpoint("https://eu.example/v1", "secret", 2.0, "eu"), Endpoint("https://us.example/v1")]
+    assert load_endpoint_pool(path, strategy="weighted").strategy == "weighted"
+
+    for data in ([], [{"url": "x", "colour": "red"}], [{"url": "x", "key_env": "MISSING_KEY_ENV"}], {"endpoints": ["x"], "mode": 1}):
+        (tmp_path / "bad.json").write_text(json.dumps(data), encoding="utf-8")
+        with pytest.raises(PoolConfigError):
+            load_endpoint_pool(tmp_path / "bad.json")
+
+
+def test_cli_run_with_endpoints(tmp_path, monkeypatch):
+    monkeypatch.delenv("MISTRAL_API_KEY", raising=False)
+    with ExitStack() as stack:
+        servers = _servers(stack, FakeServerConfig(), FakeServerConfig())
+        pool = tmp_path / "pool.json"
+        pool.write_text(json.dumps([{"url": s.base_url, "key": f"k{n}", "name": f"ep{n}"} for n, s in enumerate(servers)]), encoding="utf-8")
+        result = CliRunner().invoke(
+            app,
+            ["run", "--system-prompt", "s", "--iterations", "2", "--endpoints", str(pool), "--balance", "least-loaded",
+             "--out", str(tmp_path / "t.jsonl"), "--result", str(tmp_path / "r.txt")],
+        )
+        assert result.exit_code == 0, result.output
+        assert "Endpoints" in result.output and "ep1" in result.output
+        assert sum(s.stats.snapshot()["requests"] for s in servers) == 5
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.cli import app
+from selftalk.client import MistralClient
+from selftalk.engine import AsyncSelfTalkEngine, EngineConfig, SelfTalkEngine
+from selftalk.fakeserver import FakeMistralServer, FakeServerConfig
+from selftalk.models import ChatChoice, ChatRequest, ChatResponse, Message
+from selftalk.profiling import Profiler
+
+
+def _response(request):
+    return ChatResponse(
+        id="chatcmpl_fake",
+        object="chat.completion",
+        created=0,
+        model=request.model,
+        choices=[ChatChoice(index=0, message=Message(role="assistant", content="answer"))],
+    )
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.fail = fail
+
+    def ensure_api_key(self):
+        pass
+
+    def close(self):
+        pass
+
+    def chat(self, request):
+        if self.fail:
+            raise RuntimeError("boom")
+        return _response(request)
+
+
+class FakeAsyncClient:
+    async def chat(self, request):
+        return _response(request)
+
+
+class RecordingHook:
+    def __init__(self):
+        self.events = []
+
+    def before_call(self, request):
+        self.events.append(("before", request.messages[-1].role))
+
+    def after_call(self, request, response, error, elapsed_s):
+        assert elapsed_s >= 0
+        self.events.append(("after", response is not None, error))
+
+
+CFG = EngineConfig(system_prompt="s", user_goal="g", iterations=1)
+
+
+def test_phases_are_exclusive():
+    profiler = Profiler()
+    with profiler.phase("outer"):
+        time.sleep(0.02)
+        with profiler.phase("inner"):
+            time.sleep(0.05)
+    summary = profiler.summary()
+    assert summary["inner"]["total_s"] >= 0.05
+    assert 0.02 <= summary["outer"]["total_s"] < 0.05
+
+
+def test_engine_hooks_and_profile():
+    hook = RecordingHook()
+    profiler = Profiler()
+    engine = SelfTalkEngine(client=FakeClient(), quiet=True, profiler=profiler, hooks=[hook])
+    final, transcript = engine.run(CFG)
+    assert final == "answer"
+    assert isinstance(transcript, list) and len(transcript) == 7
+    assert hook.events.count(("after", True, None)) == 3
+    assert [e[0] for e in hook.events] == ["before", "after"] * 3
+    summary = profiler.summary()
+    assert summary["client"]["count"] == 3
+    assert summary["transcript"]["count"] == 7
+    assert summary["engine"]["count"] == 4
+
+
+def test_after_call_sees_errors():
+    hook = RecordingHook()
+    with pytest.raises(RuntimeError):
+        SelfTalkEngine(client=FakeClient(fail=True), quiet=True, hooks=[hook]).run(CFG)
+    assert hook.events[-1][0] == "after"
+    assert str(hook.events[-1][2]) == "boom"
+
+
+def test_async_engine_hooks_with_fan_out():
+    hook = RecordingHook()
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="tournament", candidates=3)
+    asyncio.run(AsyncSelfTalkEngine(client=FakeAsyncClient(), hooks=[hook]).run(cfg))
+    # 3 candidates, 3 reviews, 1 judge
+    assert sum(1 for e in hook.events if e[0] == "after") == 7
+
+
+def test_client_phases(monkeypatch):
+    monkeypatch.setattr("selftalk.client.time.sleep", lambda s: None)
+    profiler = Profiler()
+    request = ChatRequest(model="m", messages=[Message(role="user", content="hi")])
+    with FakeMistralServer(FakeServerConfig(rate_limit_rate=0.5, retry_after_s=None, seed=3)) as server:
+        with MistralClient(api_key="k", base_url=server.base_url, profiler=profiler) as client:
+            for _ in range(4):
+                client.chat(request)
+        requests = server.stats.snapshot()["requests"]
+    summary = profiler.summary()
+    assert summary["network"]["count"] == requests
+    assert summary["parse"]["count"] == 4
+    assert summary["backoff"]["count"] == requests - 4
+    assert summary["serialize"]["count"] == 8
+
+
+def test_cli_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    monkeypatch.setattr("selftalk.client.MistralClient", lambda *a, **kw: FakeClient())
+    pstats_path = tmp_path / "run.pstats"
+    result = CliRunner().invoke(
+        app,
+        ["run", "--system-prompt", "s", "--iterations", "1", "--out", str(tmp_path / "t.jsonl"),
+         "--result", str(tmp_path / "r.txt"), "--profile", "--profile-pstats", str(pstats_path)],
+    )
+    assert result.exit_code == 0, result.output
+    assert "Profile:" in result.output
+    assert "transcript" in result.output
+    assert pstats_path.stat().st_size > 0
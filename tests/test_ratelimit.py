@@ -0,0 +1,98 @@
+import httpx
+
+from selftalk.client import MistralClient
+from selftalk.models import ChatRequest, Message
+from selftalk.ratelimit import RateLimiter, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_retry_after_seconds_and_http_date():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("garbage") is None
+    assert 9 <= parse_retry_after("Wed, 21 Oct 2015 07:28:10 GMT", now=1445412480.0) <= 11
+
+
+def test_request_bucket_spaces_out_requests():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_sec=2, burst=1, clock=clock)
+    assert limiter.reserve() == 0.0
+    assert limiter.reserve() == 0.5
+    assert limiter.reserve() == 1.0
+    clock.now += 1.0
+    assert limiter.reserve() == 0.5
+
+
+def test_wait_past_the_budget_claims_nothing():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_sec=2, burst=1, clock=clock)
+    assert limiter.reserve(budget=0.1) == 0.0
+    assert limiter.reserve(budget=0.3) is None
+    assert limiter.reserve(budget=1.0) == 0.5
+    assert limiter.state()["acquired"] == 2
+
+
+def test_token_bucket_and_settlement():
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_min=600, clock=clock)
+    assert limiter.reserve(tokens=600) == 0.0
+    assert limiter.reserve(tokens=10) == 1.0  # 10 tokens at 10 tokens/s
+    limiter.settle_tokens(estimated=600, actual=300)
+    assert limiter.state()["tokens_available"] == 290
+
+
+def test_429_with_retry_after_pauses_all_sharers_and_halves_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_sec=10, clock=clock)
+    assert limiter.observe(429, {"retry-after": "4"}) == 4.0
+    state = limiter.state()
+    assert state["requests_per_sec"] == 5
+    assert state["blocked_for_s"] == 4.0
+    assert limiter.reserve() == 4.0
+
+    limiter.observe(200, {})
+    assert limiter.state()["requests_per_sec"] == 5.5
+
+
+def test_exhausted_remaining_header_blocks_until_reset():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_sec=10, clock=clock)
+    limiter.observe(200, {"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "1.5s"})
+    assert limiter.state()["blocked_for_s"] == 1.5
+
+
+def test_client_honors_retry_after_and_shares_limiter(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("selftalk.client.time.sleep", sleeps.append)
+    responses = iter([httpx.Response(429, headers={"retry-after": "7"})])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        for resp in responses:
+            return resp
+        return httpx.Response(
+            200,
+            json={
+                "id": "x",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "m",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}}],
+            },
+        )
+
+    limiter = RateLimiter(requests_per_sec=100)
+    client = MistralClient(api_key="k", rate_limiter=limiter)
+    client._http = httpx.Client(transport=httpx.MockTransport(handler))
+    resp = client.chat(ChatRequest(model="m", messages=[Message(role="user", content="q")]))
+
+    assert resp.first_message_content() == "ok"
+    assert sleeps[0] == 7.0
+    assert limiter.state()["rate_limited"] == 1
+    assert resp.stats.status_history == [429, 200]
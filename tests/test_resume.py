@@ -0,0 +1,149 @@
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.cli import app
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.models import ChatChoice, ChatResponse, Message
+from selftalk.resume import ResumeError, load_resume_info
+from selftalk.transcript import JsonlTranscriptSink, read_transcript_jsonl
+
+
+class CountingClient:
+    def __init__(self, fail_after=None, start=0):
+        self.fail_after = fail_after
+        self.calls = 0
+        self.start = start
+
+    def ensure_api_key(self):
+        pass
+
+    def close(self):
+        pass
+
+    def chat(self, request):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise KeyboardInterrupt
+        self.calls += 1
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"out {self.start + self.calls}"))],
+            usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        )
+
+
+def _run(path, cfg, client):
+    with JsonlTranscriptSink(path) as sink:
+        return SelfTalkEngine(client=client, quiet=True).run(cfg, sink=sink)
+
+
+def _resume(path, cfg, client):
+    recorded = list(read_transcript_jsonl(path))
+    with JsonlTranscriptSink(path) as sink:
+        return SelfTalkEngine(client=client, quiet=True).resume(cfg, recorded, sink=sink)
+
+
+def test_resume_after_crash_only_calls_for_missing_turns(tmp_path):
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=2)
+    path = tmp_path / "t.jsonl"
+    with pytest.raises(KeyboardInterrupt):
+        _run(path, cfg, CountingClient(fail_after=3))
+    before = list(read_transcript_jsonl(path))
+
+    info = load_resume_info(path)
+    assert (info.mode, info.system_prompt, info.user_goal, info.iterations_done) == ("critic", "s", "g", 1)
+
+    client = CountingClient(start=3)
+    final, transcript = _resume(path, cfg, client)
+    assert client.calls == 2
+    assert final == "out 5"
+    after = list(transcript)
+    # Recorded turns are kept verbatim, including timestamps and call stats
+    assert after[: len(before)] == before
+    assert len(after) == 11
+
+    reference = list(SelfTalkEngine(client=CountingClient(), quiet=True).run(cfg)[1])
+    assert [(e["stage"], e["content"]) for e in after] == [(e["stage"], e["content"]) for e in reference]
+
+
+def test_extend_finished_critic_run(tmp_path):
+    path = tmp_path / "t.jsonl"
+    _run(path, EngineConfig(system_prompt="s", user_goal=None, iterations=1), CountingClient())
+
+    client = CountingClient(start=3)
+    final, transcript = _resume(path, EngineConfig(system_prompt="s", user_goal=None, iterations=3), client)
+    assert client.calls == 4
+    assert final == "out 7"
+    assert max(e["iteration"] or 0 for e in transcript) == 3
+
+
+def test_extend_finished_debate_resynthesizes(tmp_path):
+    path = tmp_path / "t.jsonl"
+    _run(path, EngineConfig(system_prompt="s", user_goal=None, mode="debate", iterations=1), CountingClient())
+    assert load_resume_info(path).mode == "debate"
+
+    client = CountingClient(start=3)
+    final, transcript = _resume(path, EngineConfig(system_prompt="s", user_goal=None, mode="debate", iterations=2), client)
+    # One more pro/con round plus a fresh judge call
+    assert client.calls == 3
+    stages = [e.get("stage") for e in transcript]
+    assert stages.count("final") == 1 and stages[-1] == "final"
+    assert final == "out 6"
+
+
+@pytest.mark.parametrize("max_total_tokens", [None, 10**6])
+def test_resume_finished_debate_replays_the_judge(tmp_path, max_total_tokens):
+    # With a token budget set the transcript also ends in a stop entry
+    cfg = EngineConfig(system_prompt="s", user_goal="g", mode="debate", iterations=2, max_total_tokens=max_total_tokens)
+    path = tmp_path / "t.jsonl"
+    answer, _ = _run(path, cfg, CountingClient())
+
+    client = CountingClient(start=100)
+    final, transcript = _resume(path, cfg, client)
+    assert client.calls == 0
+    assert final == answer == "out 5"
+    assert [e.get("stage") for e in transcript].count("final") == 1
+
+
+def test_resume_with_different_config_is_rejected(tmp_path):
+    path = tmp_path / "t.jsonl"
+    _run(path, EngineConfig(system_prompt="s", user_goal=None, iterations=2), CountingClient())
+    recorded = list(read_transcript_jsonl(path))
+    with pytest.raises(ResumeError):
+        SelfTalkEngine(client=CountingClient(), quiet=True).resume(
+            EngineConfig(system_prompt="other", user_goal=None, iterations=2), recorded
+        )
+
+
+def test_cli_resume_extend(tmp_path, monkeypatch):
+    path = tmp_path / "t.jsonl"
+    _run(path, EngineConfig(system_prompt="s", user_goal="g", iterations=1), CountingClient())
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    monkeypatch.setattr("selftalk.client.MistralClient", lambda *a, **kw: CountingClient(start=3))
+
+    result = CliRunner().invoke(
+        app, ["run", "--resume", str(path), "--extend", "1", "--result", str(tmp_path / "r.txt")]
+    )
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / "r.txt").read_text(encoding="utf-8").strip() == "out 5"
+    assert load_resume_info(path).iterations_done == 2
+
+
+def test_cli_resume_mismatch_keeps_original_transcript(tmp_path, monkeypatch):
+    path = tmp_path / "t.jsonl"
+    _run(path, EngineConfig(system_prompt="s", user_goal="g", iterations=2), CountingClient())
+    entries = list(read_transcript_jsonl(path))
+    next(e for e in entries if e.get("stage") == "critic_prompt")["content"] = "edited by hand"
+    with JsonlTranscriptSink(path) as sink:
+        for e in entries:
+            sink.append(e)
+    original = path.read_text(encoding="utf-8")
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    monkeypatch.setattr("selftalk.client.MistralClient", lambda *a, **kw: CountingClient())
+
+    result = CliRunner().invoke(app, ["run", "--resume", str(path), "--result", str(tmp_path / "r.txt")])
+    assert result.exit_code == 1
+    assert "diverges" in result.output
+    assert path.read_text(encoding="utf-8") == original
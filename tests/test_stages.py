@@ -0,0 +1,141 @@
+import json
+import threading
+
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.batch import BatchInputError, parse_batch_items
+from selftalk.cli import app
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.metrics import summarize_transcript
+from selftalk.models import ChatChoice, ChatResponse, Message
+from selftalk.stages import (
+    StageConfigError,
+    StageSettings,
+    load_stage_config,
+    merge_stage_settings,
+    parse_stage_options,
+)
+
+
+class RecordingClient:
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def ensure_api_key(self):
+        pass
+
+    def close(self):
+        pass
+
+    def chat(self, request):
+        with self._lock:
+            self.requests.append(request)
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"answer {len(self.requests)}"))],
+            usage={"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        )
+
+
+SMALL = StageSettings(model="small", max_tokens=128, temperature=0.0)
+
+
+def test_parse_stage_options_and_merge():
+    stages = parse_stage_options(["critic.model=small", "critic.max_tokens=128", "JUDGE.temperature=0.7"])
+    assert stages == {"critic": StageSettings(model="small", max_tokens=128), "judge": StageSettings(temperature=0.7)}
+    merged = merge_stage_settings({"critic": StageSettings(model="big", top_p=0.9)}, stages)
+    assert merged["critic"] == StageSettings(model="small", max_tokens=128, top_p=0.9)
+
+
+@pytest.mark.parametrize(
+    "option", ["critic=small", "critic.model", "reviewer.model=x", "critic.seed=1", "critic.max_tokens=lots"]
+)
+def test_parse_stage_options_rejects_bad_input(option):
+    with pytest.raises(StageConfigError):
+        parse_stage_options([option])
+
+
+def test_load_stage_config_json_and_toml(tmp_path):
+    (tmp_path / "s.json").write_text(json.dumps({"critic": {"model": "small", "max_tokens": 64}}), encoding="utf-8")
+    (tmp_path / "s.toml").write_text('[critic]\nmodel = "small"\nmax_tokens = 64\n', encoding="utf-8")
+    expected = {"critic": StageSettings(model="small", max_tokens=64)}
+    assert load_stage_config(tmp_path / "s.json") == expected
+    assert load_stage_config(tmp_path / "s.toml") == expected
+    (tmp_path / "bad.json").write_text("[1]", encoding="utf-8")
+    with pytest.raises(StageConfigError):
+        load_stage_config(tmp_path / "bad.json")
+
+
+def test_critic_routes_stages_and_records_models():
+    client = RecordingClient()
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=1, model="big", stages={"critic": SMALL})
+    _, transcript = SelfTalkEngine(client=client, quiet=True).run(cfg)
+
+    assert [(r.model, r.max_tokens, r.temperature) for r in client.requests] == [
+        ("big", 1024, 0.3),
+        ("small", 128, 0.0),
+        ("big", 1024, 0.3),
+    ]
+    models = {e["stage"]: e["model"] for e in transcript}
+    assert (models["critic_prompt"], models["critic_feedback"], models["revision"]) == ("small", "small", "big")
+
+    summary = summarize_transcript(transcript)
+    assert summary["stages"]["critic_feedback"]["model"] == "small"
+    assert summary["models"]["big"]["calls"] == 2
+    assert summary["models"]["small"]["total_tokens"] == 12
+
+
+def test_debate_and_tournament_route_judge():
+    client = RecordingClient()
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=1, mode="debate", stages={"judge": SMALL, "con": SMALL})
+    SelfTalkEngine(client=client, quiet=True).run(cfg)
+    assert [r.model for r in client.requests] == ["mistral-large-latest", "small", "small"]
+
+    client = RecordingClient()
+    cfg = EngineConfig(
+        system_prompt="s", user_goal="g", mode="tournament", candidates=2, stages={"draft": StageSettings(temperature=0.8), "judge": SMALL}
+    )
+    SelfTalkEngine(client=client, quiet=True).run(cfg)
+    candidates = [r for r in client.requests if not r.messages[-1].content.startswith(("Critic:", "Judge:"))]
+    # The candidate temperature spread starts from the draft override
+    assert sorted(r.temperature for r in candidates) == pytest.approx([0.8, 0.9])
+    assert client.requests[-1].model == "small"
+
+
+def test_unknown_stage_role_is_rejected():
+    cfg = EngineConfig(system_prompt="s", user_goal=None, stages={"reviewer": SMALL})
+    with pytest.raises(ValueError):
+        SelfTalkEngine(client=RecordingClient(), quiet=True).run(cfg)
+
+
+def test_batch_items_merge_stages_over_defaults():
+    defaults = EngineConfig(system_prompt="s", user_goal=None, stages={"critic": StageSettings(model="small", max_tokens=64)})
+    items = parse_batch_items(
+        [json.dumps({"id": "a", "goal": "g"}), json.dumps({"id": "b", "goal": "g", "stages": {"critic": {"max_tokens": 32}}})],
+        defaults,
+    )
+    assert items[0].cfg.stages["critic"] == StageSettings(model="small", max_tokens=64)
+    assert items[1].cfg.stages["critic"] == StageSettings(model="small", max_tokens=32)
+    with pytest.raises(BatchInputError):
+        parse_batch_items([json.dumps({"goal": "g", "stages": {"critic": {"colour": "red"}}})], defaults)
+
+
+def test_cli_stage_options(tmp_path, monkeypatch):
+    client = RecordingClient()
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    monkeypatch.setattr("selftalk.client.MistralClient", lambda *a, **kw: client)
+    config = tmp_path / "stages.toml"
+    config.write_text('[critic]\nmodel = "small"\nmax_tokens = 64\n', encoding="utf-8")
+    args = ["run", "--system-prompt", "s", "--iterations", "1", "--out", str(tmp_path / "t.jsonl"), "--result", str(tmp_path / "r.txt")]
+
+    result = CliRunner().invoke(app, args + ["--stage-config", str(config), "--stage", "critic.max_tokens=32"])
+    assert result.exit_code == 0, result.output
+    assert [(r.model, r.max_tokens) for r in client.requests][1] == ("small", 32)
+
+    result = CliRunner().invoke(app, args + ["--stage", "critic.colour=red"])
+    assert result.exit_code == 2
@@ -0,0 +1,95 @@
+import json
+
+from selftalk.engine import EngineConfig, SelfTalkEngine, write_transcript_split_json
+from selftalk.models import ChatChoice, ChatResponse, Message
+from selftalk.stopping import RunBudget, signals_no_issues, similarity
+
+
+class ScriptedClient:
+    def __init__(self, outputs, usage=None):
+        self._outputs = list(outputs)
+        self.usage = usage
+        self.calls = 0
+
+    def chat(self, request):
+        content = self._outputs[self.calls]
+        self.calls += 1
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=content))],
+            usage=self.usage,
+        )
+
+
+def _run(outputs, **overrides):
+    fake = ScriptedClient(outputs, usage=overrides.pop("usage", None))
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=5, **overrides)
+    final, transcript = SelfTalkEngine(client=fake, quiet=True).run(cfg)
+    return fake, final, transcript
+
+
+def test_similarity_and_no_issues_detection():
+    assert similarity("a b c d", "a b c d") == 1.0
+    assert similarity("a b c d", "w x y z") == 0.0
+    assert signals_no_issues("NO ISSUES")
+    assert signals_no_issues("  no issues.")
+    assert not signals_no_issues("No issues with structure, but fix the intro.")
+
+
+def test_critic_stops_when_revisions_converge():
+    fake, final, transcript = _run(
+        ["draft one", "fix it", "the answer is 42", "polish", "the answer is 42"],
+        stop_similarity=0.95,
+    )
+    assert fake.calls == 5
+    assert final == "the answer is 42"
+    stop = transcript[-1]
+    assert (stop["stage"], stop["content"], stop["iteration"]) == ("stop", "converged", 2)
+
+
+def test_critic_stops_on_no_issues_and_keeps_last_answer():
+    fake, final, transcript = _run(["draft", "NO ISSUES"], stop_on_no_issues=True)
+    assert fake.calls == 2
+    assert final == "draft"
+    assert "NO ISSUES" in transcript[3]["content"]  # hint added to the critic prompt
+    assert transcript[-1]["content"] == "no_issues"
+
+
+def test_token_budget_stops_before_next_round():
+    usage = {"prompt_tokens": 40, "completion_tokens": 10, "total_tokens": 50}
+    fake, final, transcript = _run(["d", "c1", "r1", "c2", "r2"], max_total_tokens=120, usage=usage)
+    assert fake.calls == 3
+    assert final == "r1"
+    assert transcript[-1]["content"] == "token_budget"
+
+
+def test_stop_entry_records_max_iterations_and_lands_in_other_bucket(tmp_path):
+    _, _, transcript = _run(["x"] * 11, max_seconds=3600)
+    assert transcript[-1]["content"] == "max_iterations"
+
+    out = tmp_path / "t.json"
+    write_transcript_split_json(transcript, str(out))
+    assert json.loads(out.read_text(encoding="utf-8"))["other"][0]["stage"] == "stop"
+
+
+def test_no_stop_entry_without_criteria():
+    _, _, transcript = _run(["x"] * 11)
+    assert all(e.get("stage") != "stop" for e in transcript)
+
+
+def test_debate_stops_when_con_has_no_issues_then_judges():
+    fake, final, transcript = _run(["pro 1", "NO ISSUES", "verdict"], mode="debate", stop_on_no_issues=True)
+    assert fake.calls == 3
+    assert final == "verdict"
+    stages = [e.get("stage") for e in transcript]
+    assert stages[-3:] == ["judge_prompt", "final", "stop"]
+    assert transcript[-1]["iteration"] == 1
+
+
+def test_run_budget_estimates_tokens_without_usage():
+    budget = RunBudget(max_total_tokens=10)
+    budget.add({"prompt_tokens_est": 8}, "x" * 8)
+    assert budget.exceeded() == "token_budget"
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from typer.testing import CliRunner
+
+from selftalk.cli import app
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.models import ChatChoice, ChatResponse, Message
+from selftalk.store import TranscriptStore
+from selftalk.transcript import JsonlTranscriptSink, TeeTranscriptSink, split_jsonl_to_json
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = 0
+
+    def ensure_api_key(self):
+        pass
+
+    def close(self):
+        pass
+
+    def chat(self, request):
+        self.calls += 1
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"out {self.calls}"))],
+            usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        )
+
+
+def _cfg(mode="critic", model="m"):
+    return EngineConfig(system_prompt="s", user_goal="g", iterations=2, mode=mode, model=model)
+
+
+def test_store_sink_batches_inserts_and_reads_back(tmp_path):
+    with TranscriptStore(tmp_path / "t.sqlite") as store:
+        sink = store.sink("r1", mode="critic", batch_size=4)
+        sink.append({"ts": "2024-01-01T00:00:00", "role": "system", "content": "s", "model": "m", "iteration": None, "stage": "init"})
+        assert list(store.query(run_id="r1")) == []
+        assert len(sink) == 1
+        sink.close()
+        assert [e["content"] for e in store.query(run_id="r1")] == ["s"]
+
+
+def test_store_matches_jsonl_byte_for_byte(tmp_path):
+    path = tmp_path / "t.jsonl"
+    with TranscriptStore(tmp_path / "t.sqlite") as store:
+        with JsonlTranscriptSink(path) as jsonl:
+            sink = TeeTranscriptSink(jsonl, store.sink("r1", mode="critic", batch_size=3))
+            SelfTalkEngine(client=FakeClient(), quiet=True).run(_cfg(), sink=sink)
+            sink.close()
+        exported = tmp_path / "export.jsonl"
+        with open(exported, "w", encoding="utf-8") as f:
+            for entry in store.query(run_id="r1"):
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    assert exported.read_bytes() == path.read_bytes()
+
+
+def test_store_query_filters(tmp_path):
+    with TranscriptStore(tmp_path / "t.sqlite") as store:
+        for run_id, mode, model in (("a", "critic", "m1"), ("b", "debate", "m2")):
+            transcript = SelfTalkEngine(client=FakeClient(), quiet=True).run(_cfg(mode, model))[1]
+            store.add_run(run_id, mode, transcript)
+
+        assert [r["run_id"] for r in store.runs()] == ["a", "b"]
+        assert store.runs(mode="DEBATE")[0]["model"] == "m2"
+        assert {e["model"] for e in store.query(model="m1")} == {"m1"}
+        assert [e["model"] for e in store.query(stage="final")] == ["m2"]
+        assert [e["stage"] for e in store.query(run_id="a", bucket="improved")] == ["revision", "revision"]
+        assert list(store.query(since="2999-01-01")) == []
+        assert len(list(store.query(until="2999-01-01", limit=3))) == 3
+
+        # Adding a run id again replaces its transcript
+        store.add_run("a", "critic", [{"ts": "t", "role": "system", "content": "new", "model": "m1", "iteration": None}])
+        assert [e["content"] for e in store.query(run_id="a")] == ["new"]
+
+        with pytest.raises(ValueError):
+            list(store.query(role="user"))
+
+
+def test_cli_run_store_and_transcripts_export(tmp_path, monkeypatch):
+    monkeypatch.setenv("MISTRAL_API_KEY", "x")
+    monkeypatch.setattr("selftalk.client.MistralClient", lambda *a, **kw: FakeClient())
+    db = tmp_path / "t.sqlite"
+    out = tmp_path / "t.jsonl"
+    result = CliRunner().invoke(
+        app,
+        ["run", "--system-prompt", "s", "--iterations", "1", "--out", str(out), "--result", str(tmp_path / "r.txt"),
+         "--store", str(db), "--run-id", "first"],
+    )
+    assert result.exit_code == 0, result.output
+
+    listing = CliRunner().invoke(app, ["transcripts", "--store", str(db), "--mode", "critic"])
+    assert listing.exit_code == 0, listing.output
+    assert "first" in listing.output
+
+    exported = tmp_path / "export.jsonl"
+    result = CliRunner().invoke(app, ["transcripts", "--store", str(db), "--run-id", "first", "--out", str(exported)])
+    assert result.exit_code == 0, result.output
+    assert exported.read_bytes() == out.read_bytes()
+
+    split = tmp_path / "export.json"
+    result = CliRunner().invoke(app, ["transcripts", "--store", str(db), "--out", str(split)])
+    assert result.exit_code == 0, result.output
+    split_jsonl_to_json(out, tmp_path / "reference.json")
+    assert split.read_text(encoding="utf-8") == (tmp_path / "reference.json").read_text(encoding="utf-8")
+
+
+def test_cli_transcripts_missing_store(tmp_path):
+    result = CliRunner().invoke(app, ["transcripts", "--store", str(tmp_path / "nope.sqlite")])
+    assert result.exit_code == 1
+    assert "no transcript store" in result.output
@@ -0,0 +1,115 @@
+import json
+
+import httpx
+import pytest
+
+from selftalk.client import MistralAPIError, MistralClient
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.models import CallStats, ChatChoice, ChatRequest, ChatResponse, Message
+from selftalk.streaming import StreamAccumulator
+
+
+def _sse(chunks, usage=None):
+    lines = []
+    for n, text in enumerate(chunks):
+        chunk = {
+            "id": "cmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 7,
+            "model": "m",
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": text} if n == 0 else {"content": text}, "finish_reason": None}],
+        }
+        lines.append("data: " + json.dumps(chunk))
+    last = {"id": "cmpl-1", "model": "m", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    if usage:
+        last["usage"] = usage
+    lines.append("data: " + json.dumps(last))
+    lines.append("data: [DONE]")
+    return ("\n\n".join(lines) + "\n\n").encode()
+
+
+def test_accumulator_builds_full_response():
+    tokens = []
+    acc = StreamAccumulator(on_token=tokens.append)
+    for line in _sse(["Hel", "lo", "!"], usage={"completion_tokens": 3}).decode().splitlines():
+        acc.feed_line(line)
+
+    resp = acc.response()
+    assert acc.done
+    assert tokens == ["Hel", "lo", "!"]
+    assert resp.first_message_content() == "Hello!"
+    assert resp.choices[0].finish_reason == "stop"
+    assert resp.usage == {"completion_tokens": 3}
+    assert resp.created == 7
+    assert resp.stats.streamed and resp.stats.ttft_s is not None
+
+
+def test_client_streams_with_retry_before_first_token(monkeypatch):
+    monkeypatch.setattr("selftalk.client.time.sleep", lambda s: None)
+    statuses = iter([503, 200])
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content)["stream"])
+        status = next(statuses)
+        if status != 200:
+            return httpx.Response(status)
+        return httpx.Response(200, content=_sse(["a", "b"]), headers={"content-type": "text/event-stream"})
+
+    client = MistralClient(api_key="k")
+    client._http = httpx.Client(transport=httpx.MockTransport(handler))
+    tokens = []
+    req = ChatRequest(model="m", messages=[Message(role="user", content="q")], stream=True)
+    resp = client.chat(req, on_token=tokens.append)
+
+    assert seen == [True, True]
+    assert tokens == ["a", "b"]
+    assert resp.first_message_content() == "ab"
+    assert resp.stats.latency_s >= resp.stats.ttft_s
+
+
+def test_client_rejects_malformed_stream():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"data: {oops\n\n")
+
+    client = MistralClient(api_key="k")
+    client._http = httpx.Client(transport=httpx.MockTransport(handler))
+    req = ChatRequest(model="m", messages=[Message(role="user", content="q")], stream=True)
+    with pytest.raises(MistralAPIError):
+        client.chat(req)
+
+
+class FakeStreamingClient:
+    def __init__(self):
+        self.tokens = []
+
+    def chat(self, request, on_token=None):
+        assert request.stream
+        for token in ("x", "y"):
+            if on_token is not None:
+                on_token(token)
+            self.tokens.append(token)
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content="xy"))],
+            stats=CallStats(streamed=True, latency_s=0.2, ttft_s=0.05, tokens_per_sec=13.3),
+        )
+
+
+def test_engine_records_stream_stats_in_transcript(capsys):
+    fake = FakeStreamingClient()
+    engine = SelfTalkEngine(client=fake)
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=1, stream=True)
+
+    final, transcript = engine.run(cfg)
+
+    assert final == "xy"
+    assert "xy" in capsys.readouterr().out
+    calls = [e["call"] for e in transcript if "call" in e]
+    assert len(calls) == 3
+    expected = {"streamed": True, "latency_s": 0.2, "ttft_s": 0.05, "tokens_per_sec": 13.3}
+    assert {k: calls[0][k] for k in expected} == expected
+    assert all("call" not in e for e in transcript if e["role"] == "user")
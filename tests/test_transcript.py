@@ -0,0 +1,164 @@
+import json
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from selftalk.engine import EngineConfig, SelfTalkEngine
+from selftalk.metrics import summarize_transcript
+from selftalk.models import ChatChoice, ChatResponse, Message
+from selftalk.transcript import (
+    CompactTranscript,
+    JsonlTranscriptSink,
+    read_transcript_jsonl,
+    split_jsonl_to_json,
+    write_transcript_jsonl,
+    write_transcript_split_json,
+)
+
+
+class FlakyClient:
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def chat(self, request):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise KeyboardInterrupt
+        self.calls += 1
+        return ChatResponse(
+            id="chatcmpl_fake",
+            object="chat.completion",
+            created=0,
+            model=request.model,
+            choices=[ChatChoice(index=0, message=Message(role="assistant", content=f"out {self.calls} ünïcode"))],
+            usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        )
+
+
+CFG = EngineConfig(system_prompt="s", user_goal="g", iterations=3)
+
+
+def test_split_json_matches_json_dump_byte_for_byte(tmp_path):
+    _, transcript = SelfTalkEngine(client=FlakyClient(), quiet=True).run(CFG)
+    transcript.append({"ts": "t", "role": "engine", "content": "x", "model": "m", "iteration": 1, "stage": "stop"})
+
+    streamed = tmp_path / "streamed.json"
+    write_transcript_split_json(iter(transcript), str(streamed))
+
+    buckets = {"improved": [], "old": [], "other": []}
+    for entry in transcript:
+        buckets[entry.get("bucket") if entry.get("bucket") in ("improved", "old") else "other"].append(entry)
+    expected = json.dumps(buckets, ensure_ascii=False, indent=2)
+    assert streamed.read_text(encoding="utf-8") == expected
+
+    empty = tmp_path / "empty.json"
+    write_transcript_split_json([], str(empty))
+    assert empty.read_text(encoding="utf-8") == json.dumps({"improved": [], "old": [], "other": []}, indent=2)
+
+
+def test_jsonl_sink_keeps_completed_turns_when_run_is_interrupted(tmp_path):
+    path = tmp_path / "t.jsonl"
+    sink = JsonlTranscriptSink(path)
+    with pytest.raises(KeyboardInterrupt):
+        SelfTalkEngine(client=FlakyClient(fail_after=3), quiet=True).run(CFG, sink=sink)
+
+    # Written before close: init(2) + draft + critic prompt/feedback + revise prompt/revision + next critic prompt
+    entries = list(read_transcript_jsonl(path))
+    assert [e["stage"] for e in entries] == [
+        "init", "init", "draft", "critic_prompt", "critic_feedback", "revise_prompt", "revision", "critic_prompt",
+    ]
+    sink.close()
+
+
+def test_jsonl_sink_run_returns_sink_and_supports_summary_and_split(tmp_path):
+    path = tmp_path / "t.jsonl"
+    with JsonlTranscriptSink(path, flush_every=100) as sink:
+        final, transcript = SelfTalkEngine(client=FlakyClient(), quiet=True).run(CFG, sink=sink)
+        assert transcript is sink
+        assert len(sink) == 15
+        assert summarize_transcript(sink)["total"]["calls"] == 7
+
+    split = tmp_path / "t.json"
+    split_jsonl_to_json(path, split)
+    data = json.loads(split.read_text(encoding="utf-8"))
+    assert [e["content"] for e in data["improved"]][-1] == final
+    assert len(data["old"]) + len(data["improved"]) == 15
+
+
+def test_jsonl_sink_buffers_until_flush_every(tmp_path):
+    path = tmp_path / "t.jsonl"
+    sink = JsonlTranscriptSink(path, flush_every=3)
+    sink.append({"n": 1})
+    sink.append({"n": 2})
+    assert path.read_text(encoding="utf-8") == ""
+    sink.append({"n": 3})
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+    sink.close()
+
+
+@pytest.mark.parametrize("now", [1700000000.25, 1700000000.0])
+def test_compact_transcript_writes_the_same_jsonl_as_a_sink(tmp_path, monkeypatch, now):
+    # Both paths stamp entries with the same clock; whole seconds check that
+    # isoformat() drops the microseconds the same way for both
+    monkeypatch.setattr("selftalk.transcript.time", SimpleNamespace(time=lambda: now, monotonic=time.monotonic))
+    monkeypatch.setattr("selftalk.engine._ts", lambda: datetime.fromtimestamp(now, timezone.utc).isoformat())
+    cfg = EngineConfig(system_prompt="s", user_goal="g", iterations=2, stop_similarity=0.99)
+
+    compact = CompactTranscript()
+    _, transcript = SelfTalkEngine(client=FlakyClient(), quiet=True).run(cfg, sink=compact)
+    assert transcript is compact
+    write_transcript_jsonl(transcript, str(tmp_path / "compact.jsonl"))
+    with JsonlTranscriptSink(tmp_path / "sink.jsonl") as sink:
+        SelfTalkEngine(client=FlakyClient(), quiet=True).run(cfg, sink=sink)
+    assert (tmp_path / "compact.jsonl").read_bytes() == (tmp_path / "sink.jsonl").read_bytes()
+
+    # Without a sink run() still hands back a plain, JSON-serializable list
+    _, plain = SelfTalkEngine(client=FlakyClient(), quiet=True).run(cfg)
+    assert isinstance(plain, list) and plain == list(compact)
+    assert json.loads(json.dumps(plain)) == plain
+
+
+def test_compact_transcript_keeps_appended_dicts_as_they_were():
+    entries = [
+        {"ts": "2024-01-01T00:00:00+00:00", "role": "user", "content": "g", "model": "m", "iteration": None, "stage": "init", "bucket": "old"},
+        {"ts": "t", "role": "assistant", "content": "a", "model": "m", "iteration": 0, "call": {"total_tokens": 3}},
+        {"role": "engine", "content": "x", "ts": "t", "model": "m", "iteration": 1},
+        {"n": 1},
+    ]
+    transcript = CompactTranscript(entries)
+    assert transcript == entries and transcript[:2] == entries[:2]
+    assert [list(e) for e in transcript] == [list(e) for e in entries]
+    assert transcript[1]["call"] is entries[1]["call"]
+
+
+def test_compact_transcript_memory():
+    contents = [f"answer {n}" for n in range(2000)]
+
+    def traced(build):
+        tracemalloc.start()
+        try:
+            kept = build()
+            size = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        assert len(kept) == 2000
+        return size
+
+    def dicts():
+        stamp = time.time()
+        return [
+            {"ts": datetime.fromtimestamp(stamp, timezone.utc).isoformat(), "role": "assistant", "content": c,
+             "model": "mistral-large-latest", "iteration": n, "stage": "revision", "bucket": "improved"}
+            for n, c in enumerate(contents)
+        ]
+
+    def compact():
+        transcript = CompactTranscript()
+        for n, c in enumerate(contents):
+            transcript.add("assistant", c, "mistral-large-latest", n, stage="revision", bucket="improved")
+        return transcript
+
+    assert traced(compact) < 0.5 * traced(dicts)